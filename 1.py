@@ -1,6 +1,9 @@
 import random
 import math
 import matplotlib.pyplot as plt
+import numpy as np
+
+from distributions import Exponential, Uniform, get_distribution
 
 def generate_arrivals(T, arrivals_min, arrivals_max):
     """
@@ -42,6 +45,51 @@ def generate_service_times(num_people, mode='uniform', param1=2.0, param2=5.0):
         raise ValueError("Unknown mode. Use 'uniform' or 'exp'.")
     return service_times
 
+def _as_generator(seed):
+    """
+    seed может быть None, целым числом или уже готовым numpy.random.Generator.
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+def generate_arrivals_batch(T, arrivals_min, arrivals_max, replications=None, seed=None):
+    """
+    Пакетная версия generate_arrivals на NumPy.
+
+    replications: None - вернуть массив формы (T,),
+                  число R - массив формы (R, T) (R независимых прогонов).
+    seed: None, целое число или numpy.random.Generator.
+
+    Возвращает массив целых чисел из [arrivals_min, arrivals_max].
+    """
+    rng = _as_generator(seed)
+    shape = T if replications is None else (replications, T)
+    return rng.integers(arrivals_min, arrivals_max, size=shape, endpoint=True)
+
+def generate_service_times_batch(num_people, mode='uniform', param1=2.0, param2=5.0,
+                                 replications=None, seed=None, **params):
+    """
+    Пакетная версия generate_service_times на NumPy.
+    mode='uniform': равномерное распределение [param1, param2].
+    mode='exp': экспоненциальное с параметром mu = param1 (среднее 1/mu).
+    Любой другой mode - распределение из реестра distributions.py (имя и
+    параметры params, например mode='gamma', shape=2, scale=1.5) или готовый
+    объект Distribution (например, Empirical по измеренной гистограмме).
+
+    replications: None - массив формы (num_people,), число R - форма (R, num_people).
+    seed: None, целое число или numpy.random.Generator.
+    """
+    rng = _as_generator(seed)
+    shape = num_people if replications is None else (replications, num_people)
+    if mode == 'uniform':
+        dist = Uniform(param1, param2)
+    elif mode == 'exp':
+        dist = Exponential(param1)
+    else:
+        dist = get_distribution(mode, **params)
+    return dist.sample(shape, rng)
+
 # ПАРАМЕТРЫ МОДЕЛИ
 T = 60                # длительность моделирования (например, 60 "минут")
 arrivals_min = 0      # минимум человек в минуту
@@ -118,4 +166,15 @@ print(f"Всего сгенерировано людей за {T} минут: {t
     # Третья: гистограмма «равномерного» времени обслуживания.
     # Четвёртая: гистограмма «экспоненциального» времени обслуживания.
 # В реальной задаче (модели) эти данные потом служат входом для расчёта очередей (сколько людей ожидает, когда турникет занят и т.д.).
-# Но уже здесь мы видим, как выглядит поток и какое может быть время обслуживания при разных предположениях.
\ No newline at end of file
+# Но уже здесь мы видим, как выглядит поток и какое может быть время обслуживания при разных предположениях.
+
+# Пакетные версии generate_arrivals_batch и generate_service_times_batch:
+# Делают то же самое, но сразу целым массивом NumPy через numpy.random.Generator (без цикла по одному числу).
+# Параметр replications=R даёт массив формы (R, T) - сразу R независимых прогонов. Режимы 'uniform'/'exp' те же,
+# seed - целое число (воспроизводимость) или готовый Generator, чтобы несколько генераторов брали числа из одного потока.
+
+# Реестр распределений (distributions.py)
+# Кроме 'uniform' и 'exp' доступны 'lognormal', 'gamma', 'deterministic', а также 'discrete' и 'empirical' -
+# распределения по измеренным данным. У каждого есть sample(n) - сразу массив из n значений.
+# Эмпирическое распределение по гистограмме с тысячами корзин выбирает корзину через таблицу псевдонимов
+# (AliasTable): одна случайная ячейка и одно сравнение на значение, без поиска по функции распределения.
@@ -1,48 +1,163 @@
 import math
 import random
 import matplotlib.pyplot as plt
+import numpy as np
+
+from schedule import Schedule
+
+# Интенсивность по интервалам (минуты с 8:00), скомпилированная в массив границ
+lambda_schedule = Schedule([
+    (0,  10, 1.0),  # 8:00-8:10
+    (10, 15, 3.0),  # 8:10-8:15
+    (15, 20, 6.0),  # 8:15-8:20 (пик)
+    (20, 25, 3.0),  # 8:20-8:25 (ещё приходят)
+    (25, 30, 1.0),  # 8:25-8:30 (редкие опоздавшие)
+], default=1.0)
 
 def piecewise_lambda(minute_from_8h):
     """
     Функция, которая возвращает интенсивность λ (чел/мин),
     исходя из того, какая сейчас минута с 8:00 (0..30).
 
-    minute_from_8h: целое число, 0 <= minute_from_8h < 30.
+    minute_from_8h: число 0 <= minute_from_8h < 30
+                    или массив NumPy таких чисел (тогда вернётся массив λ).
     """
-    if 0 <= minute_from_8h < 10:
-        return 1.0  # 8:00-8:10
-    elif 10 <= minute_from_8h < 15:
-        return 3.0  # 8:10-8:15
-    elif 15 <= minute_from_8h < 20:
-        return 6.0  # 8:15-8:20 (пик)
-    elif 20 <= minute_from_8h < 25:
-        return 3.0  # 8:20-8:25 (ещё приходят)
-    else:
-        return 1.0  # 8:25-8:30 (редкие опоздавшие)
+    return lambda_schedule.at(minute_from_8h)
 
-def generate_poisson_arrivals_piecewise(total_minutes=30):
+def poisson_knuth(lam):
+    """
+    Метод Кнута: перемножаем равномерные числа, пока произведение больше exp(-lam).
+    Требует O(lam) случайных чисел, поэтому годится только для малых lam.
+    """
+    L = math.exp(-lam)
+    k = 0
+    p = 1.0
+    while p > L:
+        k += 1
+        p *= random.random()
+    return k - 1
+
+def poisson_ptrs(lam):
+    """
+    Метод PTRS (Hörmann, 1993) - преобразованное отбраковывание.
+    Ожидаемое число итераций ограничено константой при любом lam >= 10,
+    exp(-lam) не вычисляется, поэтому нет и потери точности при больших lam.
+    """
+    slam = math.sqrt(lam)
+    loglam = math.log(lam)
+    b = 0.931 + 2.53 * slam
+    a = -0.059 + 0.02483 * b
+    invalpha = 1.1239 + 1.1328 / (b - 3.4)
+    vr = 0.9277 - 3.6224 / (b - 2)
+    while True:
+        U = random.random() - 0.5
+        V = random.random()
+        us = 0.5 - abs(U)
+        k = math.floor((2 * a / us + b) * U + lam + 0.43)
+        if us >= 0.07 and V <= vr:
+            return k
+        if k < 0 or (us < 0.013 and V > us):
+            continue
+        if (math.log(V) + math.log(invalpha) - math.log(a / (us * us) + b)
+                <= -lam + k * loglam - math.lgamma(k + 1)):
+            return k
+
+def poisson_sample(lam):
+    """
+    Одно значение из Poisson(lam) за ожидаемо постоянное время:
+    при lam < 10 - метод Кнута, иначе - PTRS.
+    """
+    if lam <= 0:
+        return 0
+    if lam < 10:
+        return poisson_knuth(lam)
+    return poisson_ptrs(lam)
+
+def generate_poisson_arrivals_piecewise(total_minutes=30, rate=piecewise_lambda):
     """
     Генерируем arrivals для каждого из 30 минут (с 8:00 до 8:30).
-    При этом для каждой минуты t мы берём λ(t) из piecewise_lambda(t) и
-    генерируем Poisson(λ(t)) человек.
+    При этом для каждой минуты t мы берём λ(t) из rate(t) (по умолчанию
+    piecewise_lambda) и генерируем Poisson(λ(t)) человек.
 
     Возвращает список arrivals, где arrivals[i] - число людей,
     пришедших в минуту (8:00 + i).
     """
     arrivals = []
     for m in range(total_minutes):
-        lam = piecewise_lambda(m)  # интенсивность для минуты m
+        lam = rate(m)  # интенсивность для минуты m
         # Генерируем одно число из Пуассона с параметром lam (т.к. dt=1 мин)
-        # Метод Кнута (наивный)
-        L = math.exp(-lam)
-        k = 0
-        p = 1.0
-        while p > L:
-            k += 1
-            p *= random.random()
-        arrivals.append(k - 1)
+        arrivals.append(poisson_sample(lam))
     return arrivals
 
+def _rate_values(rate, t):
+    """
+    Значения интенсивности в моментах t (массив NumPy).
+    rate - функция (векторная или скалярная, как piecewise_lambda)
+           или массив интенсивностей по минутам.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    if not callable(rate):
+        rate = np.asarray(rate, dtype=np.float64)
+        idx = np.minimum(t.astype(np.int64), rate.size - 1)
+        return rate[idx]
+    try:
+        values = np.asarray(rate(t), dtype=np.float64)
+        if values.shape == t.shape:
+            return values
+    except (TypeError, ValueError):
+        pass
+    # функция принимает только скаляр (if/elif внутри)
+    return np.array([rate(x) for x in t], dtype=np.float64)
+
+def generate_poisson_arrivals_batch(total_minutes=30, rate=piecewise_lambda, replications=None, seed=None):
+    """
+    Векторная версия generate_poisson_arrivals_piecewise на NumPy.
+
+    rate         - функция λ(t) (как piecewise_lambda) или массив λ по минутам.
+    replications - None (массив формы (total_minutes,)) или R (форма (R, total_minutes)).
+    seed         - None, целое число или numpy.random.Generator.
+    """
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+    lam = _rate_values(rate, np.arange(total_minutes))
+    shape = lam.shape if replications is None else (replications, total_minutes)
+    return rng.poisson(lam, size=shape)
+
+def generate_nhpp_arrival_times(total_minutes=30, rate=piecewise_lambda, lam_max=None, seed=None):
+    """
+    Точные моменты прихода (в минутах от 8:00) для неоднородного
+    пуассоновского потока с интенсивностью λ(t).
+
+    - rate задан массивом по минутам (кусочно-постоянная λ): для каждой минуты
+      берём Poisson(λ_m) и раскладываем приходы равномерно внутри минуты -
+      это точное распределение (метод обращения по минутам).
+    - rate - функция: прореживание (Льюис-Шедлер). Кандидаты берутся из
+      однородного потока с интенсивностью lam_max, каждый принимается
+      с вероятностью λ(t)/lam_max. lam_max должен быть верхней границей λ(t);
+      если не задан, оценивается по сетке с шагом 0.01 мин с запасом 10%.
+
+    Возвращает отсортированный массив NumPy моментов прихода.
+    """
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+
+    if not callable(rate):
+        lam = np.asarray(rate, dtype=np.float64)[:total_minutes]
+        counts = rng.poisson(lam)
+        times = np.repeat(np.arange(lam.size, dtype=np.float64), counts)
+        times += rng.random(times.size)
+        times.sort()
+        return times
+
+    if lam_max is None:
+        grid = np.arange(0.0, total_minutes, 0.01)
+        lam_max = 1.1 * float(_rate_values(rate, grid).max())
+    if lam_max <= 0:
+        return np.empty(0)
+
+    n = rng.poisson(lam_max * total_minutes)
+    candidates = np.sort(rng.uniform(0.0, total_minutes, size=n))
+    accept = rng.random(n) * lam_max < _rate_values(rate, candidates)
+    return candidates[accept]
+
 def minute_to_hhmm(minute_from_8h):
     """
     Преобразует "количество минут от 8:00" в строку формата HH:MM.
@@ -86,6 +201,10 @@ total_people = sum(arrivals)
 print("Cгенерированный список (первые 10 значений):", arrivals[:10])
 print(f"Всего пришло людей за период 8:00-8:30: {total_people}")
 
+# Точные моменты прихода для того же λ(t) (прореживание)
+arrival_times = generate_nhpp_arrival_times(total_minutes=30, rate=piecewise_lambda, seed=42)
+print(f"Моменты прихода (первые 5, мин от 8:00): {np.round(arrival_times[:5], 2)}, всего: {arrival_times.size}")
+
 
 # Функция generate_poisson_arrivals:
 # На вход: λ (людей в минуту), T (общая длительность, минут), dt (шаг, минут). На каждом шаге «Δt» мы генерируем целое число людей по закону Пуассона с параметром μ=λ⋅Δt.
@@ -104,3 +223,17 @@ print(f"Всего пришло людей за период 8:00-8:30: {total_p
 # После 8:20 (λ=3, а затем λ=1) — это опоздавшие, их меньше, но они всё же есть.
 
 # Таким образом, мы имитируем реальную ситуацию, когда студентов волнами тянет к турникету вблизи начала пары (8:20).
+
+# piecewise_lambda:
+# Интервалы хранятся в lambda_schedule (schedule.Schedule): значение ищется бинарным поиском, а для массива минут
+# вычисляется сразу весь массив λ, поэтому генераторы ниже вызывают функцию один раз на весь горизонт.
+
+# Генерация Пуассона:
+# Метод Кнута (poisson_knuth) требует O(λ) случайных чисел и вычисляет exp(-λ), который при λ в сотни уходит в 0.
+# Поэтому poisson_sample при λ >= 10 переключается на PTRS (poisson_ptrs) - метод преобразованного отбраковывания
+# с ограниченным ожидаемым числом итераций при любом λ. generate_poisson_arrivals_batch делает то же сразу массивом NumPy.
+
+# generate_nhpp_arrival_times:
+# Возвращает не число людей по минутам, а сами моменты прихода при меняющейся λ(t). Для функции λ(t) используется
+# прореживание: берём поток с постоянной интенсивностью λ_max и оставляем каждый приход с вероятностью λ(t)/λ_max.
+# Для массива λ по минутам - в каждой минуте Poisson(λ_m) приходов, разложенных равномерно внутри минуты.
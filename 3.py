@@ -1,13 +1,20 @@
 import random
 import math
 import matplotlib.pyplot as plt
+import numpy as np
+
+from event_sim import simulate_events
+from customer_store import RingQueue
+from queueing_formulas import turnstile_metrics
+from steady_state import run_batch_means
 
 def simulate_single_turnstile(
         T=60,                # общее время моделирования в минутах
         arrivals_min=0,      # минимум пришедших за 1 минуту
         arrivals_max=5,      # максимум пришедших за 1 минуту
         service_rate=1/3.0,  # параметр mu для экспоненциального обслуживания (1/3 => среднее 3 мин)
-        seed=None
+        seed=None,
+        stats=None           # накопитель streaming_stats.TurnstileStats (опционально)
 ):
     """
     Имитация работы одноканальной системы (турникет) за T минут.
@@ -19,6 +26,8 @@ def simulate_single_turnstile(
     service_rate   - интенсивность обслуживания (му), исп. в экспоненциальном распределении.
                      (например, 1/3 => в среднем 3 минуты на одного человека)
     seed           - начальное значение для генератора случайных чисел (для воспроизводимости, опционально).
+    stats          - накопитель streaming_stats.TurnstileStats. Если задан, списки не хранятся,
+                     а ожидания, длина очереди и занятость копятся в нём (память не растёт с T).
 
     ВОЗВРАЩАЕТ:
     словарь с результатами:
@@ -26,6 +35,7 @@ def simulate_single_turnstile(
       - queue_length       (длина очереди на конец каждой минуты),
       - waiting_times      (список времен ожидания для всех обслуженных),
       - server_busy_flag   (1 или 0 в каждую минуту, занят турникет или нет).
+    При заданном stats возвращается {"stats": stats}.
     """
     if seed is not None:
         random.seed(seed)
@@ -35,8 +45,8 @@ def simulate_single_turnstile(
     waiting_times = []     # индивидуальное время ожидания каждого обслуженного студента
     server_busy_flag = []  # список (0/1) - занят ли сервер в конце каждой минуты
 
-    # Очередь: будем хранить в ней кортежи (time_of_arrival)
-    queue = []
+    # Очередь: будем хранить в ней минуту прихода (кольцевой буфер, pop за O(1))
+    queue = RingQueue(typecode='q')
 
     # Сколько ещё минут (в дробном виде) турникет будет занят (обслуживает текущего человека)
     server_busy_time = 0.0
@@ -55,7 +65,7 @@ def simulate_single_turnstile(
         arrivals_num = random.randint(arrivals_min, arrivals_max)  # число пришедших
         # Записываем их время прихода (minute)
         for _ in range(arrivals_num):
-            queue.append(minute)
+            queue.push(minute)
 
         # --- 2) Обслуживание ---
         if server_busy_time > 0:
@@ -67,12 +77,15 @@ def simulate_single_turnstile(
             # сервер свободен, берем нового человека из очереди (если есть)
             if len(queue) > 0:
                 # возьмём первого (FIFO)
-                arrival_time = queue.pop(0)
+                arrival_time = queue.pop()
                 # время начала обслуживания = текущая минута
                 start_service_time = minute
                 # время ожидания
                 wait = start_service_time - arrival_time
-                waiting_times.append(wait)
+                if stats is not None:
+                    stats.add_wait(wait)
+                else:
+                    waiting_times.append(wait)
 
                 # сгенерируем время обслуживания (экспоненциальное)
                 # service_rate = mu
@@ -86,6 +99,10 @@ def simulate_single_turnstile(
                 server_busy_time = service_duration  # кол-во минут
 
         # Запись текущей длины очереди и занятости
+        if stats is not None:
+            # значение на конец минуты действует до конца следующей минуты
+            stats.update_state(minute, len(queue), 1 if server_busy_time > 0 else 0)
+            continue
         queue_length.append(len(queue))
         # Флаг занятости сервера
         if server_busy_time > 0:
@@ -93,6 +110,10 @@ def simulate_single_turnstile(
         else:
             server_busy_flag.append(0)
 
+    if stats is not None:
+        stats.close(T)
+        return {"stats": stats}
+
     results = {
         "time_points": time_points,
         "queue_length": queue_length,
@@ -102,75 +123,205 @@ def simulate_single_turnstile(
     return results
 
 
+def simulate_single_turnstile_events(
+        T=60,
+        arrivals_min=0,
+        arrivals_max=5,
+        service_rate=1/3.0,
+        seed=None,
+        servers=1,
+        discipline="shared",
+        stats=None,
+        service=None
+):
+    """
+    То же, что simulate_single_turnstile, но на событийном движке (event_sim).
+
+    Приходы внутри минуты распределяются равномерно, турникет может
+    обслужить несколько человек за минуту, а время работы зависит от числа
+    событий, а не от T. Параметры и словарь результатов - те же, плюс
+    servers    - число параллельных турникетов (G/G/c),
+    discipline - "shared" (общая очередь) или "jsq" (своя очередь у каждого
+                 турникета, пришедший встаёт в самую короткую).
+    В результате добавлен server_utilization - загрузка каждого турникета.
+    stats      - накопитель streaming_stats.TurnstileStats вместо списков (см. event_sim).
+    service    - распределение времени обслуживания (в минутах) из distributions.py
+                 вместо экспоненциального с service_rate (например, Empirical
+                 по измерениям).
+    """
+    return simulate_events(
+        T,
+        arrivals=lambda minute: random.randint(arrivals_min, arrivals_max),
+        service_times=service if service is not None else (lambda: random.expovariate(service_rate)),
+        seed=seed,
+        servers=servers,
+        discipline=discipline,
+        stats=stats
+    )
+
+
+def simulate_single_turnstile_fast(
+        T=60,
+        arrivals_min=0,
+        arrivals_max=5,
+        service_rate=1/3.0,
+        seed=None,
+        spread=True
+):
+    """
+    Быстрый режим для одного турникета с дисциплиной FIFO (рекурсия Линдли).
+
+    Время ожидания n-го человека: W[n] = max(0, W[n-1] + S[n-1] - (A[n] - A[n-1])).
+    Если U - накопленная сумма (S[n-1] - (A[n] - A[n-1])), то
+    W = U - (накопленный минимум U), т.е. всё считается массивами NumPy
+    без цикла по людям. Длина очереди и занятость на конец каждой минуты
+    получаются подсчётом (np.searchsorted) по отсортированным моментам
+    прихода, начала и конца обслуживания.
+
+    ПАРАМЕТРЫ: те же, что у simulate_single_turnstile, плюс
+    spread - распределять ли приходы равномерно внутри минуты
+             (иначе все пришедшие за минуту m приходят ровно в m).
+
+    ВОЗВРАЩАЕТ:
+    словарь с теми же ключами (time_points, queue_length, waiting_times,
+    server_busy), но значения - массивы NumPy.
+    """
+    rng = np.random.default_rng(seed)
+
+    # Моменты прихода (минуты), отсортированные по возрастанию
+    counts = rng.integers(arrivals_min, arrivals_max, size=T, endpoint=True)
+    arrivals = np.repeat(np.arange(T, dtype=np.float64), counts)
+    if spread:
+        arrivals += rng.random(arrivals.size)
+        arrivals.sort()
+
+    # Времена обслуживания: Exp(mu), среднее 1/mu минут
+    service = rng.exponential(1.0 / service_rate, size=arrivals.size)
+
+    # Рекурсия Линдли через накопленную сумму и накопленный минимум
+    steps = np.empty(arrivals.size)
+    if arrivals.size:
+        steps[0] = 0.0
+        steps[1:] = service[:-1] - np.diff(arrivals)
+    u = np.cumsum(steps)
+    waits = u - np.minimum.accumulate(np.minimum(u, 0.0))
+    np.maximum(waits, 0.0, out=waits)  # убираем ошибки округления
+
+    start = arrivals + waits  # начало обслуживания (не убывает при FIFO)
+    depart = start + service  # окончание обслуживания (тоже не убывает)
+
+    # Состояние на конец каждой минуты (граница m+1)
+    bounds = np.arange(1, T + 1, dtype=np.float64)
+    arrived = np.searchsorted(arrivals, bounds, side='left')
+    started = np.searchsorted(start, bounds, side='left')
+    departed = np.searchsorted(depart, bounds, side='left')
+
+    served = np.searchsorted(start, T, side='left')  # начали обслуживание до T
+
+    return {
+        "time_points": np.arange(T),
+        "queue_length": arrived - started,
+        "waiting_times": waits[:served],
+        "server_busy": (started - departed > 0).astype(np.int8)
+    }
+
+
 # --- Запуск имитации ---
-res = simulate_single_turnstile(
-    T=60,             # 60 минут
-    arrivals_min=0,   # 0..5 человек в минуту
-    arrivals_max=5,
-    service_rate=1/3, # среднее время обслуживания ~ 3 мин
-    seed=42           # чтобы пример был воспроизводим
-)
-
-time_points = res["time_points"]
-queue_length = res["queue_length"]
-waiting_times = res["waiting_times"]
-server_busy = res["server_busy"]
-
-# --- ПОСТРОЕНИЕ ГРАФИКОВ ---
-plt.figure(figsize=(12,6))
-
-# График 1: Длина очереди по времени
-plt.subplot(2,2,1)
-plt.plot(time_points, queue_length, marker='o', label='Длина очереди')
-plt.xlabel("Время (мин)")
-plt.ylabel("Число людей в очереди")
-plt.title("Длина очереди во времени")
-plt.grid(True)
-plt.legend()
-
-# График 2: Сервер (турникет) занят или нет
-plt.subplot(2,2,2)
-plt.plot(time_points, server_busy, drawstyle='steps-post', color='orange', label='Занят(1) / свободен(0)')
-plt.ylim(-0.1, 1.1)
-plt.xlabel("Время (мин)")
-plt.ylabel("Состояние сервера")
-plt.title("Занятость турникета во времени")
-plt.grid(True)
-plt.legend()
-
-# График 3: Гистограмма времён ожидания
-plt.subplot(2,2,3)
-plt.hist(waiting_times, bins=20, edgecolor='black', alpha=0.7)
-plt.xlabel("Время ожидания (мин)")
-plt.ylabel("Частота")
-plt.title("Распределение времени ожидания")
-plt.grid(True)
-
-# График 4: Эмпирическое распределение waiting_times (CDF)
-sorted_waits = sorted(waiting_times)
-cdf_y = [(i+1)/len(sorted_waits) for i in range(len(sorted_waits))]
-plt.subplot(2,2,4)
-plt.plot(sorted_waits, cdf_y, marker='.')
-plt.xlabel("Время ожидания (мин)")
-plt.ylabel("F(w)")
-plt.title("Эмпирическая функция распределения (CDF)")
-plt.grid(True)
-
-plt.tight_layout()
-plt.show()
-
-# Печатаем простую статистику
-print(f"Средняя длина очереди: {sum(queue_length)/len(queue_length):.2f}")
-print(f"Макс. длина очереди: {max(queue_length)}")
-if waiting_times:
-    print(f"Среднее время ожидания: {sum(waiting_times)/len(waiting_times):.2f} мин")
-    print(f"Максимальное время ожидания: {max(waiting_times):.2f} мин")
-    print(f"Обслужено людей: {len(waiting_times)}")
-else:
-    print("Никто не был обслужен (нет времени ожидания).")
-
-server_utilization = sum(server_busy)/len(server_busy)  # доля минут, когда сервер был занят
-print(f"Загрузка турникета (доля занятости): {server_utilization*100:.1f}%")
+# Код ниже выполняется только при запуске файла как скрипта: при импорте модуля
+# (например, ради simulate_single_turnstile_*) примеры не запускаются.
+if __name__ == "__main__":
+    res = simulate_single_turnstile(
+        T=60,             # 60 минут
+        arrivals_min=0,   # 0..5 человек в минуту
+        arrivals_max=5,
+        service_rate=1/3, # среднее время обслуживания ~ 3 мин
+        seed=42           # чтобы пример был воспроизводим
+    )
+
+    time_points = res["time_points"]
+    queue_length = res["queue_length"]
+    waiting_times = res["waiting_times"]
+    server_busy = res["server_busy"]
+
+    # --- ПОСТРОЕНИЕ ГРАФИКОВ ---
+    plt.figure(figsize=(12,6))
+
+    # График 1: Длина очереди по времени
+    plt.subplot(2,2,1)
+    plt.plot(time_points, queue_length, marker='o', label='Длина очереди')
+    plt.xlabel("Время (мин)")
+    plt.ylabel("Число людей в очереди")
+    plt.title("Длина очереди во времени")
+    plt.grid(True)
+    plt.legend()
+
+    # График 2: Сервер (турникет) занят или нет
+    plt.subplot(2,2,2)
+    plt.plot(time_points, server_busy, drawstyle='steps-post', color='orange', label='Занят(1) / свободен(0)')
+    plt.ylim(-0.1, 1.1)
+    plt.xlabel("Время (мин)")
+    plt.ylabel("Состояние сервера")
+    plt.title("Занятость турникета во времени")
+    plt.grid(True)
+    plt.legend()
+
+    # График 3: Гистограмма времён ожидания
+    plt.subplot(2,2,3)
+    plt.hist(waiting_times, bins=20, edgecolor='black', alpha=0.7)
+    plt.xlabel("Время ожидания (мин)")
+    plt.ylabel("Частота")
+    plt.title("Распределение времени ожидания")
+    plt.grid(True)
+
+    # График 4: Эмпирическое распределение waiting_times (CDF)
+    sorted_waits = sorted(waiting_times)
+    cdf_y = [(i+1)/len(sorted_waits) for i in range(len(sorted_waits))]
+    plt.subplot(2,2,4)
+    plt.plot(sorted_waits, cdf_y, marker='.')
+    plt.xlabel("Время ожидания (мин)")
+    plt.ylabel("F(w)")
+    plt.title("Эмпирическая функция распределения (CDF)")
+    plt.grid(True)
+
+    plt.tight_layout()
+    plt.show()
+
+    # Печатаем простую статистику
+    print(f"Средняя длина очереди: {sum(queue_length)/len(queue_length):.2f}")
+    print(f"Макс. длина очереди: {max(queue_length)}")
+    if waiting_times:
+        print(f"Среднее время ожидания: {sum(waiting_times)/len(waiting_times):.2f} мин")
+        print(f"Максимальное время ожидания: {max(waiting_times):.2f} мин")
+        print(f"Обслужено людей: {len(waiting_times)}")
+    else:
+        print("Никто не был обслужен (нет времени ожидания).")
+
+    server_utilization = sum(server_busy)/len(server_busy)  # доля минут, когда сервер был занят
+    print(f"Загрузка турникета (доля занятости): {server_utilization*100:.1f}%")
+
+    # Для сравнения - та же модель на событийном движке
+    res_ev = simulate_single_turnstile_events(T=60, arrivals_min=0, arrivals_max=5, service_rate=1/3, seed=42)
+    print(f"[событийная модель] Средняя длина очереди: "
+          f"{sum(res_ev['queue_length'])/len(res_ev['queue_length']):.2f}, "
+          f"обслужено: {len(res_ev['waiting_times'])}")
+
+    # Стационарные показатели по формулам (без имитации), если модель это позволяет
+    formula = turnstile_metrics({"arrivals_min": 0, "arrivals_max": 5, "service_rate": 1/3}, allow_approximation=True)
+    print(f"[формула {formula['method']}] Wq = {formula['Wq']:.2f} мин, загрузка = {formula['utilization']*100:.1f}%")
+
+    # Быстрый режим (рекурсия Линдли) - годится и для очень длинных прогонов
+    res_fast = simulate_single_turnstile_fast(T=60, arrivals_min=0, arrivals_max=5, service_rate=1/3, seed=42)
+    print(f"[рекурсия Линдли] Средняя длина очереди: {res_fast['queue_length'].mean():.2f}, "
+          f"обслужено: {res_fast['waiting_times'].size}")
+
+    # Стационарный режим по одному длинному прогону: разгон от пустой очереди отбрасывается (MSER-5),
+    # интервал - по пакетным средним. Поток 0..2 чел/мин, обслуживание в среднем 0.8 мин (загрузка 0.8).
+    steady = run_batch_means(simulate_single_turnstile_events,
+                             {"T": 100000, "arrivals_min": 0, "arrivals_max": 2, "service_rate": 1.25}, seed=42)
+    for name in ("avg_wait", "avg_queue"):
+        est = steady[name]
+        print(f"[пакетные средние] {name}: {est['mean']:.3f} ± {est['half_width']:.3f} "
+              f"(отброшено {est['warmup']} наблюдений, по всему прогону {est['raw_mean']:.3f})")
 
 
 # Функция simulate_single_turnstile. Параметры:
@@ -199,4 +350,45 @@ print(f"Загрузка турникета (доля занятости): {serv
 # Вывод статистики:
 # Средняя и максимальная длина очереди,
 # Среднее и максимальное время ожидания,
-# Загрузка турникета — доля минут, когда он был занят.
\ No newline at end of file
+# Загрузка турникета — доля минут, когда он был занят.
+
+# Функция simulate_single_turnstile_events:
+# Та же модель, но без шага в 1 минуту. Движок event_sim.simulate_events хранит будущие события (приход, уход с турникета) в куче
+# и перескакивает от одного события к другому. Турникет может обслужить несколько человек за минуту,
+# а состояние (очередь, занятость) снимается на границе каждой минуты, поэтому словарь результатов такой же.
+
+# Функция simulate_single_turnstile_fast:
+# Для одного турникета с FIFO время ожидания подчиняется рекурсии Линдли W[n+1] = max(0, W[n] + S[n] - (A[n+1] - A[n])).
+# Её можно посчитать сразу для всех людей: W = U - min(0, накопленный минимум U), где U - накопленная сумма (S[n] - межприходный интервал).
+# Начало обслуживания = приход + ожидание, уход = начало + S. Длина очереди и занятость на конец минуты - это разности счётчиков
+# "пришло", "начало обслуживаться", "ушло", которые считаются через np.searchsorted по отсортированным моментам.
+# Так прогон на 10^7 человек занимает секунды, а не часы (в отличие от пошагового цикла).
+
+# queueing_formulas.turnstile_metrics:
+# Для многих вопросов имитация не нужна: M/M/1, M/M/c (формула Эрланга C) и M/G/1 (Поллачек-Хинчин) дают стационарные
+# L, Lq, W, Wq и загрузку сразу. Диспетчер берёт формулу, если модель подходит (пуассоновский поток), иначе запускает имитацию.
+# С cross_check=True считается и то, и другое, и расхождение больше rel_tol отмечается флагом diverged.
+# В нашем примере (в среднем 2.5 чел/мин при обслуживании 3 мин) загрузка больше 1 - очередь растёт без ограничения, Wq = inf.
+
+# Параметр stats (streaming_stats.TurnstileStats):
+# Для очень длинных горизонтов списки queue_length / waiting_times занимают гигабайты. Если передать stats, симуляторы
+# не хранят списки, а обновляют накопители на месте: среднее и дисперсия ожидания (Уэлфорд), квантили (P²),
+# гистограмма с фиксированными корзинами и точное среднее по времени длины очереди и занятости.
+# Накопители разных прогонов объединяются методом merge.
+
+# Очередь (customer_store.RingQueue):
+# Вместо списка с queue.pop(0), который сдвигает все элементы (O(n) на каждого обслуженного), очередь хранится
+# в кольцевом буфере array с индексами головы и хвоста - push и pop за O(1). Событийный движок с trace=True
+# дополнительно ведёт customer_store.CustomerStore - таблицу по людям (приход, начало, конец обслуживания, турникет),
+# которую можно выгрузить целиком (records(), save(), to_csv()).
+
+# Произвольное время обслуживания (distributions.py)
+# simulate_single_turnstile_events(service=...) принимает любое распределение из реестра: Gamma, LogNormal,
+# Deterministic или Empirical, построенное по измеренным временам прохода. Движок берёт значения блоками
+# через sampler(), а формулы queueing_formulas используют mean и var того же объекта.
+
+# Разгонный участок и пакетные средние (steady_state.py)
+# Прогон начинается с пустой очереди, поэтому первые минуты занижают стационарные средние. TurnstileStats(series=True)
+# хранит ряды ожиданий и длины очереди в сжатом виде (средние по пачкам, при переполнении пачки объединяются попарно),
+# правило MSER-5 находит, сколько первых наблюдений отбросить, а доверительный интервал строится по 20 пакетным средним
+# остатка того же прогона. run_batch_means делает всё это за один вызов - вместо многих независимых прогонов.
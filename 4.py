@@ -1,6 +1,14 @@
 import math
 import random
+import warnings
 import matplotlib.pyplot as plt
+import numpy as np
+
+from event_sim import simulate_events
+from customer_store import RingQueue
+from schedule import Schedule
+from replications import (run_replications, run_until_precision, format_summary,
+                          default_metrics, confidence_interval, batch_metrics, summarize)
 
 # --- 1. Параметры расписания (в минутах от 08:00) ---
 # Для удобства переведём всё время в "минуты с начала дня 08:00".
@@ -32,21 +40,23 @@ schedule_intervals = [
     (400, 480,  (2,  4)),  # 14:40 - 16:00 (пятая пара)
 ]
 
+# Расписание компилируется один раз в отсортированный массив границ (бинарный поиск вместо перебора)
+day_schedule = Schedule(schedule_intervals, default=(0, 0))  # (0, 0) - если вдруг за пределами расписания
+
 def get_arrivals_min_max(current_minute):
     """
     Возвращаем (arrivals_min, arrivals_max) для заданной минуты с 08:00,
     основываясь на расписании schedule_intervals.
     """
-    for (start_m, end_m, (mn, mx)) in schedule_intervals:
-        if start_m <= current_minute < end_m:
-            return (mn, mx)
-    return (0, 0)  # если вдруг за пределами расписания
+    return day_schedule.value(current_minute)
 
 def simulate_one_day(
         total_minutes=480,  # с 08:00 до 16:00
         service_min_sec=2.0,
         service_max_sec=5.0,
-        seed=None
+        seed=None,
+        stats=None,
+        arrivals=None
 ):
     """
     Имитация работы одного турникета с расписанием пар за весь день (08:00-16:00).
@@ -57,6 +67,11 @@ def simulate_one_day(
       - service_min_sec, service_max_sec : границы равномерного распределения
         на время обслуживания (секунды).
       - seed : фиксатор для случайного генератора (опционально).
+      - stats : накопитель streaming_stats.TurnstileStats (опционально). Если задан,
+        списки не хранятся, а статистика копится в нём (память не растёт с горизонтом).
+      - arrivals : реальный поток - число пришедших за каждую минуту (например,
+        строка turnstile_logs.daily_arrivals). Если задан, вместо randint по
+        расписанию в минуту minute приходит arrivals[minute] человек.
 
     ВОЗВРАЩАЕТ:
       словарь с:
@@ -64,6 +79,7 @@ def simulate_one_day(
         queue_length      : длина очереди на конце каждой минуты
         waiting_times     : время ожидания (минуты) для каждого обслуженного
         server_busy       : 0/1 (свободен/занят) в конце каждой минуты
+      или {"stats": stats}, если stats задан.
     """
     if seed is not None:
         random.seed(seed)
@@ -78,15 +94,18 @@ def simulate_one_day(
     waiting_times = []
     server_busy = []
 
-    queue = []  # список (время_прихода) для каждого человека
+    queue = RingQueue(typecode='q')  # минута прихода каждого человека (кольцевой буфер, pop за O(1))
     server_busy_time = 0.0  # на сколько минут турникет ещё занят
 
     for minute in time_points:
         # --- 1) Генерация приходов ---
-        (mn, mx) = get_arrivals_min_max(minute)
-        arrivals_num = random.randint(mn, mx)
+        if arrivals is not None:
+            arrivals_num = int(arrivals[minute])
+        else:
+            (mn, mx) = get_arrivals_min_max(minute)
+            arrivals_num = random.randint(mn, mx)
         for _ in range(arrivals_num):
-            queue.append(minute)  # человек пришёл в 'minute'
+            queue.push(minute)  # человек пришёл в 'minute'
 
         # --- 2) Обслуживание ---
         if server_busy_time > 0:
@@ -97,15 +116,21 @@ def simulate_one_day(
         else:
             # сервер свободен
             if len(queue) > 0:
-                arrival_t = queue.pop(0)
+                arrival_t = queue.pop()
                 waiting = minute - arrival_t
-                waiting_times.append(waiting)
+                if stats is not None:
+                    stats.add_wait(waiting)
+                else:
+                    waiting_times.append(waiting)
 
                 # Генерируем время обслуживания (равномерное [service_min_min..service_max_min])
                 dur = random.uniform(service_min_min, service_max_min)
 
                 # Установим, что турникет будет занят на dur минут
                 server_busy_time = dur
+        if stats is not None:
+            stats.update_state(minute, len(queue), 1 if server_busy_time > 0 else 0)
+            continue
         queue_length.append(len(queue))
 
         if server_busy_time > 0:
@@ -113,6 +138,10 @@ def simulate_one_day(
         else:
             server_busy.append(0)
 
+    if stats is not None:
+        stats.close(total_minutes)
+        return {"stats": stats}
+
     return {
         "time_points": time_points,
         "queue_length": queue_length,
@@ -120,6 +149,278 @@ def simulate_one_day(
         "server_busy": server_busy
     }
 
+def simulate_one_day_batch(
+        total_minutes=480,
+        service_min_sec=2.0,
+        service_max_sec=5.0,
+        replications=None,
+        seed=None,
+        arrivals=None
+):
+    """
+    simulate_one_day сразу для R независимых прогонов на NumPy.
+
+    Правила те же, минута за минутой: приходы randint(mn, mx) по расписанию;
+    если турникет занят - оставшееся время уменьшается на 1 минуту, иначе
+    первый в очереди начинает проход длительностью uniform(min, max).
+    Но состояние - массивы формы (R,), а не числа, и цикл Python идёт только
+    по минутам (480 шагов на все прогоны сразу).
+
+    Очередь не хранится по людям: A[r, m] - сколько пришло к концу минуты m,
+    served[r] - сколько начали обслуживание; длина очереди = A - served, а
+    минута прихода первого в очереди находится бинарным поиском по A.
+
+    ПАРАМЕТРЫ:
+      - total_minutes, service_min_sec, service_max_sec : как у simulate_one_day.
+      - replications : None - один прогон, число R - R прогонов.
+      - seed : зерно numpy.random.Generator (приходы - матрица (R, T), времена прохода -
+        матрица (R, T): в каждую минуту начинается не больше одного обслуживания).
+      - arrivals : реальный поток по минутам (одинаковый для всех прогонов).
+
+    ВОЗВРАЩАЕТ:
+      словарь той же схемы, что simulate_one_day, но с массивами:
+        time_points   : минуты (T,)
+        queue_length  : (R, T) (или (T,) при replications=None)
+        server_busy   : (R, T) из 0/1
+        waiting_times : список из R массивов ожиданий (или один массив)
+      Сводные показатели по прогонам - replications.batch_metrics.
+    """
+    rng = np.random.default_rng(seed)
+    R = 1 if replications is None else replications
+    T = total_minutes
+    if arrivals is None:
+        bounds = day_schedule.dense(T)
+        arr = rng.integers(bounds[:, 0], bounds[:, 1], size=(R, T), endpoint=True)
+    else:
+        arr = np.broadcast_to(np.asarray(arrivals[:T], dtype=np.int64), (R, T))
+    dur = rng.uniform(service_min_sec / 60.0, service_max_sec / 60.0, size=(R, T))
+
+    cum = np.cumsum(arr, axis=1)  # пришло к концу каждой минуты
+    # строки cum подряд в одном возрастающем массиве (сдвиг big на строку) - один searchsorted на все прогоны
+    big = int(cum[:, -1].max()) + 1 if T else 1
+    rows_all = np.arange(R)
+    flat = (cum + rows_all[:, None] * big).ravel()
+
+    served = np.zeros(R, dtype=np.int64)
+    busy_time = np.zeros(R)
+    queue_length = np.empty((R, T), dtype=np.int64)
+    server_busy = np.empty((R, T), dtype=np.int64)
+    waits = np.full((R, T), -1, dtype=np.int64)  # -1 - в эту минуту никто не начал проход
+
+    for minute in range(T):
+        was_busy = busy_time > 0
+        busy_time = np.where(was_busy, np.maximum(busy_time - 1.0, 0.0), busy_time)
+        rows = np.flatnonzero(~was_busy & (cum[:, minute] > served))
+        if len(rows):
+            # номер первого в очереди - served[r]; его минута прихода - сколько минут с cum <= served[r]
+            arrival_t = np.searchsorted(flat, served[rows] + rows * big, side='right') - rows * T
+            waits[rows, minute] = minute - arrival_t
+            busy_time[rows] = dur[rows, minute]
+            served[rows] += 1
+        queue_length[:, minute] = cum[:, minute] - served
+        server_busy[:, minute] = busy_time > 0
+
+    started = waits >= 0
+    waiting_times = np.split(waits[started], np.cumsum(started.sum(axis=1))[:-1])
+    if replications is None:
+        return {"time_points": np.arange(T), "queue_length": queue_length[0],
+                "waiting_times": waiting_times[0], "server_busy": server_busy[0]}
+    return {"time_points": np.arange(T), "queue_length": queue_length,
+            "waiting_times": waiting_times, "server_busy": server_busy}
+
+def simulate_one_day_events(
+        total_minutes=480,
+        service_min_sec=2.0,
+        service_max_sec=5.0,
+        seed=None,
+        servers=1,
+        discipline="shared",
+        stats=None,
+        arrivals=None,
+        arrival_times=None,
+        service=None
+):
+    """
+    То же, что simulate_one_day, но на событийном движке (event_sim).
+
+    Время обслуживания 2..5 сек больше не округляется до целой минуты:
+    турникет обслуживает людей подряд, сколько успеет. Параметры и
+    словарь результатов - те же, плюс
+    servers    - число параллельных турникетов (G/G/c),
+    discipline - "shared" (общая очередь) или "jsq" (своя очередь у каждого
+                 турникета, пришедший встаёт в самую короткую).
+    В результате добавлен server_utilization - загрузка каждого турникета.
+    stats      - накопитель streaming_stats.TurnstileStats вместо списков (см. event_sim).
+    arrivals   - реальный поток по минутам (как у simulate_one_day);
+    arrival_times - точные моменты прихода в минутах от 08:00
+                 (turnstile_logs.minute_offsets) - воспроизведение журнала без
+                 равномерного разброса внутри минуты.
+    service    - распределение времени обслуживания в секундах из distributions.py
+                 (например, Empirical по измеренной гистограмме) вместо
+                 равномерного [service_min_sec, service_max_sec].
+    """
+    service_min_min = service_min_sec / 60.0
+    service_max_min = service_max_sec / 60.0
+
+    def schedule_arrivals(minute):
+        (mn, mx) = get_arrivals_min_max(minute)
+        return random.randint(mn, mx)
+
+    return simulate_events(
+        total_minutes,
+        arrivals=list(arrivals) if arrivals is not None else schedule_arrivals,
+        arrival_times=arrival_times,
+        service_times=(service.scaled(1 / 60.0) if service is not None
+                       else lambda: random.uniform(service_min_min, service_max_min)),
+        seed=seed,
+        servers=servers,
+        discipline=discipline,
+        stats=stats
+    )
+
+def simulate_one_day_crn(
+        total_minutes=480,
+        service_min_sec=2.0,
+        service_max_sec=5.0,
+        seed=None
+):
+    """
+    Событийная модель дня с синхронизированными потоками случайных чисел
+    (для общих случайных чисел при сравнении сценариев).
+
+    Из seed порождаются отдельные подпотоки (SeedSequence.spawn):
+      - приходы: одно равномерное U на минуту, число пришедших = mn + floor(U*(mx-mn+1));
+      - обслуживание: j-й пришедший за минуту m получает U[m, j],
+        время = smin + (smax-smin)*U[m, j];
+      - моменты прихода внутри минуты: m + j-я порядковая статистика из V[m, :k].
+    Поэтому при одном seed сценарии с разными границами обслуживания видят
+    тех же людей в те же моменты, а человек (m, j) - то же U[m, j].
+
+    ВОЗВРАЩАЕТ: словарь как у simulate_one_day плюс
+      mean_service - среднее время обслуживания пришедших (мин), контрольная
+                     переменная с известным средним (smin+smax)/2.
+    """
+    arrival_ss, service_ss, offset_ss = np.random.SeedSequence(seed).spawn(3)
+    bounds = day_schedule.dense(total_minutes)
+    mn, mx = bounds[:, 0], bounds[:, 1]
+    width = max(int(mx.max(initial=0)), 1)
+
+    u_arr = np.random.default_rng(arrival_ss).random(total_minutes)
+    u_srv = np.random.default_rng(service_ss).random((total_minutes, width))
+    u_off = np.random.default_rng(offset_ss).random((total_minutes, width))
+    counts = np.minimum(mn + np.floor(u_arr * (mx - mn + 1)).astype(np.int64), mx)
+
+    # (минута, место в минуте) для каждого пришедшего, в порядке прихода
+    taken = np.arange(width) < counts[:, None]
+    offsets = np.sort(np.where(taken, u_off, 2.0), axis=1)[taken]
+    minutes = np.repeat(np.arange(total_minutes), counts)
+
+    service_min_min = service_min_sec / 60.0
+    service_max_min = service_max_sec / 60.0
+    services = service_min_min + (service_max_min - service_min_min) * u_srv[taken]
+
+    res = simulate_events(
+        total_minutes,
+        arrivals=None,
+        arrival_times=(minutes + offsets).tolist(),
+        service_times=services.tolist()
+    )
+    res["mean_service"] = services.mean() if services.size else (service_min_min + service_max_min) / 2
+    return res
+
+def crn_metrics(res):
+    """
+    Показатели прогона (default_metrics) плюс контрольная переменная mean_service.
+    """
+    m = default_metrics(res)
+    m["mean_service"] = res["mean_service"]
+    return m
+
+def compare_scenarios_crn(
+        experiments,
+        replications=100,
+        metric="avg_wait",
+        control_variate=False,
+        base_seed=0,
+        max_workers=None,
+        confidence=0.95
+):
+    """
+    Сравнение сценариев с понижением дисперсии.
+
+    - Общие случайные числа: прогон r всех сценариев использует одно зерно
+      (simulate_one_day_crn), разность сценариев считается по парам прогонов.
+    - control_variate=True: оценка Y - c*(X - E[X]), где X - среднее время
+      обслуживания (известное E[X] = (smin+smax)/2), c = cov(Y,X)/var(X).
+      c для чётных прогонов оценивается по нечётным и наоборот: если считать
+      c по тем же прогонам, которые им поправляются, дисперсия поправленной
+      оценки занижена и выигрыш выглядит больше настоящего.
+
+    Антитетических пар (U и 1-U) здесь нет: среднее ожидание почти не
+    монотонно по случайным числам модели дня (его разброс в основном даёт
+    скученность приходов внутри минуты), и пара давала отношение дисперсий
+    около 1, а то и меньше.
+
+    ПАРАМЕТРЫ:
+    experiments - список (имя, (service_min_sec, service_max_sec), ...) как в experiments.
+    metric      - показатель из default_metrics.
+
+    ВОЗВРАЩАЕТ словарь:
+      estimates          - {имя: (среднее, полуширина ДИ)};
+      differences        - {имя: (среднее, полуширина ДИ)} разности с первым сценарием;
+      variance_reduction - {"crn": {имя: во сколько раз меньше дисперсия разности,
+                                    чем при независимых потоках},
+                            "control_variate": {имя: ...}};
+      no_gain            - [(способ, имя), ...] - где отношение <= 1, т.е. способ
+                           не уменьшил дисперсию (об этом же выдаётся предупреждение).
+    Отношения - выборочные оценки по replications прогонам и сами шумят.
+    """
+    scenarios = []
+    for exp in experiments:
+        (label, (smin, smax)) = exp[0], exp[1]
+        scenarios.append((label, {"service_min_sec": smin, "service_max_sec": smax}))
+
+    runs = run_replications(simulate_one_day_crn, scenarios, replications, base_seed=base_seed,
+                            max_workers=max_workers, metrics=crn_metrics, common_seeds=True)
+
+    estimates = {}
+    per_run = {}
+    reduction = {"crn": {}, "control_variate": {}}
+    for exp in experiments:
+        (label, (smin, smax)) = exp[0], exp[1]
+        y = runs[label]["samples"][metric]
+        x = runs[label]["samples"]["mean_service"]
+        if control_variate:
+            mu_x = (smin + smax) / 2 / 60.0
+            half = np.arange(len(y)) % 2 == 0
+            c = np.empty(len(y))
+            for part in (half, ~half):
+                other = ~part
+                var_x = x[other].var(ddof=1) if other.sum() > 1 else 0.0
+                c[part] = np.cov(y[other], x[other], ddof=1)[0, 1] / var_x if var_x > 0 else 0.0
+            y_cv = y - c * (x - mu_x)
+            reduction["control_variate"][label] = y.var(ddof=1) / y_cv.var(ddof=1) if y_cv.var() > 0 else np.inf
+            y = y_cv
+        per_run[label] = y
+        estimates[label] = confidence_interval(y, confidence)
+
+    differences = {}
+    base_label = experiments[0][0]
+    for exp in experiments[1:]:
+        label = exp[0]
+        d = per_run[label] - per_run[base_label]
+        differences[label] = confidence_interval(d, confidence)
+        independent_var = per_run[label].var(ddof=1) + per_run[base_label].var(ddof=1)
+        reduction["crn"][label] = independent_var / d.var(ddof=1) if d.var() > 0 else np.inf
+
+    no_gain = [(kind, label) for kind, ratios in reduction.items()
+               for label, ratio in ratios.items() if not ratio > 1]
+    if no_gain:
+        warnings.warn("Variance reduction ratio <= 1 (no gain) for: "
+                      + ", ".join(f"{kind}/{label}" for kind, label in no_gain))
+    return {"estimates": estimates, "differences": differences,
+            "variance_reduction": reduction, "no_gain": no_gain}
+
 # --- 3. Проведём серию экспериментов ---
 
 # (A) БАЗОВЫЕ ПАРАМЕТРЫ
@@ -134,58 +435,157 @@ experiments = [
     ("Scenario3", (1.0, 3.0), 42), # Уменьшим время обслуживания: 1..3 сек
 ]
 
-results_all = {}
+# Код ниже выполняется только при запуске файла как скрипта: процессы пула
+# (run_replications) импортируют этот модуль и не должны повторять эксперименты.
+if __name__ == "__main__":
+    results_all = {}
+
+    for (label, (smin, smax), sd) in experiments:
+        res = simulate_one_day(
+            total_minutes=480,
+            service_min_sec=smin,
+            service_max_sec=smax,
+            seed=sd
+        )
+        results_all[label] = res
+
+    # --- 4. Визуализация результатов ---
+    plt.figure(figsize=(12,8))
+
+    colors = ['blue', 'red', 'green']
+    for i, label in enumerate(results_all.keys()):
+        r = results_all[label]
+        q_len = r["queue_length"]
+        t_points = r["time_points"]
+        plt.plot(t_points, q_len, label=f"{label} (service: {experiments[i][1][0]}-{experiments[i][1][1]} sec)",
+                 color=colors[i])
+
+    plt.xlabel("Минуты с 08:00 (0..480)")
+    plt.ylabel("Длина очереди (число людей)")
+    plt.title("Длина очереди во времени (разные сценарии времени обслуживания)")
+    plt.legend()
+    plt.grid(True)
+    plt.show()
+
+    # Выведем текстовую статистику:
+    for i, label in enumerate(results_all.keys()):
+        r = results_all[label]
+        q_len = r["queue_length"]
+        waits = r["waiting_times"]
+        srv = r["server_busy"]
+
+        avg_q = sum(q_len)/len(q_len)
+        max_q = max(q_len) if q_len else 0
+        avg_w = sum(waits)/len(waits) if waits else 0
+        max_w = max(waits) if waits else 0
+        utilization = sum(srv)/len(srv)*100
+
+        print(f"--- {label} ---")
+        print(f"Service time range: {experiments[i][1][0]}..{experiments[i][1][1]} sec")
+        print(f"Средняя длина очереди: {avg_q:.2f}, макс: {max_q}")
+        print(f"Среднее время ожидания: {avg_w:.2f} мин, макс: {max_w:.2f}")
+        print(f"Загрузка турникета: {utilization:.1f}%\n")
+
+    # Те же сценарии на событийном движке (обслуживание без округления до минуты)
+    for (label, (smin, smax), sd) in experiments:
+        r = simulate_one_day_events(total_minutes=480, service_min_sec=smin, service_max_sec=smax, seed=sd)
+        waits = r["waiting_times"]
+        avg_w = sum(waits)/len(waits) if waits else 0
+        print(f"[событийная модель] {label}: средняя очередь {sum(r['queue_length'])/len(r['queue_length']):.2f}, "
+              f"среднее ожидание {avg_w*60:.1f} сек, загрузка {sum(r['server_busy'])/len(r['server_busy'])*100:.1f}%")
+
+    # --- 5. Много независимых прогонов каждого сценария (пул процессов) ---
+    # Каждый прогон получает своё зерно из SeedSequence, поэтому итог не зависит от числа процессов.
+    scenarios = [(label, {"total_minutes": 480, "service_min_sec": smin, "service_max_sec": smax})
+                 for (label, (smin, smax), sd) in experiments]
+    replicated = run_replications(simulate_one_day, scenarios, replications=200, base_seed=42)
+    print("Среднее по 200 прогонам ± полуширина 95% доверительного интервала:")
+    print(format_summary(replicated, names=["avg_queue", "avg_wait", "p95_wait", "utilization"]))
+
+    # Та же минутная модель, но 2000 прогонов сразу массивами NumPy (simulate_one_day_batch)
+    batch = {label: {"summary": summarize(batch_metrics(simulate_one_day_batch(
+                 480, smin, smax, replications=2000, seed=42)))}
+             for (label, (smin, smax), sd) in experiments}
+    print("Среднее по 2000 прогонам (пакетная модель):")
+    print(format_summary(batch, names=["avg_queue", "avg_wait", "p95_wait", "utilization"]))
+
+    # --- 6. Сравнение сценариев с общими случайными числами и контрольной переменной ---
+    cmp = compare_scenarios_crn(experiments, replications=100, metric="avg_wait",
+                                control_variate=True, base_seed=42)
+    base_label = experiments[0][0]
+    for label, (mean, hw) in cmp["differences"].items():
+        print(f"{label} - {base_label}: разность среднего ожидания {mean*60:.3f} ± {hw*60:.3f} сек, "
+              f"дисперсия меньше в {cmp['variance_reduction']['crn'][label]:.1f} раз (общие случайные числа)")
+    ratios = ", ".join(f"{k}: {v:.2f}" + (" (нет выигрыша)" if ("control_variate", k) in cmp["no_gain"] else "")
+                       for k, v in cmp["variance_reduction"]["control_variate"].items())
+    print(f"Уменьшение дисперсии (control_variate): {ratios}")
+
+    # --- 7. Прогоны до заданной точности: среднее ожидание с точностью ±5% (95% ДИ) ---
+    for (label, params) in scenarios:
+        est = run_until_precision(simulate_one_day_events, params, metric="avg_wait",
+                                  rel_half_width=0.05, confidence=0.95, max_replications=2000, base_seed=42)
+        print(f"{label}: среднее ожидание {est['estimate']*60:.2f} ± {est['half_width']*60:.2f} сек "
+              f"(прогонов: {est['replications']}, точность достигнута: {est['converged']})")
+
+    # --- 8. Сеть турникетов территории: входы -> корпуса / столовая по кратчайшим путям ---
+    from algoritm_deikstr import matrix
+    from campus_network import Station, make_trips, simulate_network
+
+    # Поток через два входа - в 10 раз больше, чем через один турникет (по тому же расписанию)
+    bounds = day_schedule.dense(480)
+    counts = np.random.default_rng(42).integers(bounds[:, 0], bounds[:, 1], endpoint=True) * 10
+    stations = [Station(0, servers=2, name="вход A"), Station(1, servers=2, name="вход B"),
+                Station(5, servers=2, name="корпус 5"), Station(7, servers=2, name="корпус 7"),
+                Station(9, servers=3, name="столовая")]
+    routes = [(0, 5), (0, 7), (1, 5), (1, 7), (0, 9, 5), (1, 9, 7)]
+    start_times, route_ids = make_trips(counts, [0.25, 0.2, 0.2, 0.25, 0.05, 0.05], seed=42)
+    net = simulate_network(matrix, stations, routes, start_times, route_ids, seed=42)
+    print(f"Сеть: {len(start_times)} человек за день, время в пути в среднем "
+          f"{np.nanmean(net['agents']['end'] - net['agents']['start']):.2f} мин")
+    for name, s in net["stations"].items():
+        print(f"  {name}: среднее ожидание {s['avg_wait']*60:.1f} сек, p95 {s['p95_wait']*60:.1f} сек, "
+              f"загрузка {s['utilization']*100:.1f}%")
+
+    # --- 9. Подбор мощности: p95 ожидания в пик 08:20-08:40 не больше 2 минут ---
+    # Весь поток (в 30 раз больше, чем через один турникет) идёт через один банк турникетов
+    from capacity import min_servers, max_service_scale
+
+    peak = {"demand_scale": 30, "service_min_sec": 2.0, "service_max_sec": 5.0}
+    plan = min_servers(day_schedule.dense(480), threshold=2.0, params=peak, base_seed=42)
+    print(f"Турникетов нужно: {plan['servers']} (прогонов: {plan['simulations']}, "
+          f"аналитическая нижняя граница: {plan['lower_bound']})")
+    print("  " + plan["statement"])
+    speed = max_service_scale(day_schedule.dense(480), servers=plan["servers"] - 1, threshold=2.0,
+                              params=peak, base_seed=42)
+    if speed["service_scale"] is not None:
+        print(f"Или {plan['servers'] - 1} турникетов с обслуживанием {speed['service_min_sec']:.1f}.."
+              f"{speed['service_max_sec']:.1f} сек (прогонов: {speed['simulations']})")
+        print("  " + speed["statement"])
+
+    # --- 10. Редкие события: вероятность ждать дольше 10 минут (турникет 12..18 сек) ---
+    from rare_events import turnstile_laws, wait_tail, max_wait_splitting
+
+    # в разгар пары (2..5 чел/мин), как если бы пара не кончалась: стационарный режим - выборка по значимости
+    service, interarrival = turnstile_laws(2, 5, 12.0, 18.0)
+    tail = wait_tail(10.0, service, interarrival, paths=20000, seed=42)
+    print(f"P(ожидание > 10 мин) = {tail['estimate']:.3g} ± {tail['half_width']:.2g} "
+          f"(относительная погрешность {tail['relative_error']:.2%}, простому Монте-Карло "
+          f"понадобилось бы ~{tail['naive_equivalent']:.1e} человек)")
+    # за весь день по расписанию - многоуровневое расщепление по наибольшему ожиданию
+    day_tail = max_wait_splitting(10.0, day_schedule.dense(480), 12.0, 18.0, n_levels=10,
+                                  particles=2000, repeats=10, seed=42)
+    print(f"P(за день кто-то ждёт > 10 мин) = {day_tail['estimate']:.3g} ± {day_tail['half_width']:.2g} "
+          f"(относительная погрешность {day_tail['relative_error']:.0%}, "
+          f"вымерших повторов: {day_tail['extinct']})")
 
-for (label, (smin, smax), sd) in experiments:
-    res = simulate_one_day(
-        total_minutes=480,
-        service_min_sec=smin,
-        service_max_sec=smax,
-        seed=sd
-    )
-    results_all[label] = res
-
-# --- 4. Визуализация результатов ---
-plt.figure(figsize=(12,8))
-
-colors = ['blue', 'red', 'green']
-for i, label in enumerate(results_all.keys()):
-    r = results_all[label]
-    q_len = r["queue_length"]
-    t_points = r["time_points"]
-    plt.plot(t_points, q_len, label=f"{label} (service: {experiments[i][1][0]}-{experiments[i][1][1]} sec)",
-             color=colors[i])
-
-plt.xlabel("Минуты с 08:00 (0..480)")
-plt.ylabel("Длина очереди (число людей)")
-plt.title("Длина очереди во времени (разные сценарии времени обслуживания)")
-plt.legend()
-plt.grid(True)
-plt.show()
-
-# Выведем текстовую статистику:
-for i, label in enumerate(results_all.keys()):
-    r = results_all[label]
-    q_len = r["queue_length"]
-    waits = r["waiting_times"]
-    srv = r["server_busy"]
-
-    avg_q = sum(q_len)/len(q_len)
-    max_q = max(q_len) if q_len else 0
-    avg_w = sum(waits)/len(waits) if waits else 0
-    max_w = max(waits) if waits else 0
-    utilization = sum(srv)/len(srv)*100
-
-    print(f"--- {label} ---")
-    print(f"Service time range: {experiments[i][1][0]}..{experiments[i][1][1]} sec")
-    print(f"Средняя длина очереди: {avg_q:.2f}, макс: {max_q}")
-    print(f"Среднее время ожидания: {avg_w:.2f} мин, макс: {max_w:.2f}")
-    print(f"Загрузка турникета: {utilization:.1f}%\n")
 
 # schedule_intervals
 # Массив, определяющий кусочно-заданный диапазон (arrivals_min,arrivals_max) для разных промежутков в минутах от 8:00.Например, (0, 20, (0,2)) означает с 8:00 до 8:20 (минуты 0..19) генерировать от 0 до 2 человек в минуту.
 
 # get_arrivals_min_max(current_minute). Смотрит, в какой интервал расписания попадает current_minute и возвращает (mn, mx). # Если current_minute > 480 или < 0, вернёт (0,0), но в наших пределах это не должно случиться.
+# Поиск идёт по day_schedule (schedule.Schedule) - интервалы один раз сводятся в отсортированный массив границ, и нужный интервал
+# находится бинарным поиском. day_schedule.at(массив_минут) возвращает (mn, mx) сразу для целого массива минут,
+# а schedule.WeeklyCalendar / load_calendar позволяют задать разные расписания по дням недели и праздникам (JSON/CSV).
 
 # simulate_one_day(...) Моделирует 480 минут (8:00–16:00) пошагово. # На каждом шаге (каждой минуте) генерирует число пришедших (по randint(mn, mx)), учитывая расписание, и добавляет их в очередь.
 # Если турникет свободен, берёт из очереди студента, рассчитывает его время ожидания (текущая_минута - время_прихода), затем генерирует случайное время обслуживания (равномерное) и «занимает» турникет на это время.
@@ -204,3 +604,69 @@ for i, label in enumerate(results_all.keys()):
     # Средняя/максимальная длина очереди,
     # Среднее/максимальное время ожидания (в минутах),
     # Загрузка турникета (в %).
+
+# simulate_one_day_events(...)
+# Та же модель дня, но событийная: приходы и окончания обслуживания хранятся в куче (event_sim.simulate_events),
+# модель перескакивает от события к событию. При обслуживании в 2–5 секунд турникет успевает пропустить всех пришедших,
+# и очередь больше не растёт искусственно из-за того, что за минуту обслуживается не более одного человека.
+
+# Много прогонов (run_replications из replications.py)
+# Один прогон со случайными приходами мало что говорит, поэтому каждый сценарий прогоняется 200 раз в пуле процессов
+# (ProcessPoolExecutor). Каждый прогон получает своё зерно из numpy.random.SeedSequence.spawn, а не общий random.seed(42),
+# поэтому результаты одинаковы при любом числе процессов. Итог - таблица: среднее и полуширина 95% доверительного интервала.
+
+# Прогоны до заданной точности (run_until_precision)
+# Вместо фиксированного числа прогонов добавляем их пачками, пока полуширина доверительного интервала
+# для выбранного показателя (среднее ожидание, p95, загрузка) не станет меньше 5% от среднего, или пока не исчерпан бюджет.
+# Лёгкие сценарии останавливаются после нескольких десятков прогонов, тяжёлые (близкие к перегрузке) используют весь бюджет.
+
+# Понижение дисперсии (simulate_one_day_crn, compare_scenarios_crn)
+# Сценарии отличаются только временем обслуживания, поэтому их сравниваем на общих случайных числах: приходы и обслуживание
+# берутся из отдельных синхронизированных подпотоков, и j-й пришедший за минуту m во всех сценариях получает одно и то же U[m, j].
+# Тогда разность сценариев почти не содержит шума от приходов. Дополнительно: контрольная переменная - среднее время
+# обслуживания, у которого известно точное среднее (smin+smax)/2; её коэффициент для одной половины прогонов оценивается
+# по другой. Функция печатает, во сколько раз уменьшилась дисперсия по сравнению с независимыми прогонами, и помечает
+# (и предупреждает), если выигрыша нет. Антитетические пары (U и 1-U) для этой модели дисперсию не уменьшали
+# (отношение около 1), поэтому их нет.
+
+# Много дней подряд (multiday.simulate_days)
+# Для учебного года или нескольких лет модель дня запускается одним непрерывным прогоном: очередь, не разошедшаяся
+# к концу дня, переносится на следующий. Расписание берётся из schedule.WeeklyCalendar (разные дни недели, праздники).
+# Результаты по минутам и времена ожидания пишутся на диск кусками (.npy и сырой файл float64), поэтому память не растёт
+# с горизонтом, а multiday.MultiDayResult открывает их через mmap и читает только нужные дни.
+
+# Воспроизведение реального потока (turnstile_logs)
+# Журнал турникетов (CSV или двоичный) читается кусками: текст разбирает np.loadtxt, а .npy и сырые файлы
+# открываются через mmap, так что цикла Python по строкам нет. daily_arrivals(path) возвращает даты и массив
+# (число дней, 480) - по строке на день, тот же вид, что у generate_arrivals_batch из 1.py.
+# simulate_one_day(arrivals=counts[d]) берёт число пришедших за минуту из журнала вместо randint, а
+# simulate_one_day_events(arrival_times=minute_offsets(...)) воспроизводит точные моменты прохода.
+
+# Сеть турникетов (campus_network.py)
+# Люди проходят турникет входа, идут по кратчайшему пути (Дейкстра из algoritm_deikstr.py) к корпусу или столовой
+# и снова ждут в очереди. Время ходьбы считается один раз на каждую пару соседних остановок маршрута (деревья путей
+# кешируются в ShortestPathService), а сама модель - событийная, с одним календарём событий на всю сеть, поэтому
+# десятки тысяч человек за день моделируются без поиска пути на каждом шаге.
+
+# Пакетная минутная модель (simulate_one_day_batch)
+# Правила simulate_one_day не меняются, но R прогонов идут одновременно: приходы - сразу матрица (R, 480),
+# состояние турникета - массивы формы (R,), и цикл Python остаётся только по минутам. Очередь хранится не по людям,
+# а счётчиками: пришло к концу минуты (накопленная сумма) минус начали проход; минута прихода первого в очереди
+# ищется бинарным поиском. replications.batch_metrics считает показатели всех прогонов сразу, без цикла по прогонам.
+
+# Подбор мощности (capacity.py)
+# Вместо перебора сценариев вручную ищем, сколько турникетов (min_servers) или какая скорость прохода (max_service_scale)
+# держит 95-й перцентиль ожидания в утренний пик не больше 2 минут. Ожидание монотонно по числу турникетов и скорости,
+# поэтому хватает галопирующего поиска и бисекции. Все кандидаты прогоняются на общих случайных числах (k-й пришедший
+# везде один и тот же), а заведомо перегруженные варианты отсекаются жидкостной оценкой без имитации. Ответ - с
+# доверительным интервалом для выбранного варианта и для соседнего, который уже не проходит.
+
+# Редкие события (rare_events.py)
+# Вероятность ждать дольше 10 минут слишком мала, чтобы увидеть её простыми прогонами. wait_tail считает её для
+# стационарной очереди одного турникета выборкой по значимости. Поток randint(2, 5) в минуту при этом заменяется
+# (turnstile_laws) потоком с гамма-интервалами той же интенсивности и того же разброса - это приближение к модели дня,
+# а не она сама. Обслуживание и интервалы между приходами берутся из экспоненциально наклонённых распределений
+# (distributions: log_mgf, tilted), при которых очередь растёт, а каждая траектория получает вес - отношение
+# правдоподобия. max_wait_splitting оценивает вероятность того, что за день по расписанию кто-то ждёт дольше порога
+# (это уже сама модель дня): частицы, дошедшие до очередного уровня ожидания, клонируются.
+# Обе оценки несмещённые (wait_tail - для заменённого потока); вместе с ними печатается относительная погрешность.
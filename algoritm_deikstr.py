@@ -59,39 +59,52 @@
 # # | /     | /
 # # C --------
 
-import heapq
+import argparse
+import sys
 
+from graph_io import load_graph, parse_queries, save_graph
+from path_service import ShortestPathService
+from shortest_paths import CSRGraph, dijkstra_csr
 
-def dijkstra(matrix, start):
-    n = len(matrix)
-    distances = [float('inf')] * n  # Создается список `distances`, хранящий кратчайшие расстояния от стартовой вершины до каждой вершины. Изначально все расстояния устанавливаются в бесконечность (`float('inf')`).
-    distances[start] = 0
-    heap = [(0,
-             start)]  # Создается приоритетная очередь (куча) `heap`, используя модуль `heapq`. В неё добавляется начальная вершина со значением расстояния 0. Куча хранит кортежи `(расстояние, номер_вершины)`, упорядоченные по расстоянию.
 
-    while heap:  # Создается приоритетная очередь (куча) `heap`, используя модуль `heapq`. В неё добавляется начальная вершина со значением расстояния 0. Куча хранит кортежи `(расстояние, номер_вершины)`, упорядоченные по расстоянию.
-        current_dist, u = heapq.heappop(
-            heap)  # Извлекается вершина `u` с наименьшим расстоянием `current_dist` из приоритетной очереди.
-        if current_dist > distances[u]:  # пропускаем, так как есть больше и идем дальше
-            continue
+def print_trace(u, v, weight, distances):
+    """
+    Учебный вывод для каждого просмотренного ребра u -> v (как раньше
+    печатал сам dijkstra): текущие расстояния и найденное улучшение.
+    """
+    print(distances)
+    print('Следующая вершина графа')
+    # Оно проверяет, можно ли улучшить кратчайшее расстояние до вершины `v`, пройдя через вершину `u`. Если `distances[v]` (текущее расстояние до `v`) больше, чем `distances[u] + weight`
+    # (расстояние до `u` плюс вес ребра между `u` и `v`), то найден более короткий путь.
+    if distances[v] > distances[u] + weight:
+        print('Найден более короткий путь до вершины: ', v)
+        print('Было:', distances[v])
+        print("Стало:", distances[u], '+', weight)
 
-        for v in range(n):  # цикл перебирает все вершины графа
-            weight = matrix[u][v]  # получаем вес ребра между вершинами
-            if weight == 0:  # пропускаем петли и отсутствующие ребра
-                continue
 
-            print(distances)
-            print('Следующая вершина графа')
-            # Оно проверяет, можно ли улучшить кратчайшее расстояние до вершины `v`, пройдя через вершину `u`. Если `distances[v]` (текущее расстояние до `v`) больше, чем `distances[u] + weight`
-            # (расстояние до `u` плюс вес ребра между `u` и `v`), то найден более короткий путь.
-            if distances[v] > distances[u] + weight:
-                print('Найден более короткий путь до вершины: ', v)
-                print('Было:', distances[v])
-                print("Стало:", distances[u], '+', weight)
-                distances[v] = distances[u] + weight  # Обновляется кратчайшее расстояние до вершины `v`.
-                heapq.heappush(heap, (distances[v], v))  # вершина v обновленная добавляется в очередь
+def dijkstra(matrix, start, quiet=False, trace=None, queue="auto"):
+    """
+    Кратчайшие расстояния от вершины start до всех остальных.
 
-    return distances
+    ПАРАМЕТРЫ:
+    matrix - матрица смежности (matrix[u][v] - вес ребра u -> v, 0 - ребра нет)
+             или уже готовый shortest_paths.CSRGraph (для больших разреженных графов).
+    start  - начальная вершина.
+    quiet  - True: без учебного вывода (для больших графов).
+    trace  - своя функция trace(u, v, weight, distances) вместо print_trace.
+    queue  - "heap", "dial" или "auto" (см. shortest_paths.dijkstra_csr): при
+             целых весах 1..10, как в matrix, без учебного вывода выбирается
+             очередь Дайала.
+
+    ВОЗВРАЩАЕТ: список расстояний (float('inf') - вершина недостижима).
+    """
+    graph = matrix if isinstance(matrix, CSRGraph) else CSRGraph.from_dense(matrix)  # матрица -> списки соседей (CSR): просматриваем только существующие рёбра, а не всю строку
+    if quiet:
+        trace = None
+    elif trace is None:
+        trace = print_trace
+    # Куча хранит кортежи `(расстояние, номер_вершины)`, упорядоченные по расстоянию; из неё извлекается вершина `u` с наименьшим расстоянием
+    return dijkstra_csr(graph, start, trace=trace, queue=queue)
 
 
 matrix = [
@@ -107,11 +120,130 @@ matrix = [
     [2, 9, 8, 10, 9, 2, 8, 1, 2, 0]
 ]
 
-# Вычисляем кратчайшие пути от вершины 0
-start_node = int(input())
-shortest_paths = dijkstra(matrix, start_node)
 
-# Выводим результаты
-print(f"Кратчайшие расстояния от вершины {start_node}:")
-for i, dist in enumerate(shortest_paths):
-    print(f"До вершины {i}: {dist if dist != float('inf') else 'недостижима'}")
+def _fmt(d):
+    return "inf" if d == float('inf') else str(d)
+
+
+def answer_queries(graph, sources, targets, out, paths=False, cache_size=32, flush_every=10000):
+    """
+    Ответы на поток запросов в одном процессе (без учебного вывода).
+
+    ПАРАМЕТРЫ:
+    graph    - CSRGraph или матрица смежности.
+    sources, targets - массивы запросов (target = -1 - все расстояния от source),
+               например из graph_io.parse_queries.
+    out      - куда писать (файл или sys.stdout); строки копятся и пишутся блоками.
+    paths    - добавлять ли сам путь к ответу "source target".
+    cache_size - сколько деревьев путей держать (повторные источники не ищутся заново).
+
+    Формат ответа:
+      "source target distance [v0 v1 ... vk]" - для запроса с целью;
+      "source d0 d1 ... d(n-1)"                - для запроса без цели.
+    """
+    service = ShortestPathService(graph, cache_size=cache_size)
+    buf = []
+    for s, t in zip(sources.tolist(), targets.tolist()):
+        if t < 0:
+            buf.append(f"{s} " + " ".join(map(_fmt, service.distances(s))))
+        else:
+            line = f"{s} {t} {_fmt(service.distance(s, t))}"
+            if paths:
+                path = service.path(s, t)
+                if path is not None:
+                    line += " " + " ".join(map(str, path))
+            buf.append(line)
+        if len(buf) >= flush_every:
+            out.write("\n".join(buf) + "\n")
+            buf.clear()
+    if buf:
+        out.write("\n".join(buf) + "\n")
+
+
+def main(argv=None):
+    """
+    Пакетный режим: python algoritm_deikstr.py --graph campus.txt --queries queries.txt
+    (без --queries запросы читаются из stdin, без --graph - граф matrix из этого файла).
+    """
+    parser = argparse.ArgumentParser(description="Кратчайшие пути (Дейкстра) для потока запросов 'source [target]'.")
+    parser.add_argument("--graph", help="список рёбер 'u v [w]', матрица .npy или каталог save_graph")
+    parser.add_argument("--undirected", action="store_true", help="рёбра списка - в обе стороны")
+    parser.add_argument("--queries", default="-", help="файл запросов ('-' - stdin)")
+    parser.add_argument("--output", default="-", help="файл ответов ('-' - stdout)")
+    parser.add_argument("--paths", action="store_true", help="выводить и сам путь")
+    parser.add_argument("--save-binary", metavar="DIR", help="сохранить граф в двоичном формате и выйти")
+    args = parser.parse_args(argv)
+
+    graph = load_graph(args.graph, directed=not args.undirected) if args.graph else CSRGraph.from_dense(matrix)
+    if args.save_binary:
+        save_graph(graph, args.save_binary)
+        return
+
+    if args.queries == "-":
+        text = sys.stdin.read()
+    else:
+        with open(args.queries, encoding="utf-8") as f:
+            text = f.read()
+    try:
+        sources, targets = parse_queries(text)
+    except ValueError as e:
+        parser.error(str(e))
+    bad = (sources < 0) | (sources >= graph.n) | (targets >= graph.n)
+    if bad.any():
+        parser.error(f"query {int(bad.argmax()) + 1}: vertex out of range 0..{graph.n - 1}")
+
+    if args.output == "-":
+        answer_queries(graph, sources, targets, sys.stdout, paths=args.paths)
+    else:
+        with open(args.output, "w", encoding="utf-8", buffering=1 << 20) as out:
+            answer_queries(graph, sources, targets, out, paths=args.paths)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 or not sys.stdin.isatty():
+        # аргументы или перенаправленный stdin (python algoritm_deikstr.py < queries.txt) - пакетный режим
+        main()
+    else:
+        # Вычисляем кратчайшие пути от вершины 0
+        start_node = int(input())
+        shortest_paths = dijkstra(matrix, start_node)
+
+        # Выводим результаты
+        print(f"Кратчайшие расстояния от вершины {start_node}:")
+        for i, dist in enumerate(shortest_paths):
+            print(f"До вершины {i}: {dist if dist != float('inf') else 'недостижима'}")
+
+
+# Большие графы (shortest_paths.py)
+# Матрица смежности хранит V² чисел, а цикл `for v in range(n)` просматривает всю строку даже там, где рёбер нет.
+# CSRGraph хранит только рёбра: indptr[u]..indptr[u+1] - диапазон соседей вершины u в массивах indices и weights.
+# dijkstra_csr просматривает только реальные рёбра (O((V + E) log V)) и ничего не печатает, если trace не задан,
+# поэтому годится для графов корпусов и города с миллионом вершин: dijkstra(graph, s, quiet=True).
+# print_trace - прежний учебный вывод; его можно заменить своей функцией trace(u, v, weight, distances).
+
+# Очередь Дайала (dijkstra_csr(..., queue="dial"))
+# Веса в matrix - небольшие целые (1..10). Тогда вместо кучи можно взять массив "корзин": в корзине d лежат вершины
+# с расстоянием d, и следующая вершина - из первой непустой корзины. Расстояния в очереди не выходят за окно [d, d + C]
+# (C - наибольший вес), поэтому корзин нужно всего C + 1, по кругу. Это O(E + V * C) без кортежей и heapq.
+# При queue="auto" так выбирается само, если все веса - целые не больше DIAL_MAX_WEIGHT, иначе остаётся куча.
+
+# Таблицы расстояний (path_tables.py)
+# distance_table(graph, sources) считает расстояния сразу от многих вершин (от каждого входа до каждой аудитории).
+# Для разреженного графа это поиск Дейкстры из каждого источника; источники делятся между процессами, а граф
+# передаётся им через файлы в mmap, чтобы не копировать его в каждую задачу. Для небольшой плотной матрицы, как
+# matrix выше, выгоднее floyd_warshall: n шагов D = min(D, D[:, k] + D[k, :]) целиком на NumPy.
+# Результат можно сразу писать в .npy (path=...) и потом открывать через np.load(path, mmap_mode="r").
+
+# Сервис кратчайших путей (path_service.ShortestPathService)
+# dijkstra возвращает только расстояния и каждый раз считает всё заново. Сервис хранит для источника дерево
+# кратчайших путей (parents[v] - откуда пришли в v), поэтому путь восстанавливается без нового поиска, а деревья
+# часто запрашиваемых источников лежат в LRU-кеше. Когда коридор закрывают (close_edge) или меняют вес ребра
+# (set_weight), дерево не строится заново: сбрасывается только поддерево под изменённым ребром, остальное
+# сохраняется, и Дейкстра запускается лишь от изменившихся вершин.
+
+# Пакетный режим (main, graph_io.py)
+# С аргументами командной строки файл не ждёт input(), а отвечает на поток запросов в одном процессе:
+#   python algoritm_deikstr.py --graph campus.txt --undirected --queries queries.txt --paths > answers.txt
+# Граф - текстовый список рёбер "u v [w]" (разбирается np.loadtxt целиком) или каталог из --save-binary, который
+# открывается через mmap. Запросы "source [target]" разбираются векторно, повторные источники берутся из кеша
+# ShortestPathService, а ответы пишутся блоками, а не print на каждую строку.
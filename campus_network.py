@@ -0,0 +1,197 @@
+import heapq
+import math
+from array import array
+
+import numpy as np
+
+from customer_store import RingQueue
+from distributions import Discrete, Distribution, Uniform
+from path_service import ShortestPathService
+from shortest_paths import CSRGraph
+from streaming_stats import TurnstileStats
+
+# Типы событий
+ARRIVAL = 0    # человек подошёл к турникету
+DEPARTURE = 1  # турникет закончил обслуживание
+
+
+class Station:
+    """
+    Турникет (или банк турникетов) в вершине node графа территории.
+
+    servers - число параллельных турникетов с общей очередью FIFO;
+    service - время прохода в минутах: распределение из distributions.py
+              (по умолчанию Uniform 2..5 сек, как в 4.py) или функция без аргументов;
+    name    - подпись в результатах.
+    """
+
+    def __init__(self, node, servers=1, service=None, name=None):
+        self.node = node
+        self.servers = servers
+        self.service = service if service is not None else Uniform(2 / 60.0, 5 / 60.0)
+        self.name = name if name is not None else f"node {node}"
+
+
+def walk_times(graph, routes, service=None):
+    """
+    Время пешком между соседними остановками всех маршрутов - по одному
+    поиску Дейкстры на каждую различную начальную вершину (деревья берутся
+    из кеша ShortestPathService), а не на каждого человека.
+
+    ВОЗВРАЩАЕТ: словарь {(a, b): время}; inf, если b недостижима из a.
+    """
+    pairs = {(r[i], r[i + 1]) for r in routes for i in range(len(r) - 1)}
+    if service is None:
+        service = ShortestPathService(graph, cache_size=max(1, len({a for a, _ in pairs})))
+    return {(a, b): service.distance(a, b) for (a, b) in sorted(pairs)}
+
+
+def make_trips(counts, route_weights, seed=None):
+    """
+    Поток людей по минутам -> моменты прихода и маршруты.
+
+    counts        - число пришедших за каждую минуту (как generate_arrivals из 1.py,
+                    строка turnstile_logs.daily_arrivals и т.п.).
+    route_weights - доли маршрутов (выбор через таблицу псевдонимов, O(1) на человека).
+
+    ВОЗВРАЩАЕТ: (start_times, route_ids) - массивы по людям, по возрастанию времени.
+    """
+    rng = np.random.default_rng(seed)
+    counts = np.asarray(counts, dtype=np.int64)
+    minutes = np.repeat(np.arange(len(counts)), counts)
+    start_times = np.sort(minutes + rng.random(len(minutes)))
+    route_ids = Discrete(np.arange(len(route_weights)), route_weights).sample(len(minutes), rng)
+    return start_times, route_ids
+
+
+def simulate_network(
+        graph,
+        stations,
+        routes,
+        start_times,
+        route_ids,
+        seed=None,
+        horizon=None,
+        wait_range=(0.0, 60.0)
+):
+    """
+    Сеть очередей территории: люди проходят турникет входа, идут по
+    кратчайшему пути к следующему турникету (корпус, столовая), снова ждут
+    в очереди и т.д. Событийная модель с одним календарём событий на всю сеть.
+
+    ПАРАМЕТРЫ:
+    graph       - граф территории (CSRGraph или матрица смежности), веса - минуты ходьбы.
+    stations    - список Station.
+    routes      - маршруты: кортежи вершин-турникетов, например (вход, корпус, столовая).
+    start_times - моменты прихода людей к первой остановке (минуты).
+    route_ids   - номер маршрута каждого человека (см. make_trips).
+    seed        - зерно для времени обслуживания.
+    horizon     - конец моделирования (None - пока все не пройдут).
+    wait_range  - диапазон гистограммы ожидания в TurnstileStats.
+
+    Время ходьбы между остановками считается один раз на пару (walk_times),
+    поэтому стоимость - O(число событий * log), без поиска пути на каждом шаге.
+
+    ВОЗВРАЩАЕТ: словарь
+      stations   - {name: summary()} по каждому турникету (streaming_stats.TurnstileStats);
+      agents     - массивы по людям: start, end (nan - не успел до horizon),
+                   wait (суммарное ожидание), walk (суммарная ходьба);
+      walk_times - время ходьбы для каждой пары соседних остановок.
+    """
+    graph = graph if isinstance(graph, CSRGraph) else CSRGraph.from_dense(graph)
+    rng = np.random.default_rng(seed)
+    index = {s.node: k for k, s in enumerate(stations)}
+    for r in routes:
+        for node in r:
+            if node not in index:
+                raise ValueError(f"Route stop {node} has no Station")
+
+    walks = walk_times(graph, routes)
+    for pair, w in walks.items():
+        if math.isinf(w):
+            raise ValueError(f"Stop {pair[1]} is unreachable from {pair[0]}")
+    # для каждого маршрута: [(номер турникета, время ходьбы до него), ...]
+    legs = [[(index[r[i]], walks[(r[i - 1], r[i])] if i else 0.0) for i in range(len(r))] for r in routes]
+
+    start_times = np.asarray(start_times, dtype=np.float64)
+    route_ids = np.asarray(route_ids, dtype=np.int64)
+    n = len(start_times)
+    order = np.argsort(start_times, kind="stable").tolist()
+    start_list, route_list = start_times.tolist(), route_ids.tolist()
+
+    draw = [s.service.sampler(rng) if isinstance(s.service, Distribution) else s.service for s in stations]
+    queues = [RingQueue(256, 'q') for _ in stations]
+    free = [s.servers for s in stations]
+    stats = [TurnstileStats(servers=s.servers, wait_range=wait_range) for s in stations]
+
+    stop = array('q', [0]) * n            # номер текущей остановки человека
+    reached = array('d', [0.0]) * n       # когда подошёл к текущему турникету
+    end = array('d', [math.nan]) * n
+    wait = array('d', [0.0]) * n
+    walk = array('d', [0.0]) * n
+
+    events = []
+    seq = 0
+    next_agent = 0  # приходы берутся по одному из отсортированного списка
+    if n:
+        heapq.heappush(events, (start_list[order[0]], seq, ARRIVAL, order[0]))
+        seq += 1
+        next_agent = 1
+
+    def start_service(t, k, a):
+        nonlocal seq
+        w = t - reached[a]
+        wait[a] += w
+        stats[k].add_wait(w)
+        free[k] -= 1
+        heapq.heappush(events, (t + draw[k](), seq, DEPARTURE, a))
+        seq += 1
+
+    t = 0.0
+    while events:
+        t, _, kind, a = heapq.heappop(events)
+        if horizon is not None and t >= horizon:
+            break
+        k = legs[route_list[a]][stop[a]][0]
+
+        if kind == ARRIVAL:
+            if stop[a] == 0 and next_agent < n:
+                b = order[next_agent]
+                heapq.heappush(events, (start_list[b], seq, ARRIVAL, b))
+                seq += 1
+                next_agent += 1
+            reached[a] = t
+            if free[k] > 0:
+                start_service(t, k, a)
+            else:
+                queues[k].push(a)
+        else:
+            free[k] += 1
+            if queues[k]:
+                start_service(t, k, queues[k].pop())
+            # человек идёт к следующей остановке или выходит из сети
+            leg = legs[route_list[a]]
+            stop[a] += 1
+            if stop[a] < len(leg):
+                w = leg[stop[a]][1]
+                walk[a] += w
+                heapq.heappush(events, (t + w, seq, ARRIVAL, a))
+                seq += 1
+            else:
+                end[a] = t
+        stats[k].update_state(t, len(queues[k]), stations[k].servers - free[k])
+
+    t_end = horizon if horizon is not None else t
+    for st in stats:
+        st.close(t_end)
+
+    return {
+        "stations": {s.name: st.summary() for s, st in zip(stations, stats)},
+        "agents": {
+            "start": start_times,
+            "end": np.array(end),
+            "wait": np.array(wait),
+            "walk": np.array(walk),
+        },
+        "walk_times": walks,
+    }
@@ -0,0 +1,388 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from event_sim import simulate_events
+from queueing_formulas import arrival_moments, wait_quantile
+from replications import _run_all, _seed_of, confidence_interval
+
+
+def peak_model(
+        bounds,
+        servers=1,
+        service_scale=1.0,
+        seed=None,
+        window=(20, 40),
+        drain=30,
+        service_min_sec=2.0,
+        service_max_sec=5.0,
+        demand_scale=1
+):
+    """
+    Событийная модель утреннего пика (по умолчанию приходы 08:20-08:40)
+    для поиска мощности: банк из servers турникетов с общей очередью.
+
+    Случайные числа привязаны к людям, а не к ходу имитации: из seed
+    порождаются подпотоки (SeedSequence.spawn) для числа пришедших по
+    минутам, моментов внутри минуты и требуемого времени обслуживания
+    k-го пришедшего. Поэтому при одном seed все кандидаты (servers,
+    service_scale) видят тех же людей с той же работой - общие случайные
+    числа, и ожидание каждого человека монотонно по servers и service_scale.
+
+    ПАРАМЕТРЫ:
+    bounds          - массив (T, 2) границ (mn, mx) числа пришедших за минуту
+                      с 08:00 (day_schedule.dense(T) из 4.py).
+    servers         - число турникетов.
+    service_scale   - множитель времени обслуживания (0.5 - турникет вдвое быстрее).
+    window          - минуты [начало, конец), приходы в которые оцениваются.
+    drain           - сколько минут после окна моделировать, чтобы дообслужить очередь.
+    service_min_sec, service_max_sec - равномерное время обслуживания (сек) при service_scale=1.
+    demand_scale    - множитель потока (например, все входы через один банк турникетов).
+
+    ВОЗВРАЩАЕТ: {"waiting_times": ожидания (мин) людей, пришедших в окно}.
+    Кто не начал обслуживание до конца моделирования, получает
+    ожидание до этого момента (оценка снизу).
+    """
+    T = min(len(bounds), window[1] + drain)
+    counts_ss, offsets_ss, service_ss = np.random.SeedSequence(seed).spawn(3)
+    b = np.asarray(bounds, dtype=np.int64)[:T]
+    counts = np.random.default_rng(counts_ss).integers(b[:, 0], b[:, 1], endpoint=True) * demand_scale
+    minutes = np.repeat(np.arange(T), counts)
+    times = np.sort(minutes + np.random.default_rng(offsets_ss).random(len(minutes)))
+    u = np.random.default_rng(service_ss).random(len(times))
+    services = (service_min_sec + (service_max_sec - service_min_sec) * u) / 60.0 * service_scale
+
+    res = simulate_events(T, None, services.tolist(), servers=servers, arrival_times=times)
+    # общая очередь FIFO: k-е начало обслуживания - это k-й пришедший
+    started = np.asarray(res["waiting_times"], dtype=np.float64)
+    a, z = np.searchsorted(times, window)
+    waits = T - times[a:z]
+    done = min(z, len(started))
+    waits[:max(done - a, 0)] = started[a:done]
+    return {"waiting_times": waits}
+
+
+def p95_wait(res):
+    """95-й перцентиль ожидания в прогоне (0, если никто не пришёл)."""
+    w = np.asarray(res["waiting_times"], dtype=np.float64)
+    return float(np.percentile(w, 95)) if w.size else 0.0
+
+
+def peak_load(bounds, window=(20, 40), demand_scale=1):
+    """
+    Интенсивность λ (чел/мин) и индекс рассеяния ca² потока в окне пика
+    (как arrival_moments для randint(mn, mx) с множителем demand_scale).
+    """
+    b = np.asarray(bounds)[window[0]:window[1]]
+    moments = [arrival_moments({"arrivals_min": mn, "arrivals_max": mx}) for mn, mx in b.tolist()]
+    lam = np.mean([m[0] for m in moments]) * demand_scale
+    ca2 = np.mean([m[1] for m in moments]) * demand_scale
+    return float(lam), float(ca2)
+
+
+def fluid_p95_wait(lam, mean_s, c, length, q=0.95):
+    """
+    Жидкостная (детерминированная) оценка квантиля ожидания за окно длины length:
+    при перегрузке ρ = λE[S]/c > 1 очередь работы растёт со скоростью λE[S] - c,
+    и ожидание пришедшего в момент t окна - (ρ - 1) t. Случайность только
+    добавляет ожидания, поэтому если эта оценка больше порога, кандидат
+    заведомо не проходит и не имитируется.
+    """
+    rho = lam * mean_s / c
+    return q * (rho - 1) * length if rho > 1 else 0.0
+
+
+class _Oracle:
+    """
+    Проверка кандидата имитацией: прогоны на общих зёрнах (прогон r любого
+    кандидата получает одно и то же зерно), показатель metric по каждому
+    прогону, доверительный интервал для его среднего.
+
+    Кандидат подходит, если верхняя граница ДИ <= threshold, и не подходит,
+    если нижняя > threshold. Если порог внутри интервала, число прогонов
+    удваивается (до max_replications); после этого решение - по среднему,
+    с пометкой confident=False.
+    """
+
+    def __init__(self, simulate, params, metric, threshold, confidence,
+                 replications, max_replications, base_seed, max_workers, pool):
+        self.simulate = simulate
+        self.params = params
+        self.metric = metric
+        self.threshold = threshold
+        self.confidence = confidence
+        self.replications = replications
+        self.max_replications = max(max_replications, replications)
+        self.root = np.random.SeedSequence(base_seed)
+        self.seeds = []
+        self.max_workers = max_workers
+        self.pool = pool
+        self.evaluations = {}
+        self.simulations = 0
+
+    def _seeds(self, n):
+        if len(self.seeds) < n:
+            self.seeds.extend(_seed_of(c) for c in self.root.spawn(n - len(self.seeds)))
+        return self.seeds[:n]
+
+    def __call__(self, key, **overrides):
+        ev = self.evaluations.get(key)
+        if ev is not None:
+            return ev["feasible"]
+        params = dict(self.params, **overrides)
+        samples = []
+        n = self.replications
+        while True:
+            seeds = self._seeds(n)[len(samples):]
+            tasks = [(self.simulate, params, s, self.metric) for s in seeds]
+            samples.extend(_run_all(tasks, self.max_workers, self.pool))
+            self.simulations += len(seeds)
+            mean, hw = confidence_interval(samples, self.confidence)
+            if mean + hw <= self.threshold or mean - hw > self.threshold:
+                confident = True
+                break
+            if n >= self.max_replications:
+                confident = False
+                break
+            n = min(2 * n, self.max_replications)
+        feasible = bool(mean <= self.threshold)
+        self.evaluations[key] = {"mean": float(mean), "half_width": float(hw), "replications": len(samples),
+                                 "feasible": feasible, "confident": confident}
+        return feasible
+
+
+def _pool(max_workers):
+    if max_workers == 1:
+        return None
+    return ProcessPoolExecutor(max_workers=max_workers or os.cpu_count() or 1)
+
+
+def _statement(name, value, ev, other, threshold, confidence):
+    # текст вывода: оценка для выбранного варианта и для соседнего, не прошедшего
+    level = f"{confidence * 100:.0f}%"
+    text = (f"{name} = {value:g}: показатель {ev['mean']:.3f} ± {ev['half_width']:.3f} "
+            f"({level} ДИ, {ev['replications']} прогонов), порог {threshold:g}")
+    if other is not None:
+        text += (f"; {name} = {other['value']:g}: {other['mean']:.3f} ± {other['half_width']:.3f}"
+                 if "mean" in other else f"; {name} = {other['value']:g} отсечён аналитической оценкой")
+    if not ev["confident"] or (other is not None and not other.get("confident", True)):
+        text += " (граница не различима при данном числе прогонов)"
+    return text
+
+
+def min_servers(
+        bounds,
+        threshold=2.0,
+        params=None,
+        simulate=peak_model,
+        metric=p95_wait,
+        window=(20, 40),
+        max_servers=64,
+        replications=30,
+        max_replications=240,
+        confidence=0.95,
+        base_seed=0,
+        max_workers=None
+):
+    """
+    Наименьшее число турникетов, при котором p95 ожидания в пик не больше
+    threshold минут.
+
+    Поиск опирается на монотонность: больше турникетов - ожидание не больше
+    (на общих случайных числах - у каждого человека). Поэтому вместо перебора
+    всех вариантов:
+      1) аналитика: кандидаты, у которых жидкостная оценка (fluid_p95_wait)
+         больше порога, отсекаются без имитации - это нижняя граница поиска;
+         стартовая точка - наименьшее c с приближённым p95 G/G/c
+         (queueing_formulas.wait_quantile) не больше порога;
+      2) галопирующий поиск от стартовой точки (шаг 1, 2, 4, ...) вверх или вниз
+         до смены ответа;
+      3) бисекция внутри найденной вилки.
+    Каждый кандидат проверяется прогонами с одними и теми же зёрнами (_Oracle).
+
+    ПАРАМЕТРЫ:
+    bounds          - (T, 2) границы числа пришедших за минуту (day_schedule.dense).
+    threshold       - порог для metric (минуты).
+    params          - прочие параметры simulate (service_min_sec, demand_scale, ...).
+    simulate        - симулятор (на уровне модуля, для pickle), принимает
+                      bounds, servers, window, seed и params.
+    metric          - функция: результат прогона -> число.
+    window          - окно пика (минуты с 08:00).
+    max_servers     - верхняя граница поиска.
+    replications, max_replications - прогонов на кандидата сначала и не более.
+    confidence      - уровень доверия для решения по каждому кандидату.
+    base_seed, max_workers - как в replications.run_replications.
+
+    ВОЗВРАЩАЕТ: словарь
+      servers     - найденное число (None, если не хватает и max_servers);
+      estimate, half_width, confident - оценка metric для него;
+      statement   - текстовый вывод с оценками для servers и servers - 1;
+      evaluations - {c: оценка} по всем проверенным кандидатам;
+      simulations - сколько всего прогонов;
+      lower_bound, start - аналитические нижняя граница и стартовая точка.
+    """
+    params = dict(params or {}, bounds=bounds, window=window)
+    smin = params.get("service_min_sec", 2.0) / 60.0 * params.get("service_scale", 1.0)
+    smax = params.get("service_max_sec", 5.0) / 60.0 * params.get("service_scale", 1.0)
+    mean_s, var_s = (smin + smax) / 2, (smax - smin) ** 2 / 12
+    lam, ca2 = peak_load(bounds, window, params.get("demand_scale", 1))
+    length = window[1] - window[0]
+
+    lower = 1
+    while lower <= max_servers and fluid_p95_wait(lam, mean_s, lower, length) > threshold:
+        lower += 1
+    start = lower
+    while start < max_servers and wait_quantile(lam, mean_s, var_s, start, 0.95, ca2) > threshold:
+        start += 1
+
+    pool = _pool(max_workers)
+    try:
+        oracle = _Oracle(simulate, params, metric, threshold, confidence,
+                         replications, max_replications, base_seed, max_workers, pool)
+        check = lambda c: c >= lower and oracle(c, servers=c)
+        best = _gallop(check, start, lower - 1, max_servers) if lower <= max_servers else None
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    evaluations = dict(sorted(oracle.evaluations.items()))
+    result = {"servers": best, "evaluations": evaluations, "simulations": oracle.simulations,
+              "lower_bound": lower, "start": start}
+    if best is None:
+        result.update(estimate=None, half_width=None, confident=False,
+                      statement=f"Порог {threshold:g} не достигается и при {max_servers} турникетах")
+        return result
+    ev = evaluations[best]
+    below = None
+    if best > 1:
+        below = dict(evaluations.get(best - 1, {}), value=best - 1)
+    result.update(estimate=ev["mean"], half_width=ev["half_width"], confident=ev["confident"],
+                  statement=_statement("c", best, ev, below, threshold, confidence))
+    return result
+
+
+def _gallop(feasible, start, known_bad, upper):
+    """
+    Наименьшее целое x из (known_bad, upper] с feasible(x) для монотонного
+    feasible (False ... False True ... True) или None. Галоп от start вверх или
+    вниз с удвоением шага, затем бисекция.
+    """
+    start = min(max(start, known_bad + 1), upper)
+    if feasible(start):
+        good, bad, step = start, known_bad, 1
+        while good - step > bad:
+            x = good - step
+            if not feasible(x):
+                bad = x
+                break
+            good, step = x, step * 2
+    else:
+        bad, step = start, 1
+        while True:
+            if bad == upper:
+                return None
+            x = min(bad + step, upper)
+            if feasible(x):
+                good = x
+                break
+            bad, step = x, step * 2
+    while good - bad > 1:
+        mid = (good + bad) // 2
+        if feasible(mid):
+            good = mid
+        else:
+            bad = mid
+    return good
+
+
+def max_service_scale(
+        bounds,
+        servers=1,
+        threshold=2.0,
+        params=None,
+        simulate=peak_model,
+        metric=p95_wait,
+        window=(20, 40),
+        scale_range=(0.1, 1.0),
+        tol=0.02,
+        replications=30,
+        max_replications=240,
+        confidence=0.95,
+        base_seed=0,
+        max_workers=None
+):
+    """
+    Самое медленное обслуживание, при котором servers турникетов держат
+    p95 ожидания в пик не больше threshold: наибольший множитель времени
+    обслуживания service_scale из scale_range (1 - текущая скорость,
+    0.5 - вдвое быстрее) с точностью tol.
+
+    Ожидание монотонно по service_scale, поэтому - бисекция. Верхняя граница
+    сужается жидкостной оценкой (fluid_p95_wait), первая проба - приближённый
+    ответ по queueing_formulas.wait_quantile, так что при хорошей аналитике
+    вилка сразу узкая. Прогоны - на общих зёрнах, как в min_servers.
+
+    Параметры - как у min_servers. ВОЗВРАЩАЕТ: словарь
+      service_scale - найденный множитель (None, если не хватает и scale_range[0]);
+      service_min_sec, service_max_sec - соответствующее время обслуживания;
+      estimate, half_width, confident, statement, evaluations, simulations - как в min_servers.
+    """
+    params = dict(params or {}, bounds=bounds, window=window, servers=servers)
+    smin = params.get("service_min_sec", 2.0)
+    smax = params.get("service_max_sec", 5.0)
+    mean_s, var_s = (smin + smax) / 120.0, ((smax - smin) / 60.0) ** 2 / 12
+    lam, ca2 = peak_load(bounds, window, params.get("demand_scale", 1))
+    length = window[1] - window[0]
+
+    lo, hi = scale_range
+    # жидкостная оценка: fluid_p95_wait(s) <= threshold при s <= c (1 + threshold / (0.95 L)) / (λ E[S])
+    hi = min(hi, servers * (1 + threshold / (0.95 * length)) / (lam * mean_s)) if lam > 0 else hi
+    a, b = lo, hi
+    for _ in range(60):  # приближённый ответ - бисекцией по формуле, без имитации
+        s = (a + b) / 2
+        if wait_quantile(lam, mean_s * s, var_s * s * s, servers, 0.95, ca2) <= threshold:
+            a = s
+        else:
+            b = s
+    guess = a
+
+    pool = _pool(max_workers)
+    try:
+        oracle = _Oracle(simulate, params, metric, threshold, confidence,
+                         replications, max_replications, base_seed, max_workers, pool)
+        check = lambda s: oracle(round(s, 6), service_scale=s)
+        best = None
+        if hi >= lo and check(hi):
+            best = hi
+        elif hi >= lo and check(lo):
+            good, bad = lo, hi
+            probe = guess if good + tol < guess < bad - tol else None
+            while bad - good > tol:
+                s = probe if probe is not None else (good + bad) / 2
+                probe = None
+                if check(s):
+                    good = s
+                else:
+                    bad = s
+            best = good
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    evaluations = dict(sorted(oracle.evaluations.items()))
+    result = {"service_scale": best, "evaluations": evaluations, "simulations": oracle.simulations,
+              "upper_bound": hi, "start": guess}
+    if best is None:
+        result.update(service_min_sec=None, service_max_sec=None, estimate=None, half_width=None,
+                      confident=False,
+                      statement=f"Порог {threshold:g} не достигается при {servers} турникетах "
+                                f"и множителе обслуживания {lo:g}")
+        return result
+    ev = evaluations[round(best, 6)]
+    slower = [s for s, e in evaluations.items() if s > best and not e["feasible"]]
+    above = dict(evaluations[min(slower)], value=min(slower)) if slower else None
+    result.update(service_min_sec=smin * best, service_max_sec=smax * best, estimate=ev["mean"],
+                  half_width=ev["half_width"], confident=ev["confident"],
+                  statement=_statement("service_scale", best, ev, above, threshold, confidence))
+    return result
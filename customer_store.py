@@ -0,0 +1,111 @@
+import math
+from array import array
+
+import numpy as np
+
+
+class RingQueue:
+    """
+    Очередь FIFO на кольцевом буфере (array): push и pop за O(1),
+    без сдвига элементов, как у list.pop(0). Когда буфер заполнен,
+    ёмкость удваивается.
+
+    typecode - 'd' для моментов прихода (float), 'q' для номеров людей (int).
+    """
+
+    def __init__(self, capacity=1024, typecode='d'):
+        self.typecode = typecode
+        self.buf = array(typecode, bytes(capacity * array(typecode).itemsize))
+        self.capacity = capacity
+        self.head = 0  # индекс первого элемента
+        self.size = 0
+
+    def push(self, x):
+        if self.size == self.capacity:
+            self._grow()
+        self.buf[(self.head + self.size) % self.capacity] = x
+        self.size += 1
+
+    def pop(self):
+        if self.size == 0:
+            raise IndexError("pop from empty queue")
+        x = self.buf[self.head]
+        self.head = (self.head + 1) % self.capacity
+        self.size -= 1
+        return x
+
+    def peek(self):
+        if self.size == 0:
+            raise IndexError("peek from empty queue")
+        return self.buf[self.head]
+
+    def _grow(self):
+        # разворачиваем кольцо в начало нового буфера двойной ёмкости
+        items = self.buf[self.head:] + self.buf[:self.head]
+        self.buf = items + array(self.typecode, bytes(self.capacity * items.itemsize))
+        self.head = 0
+        self.capacity *= 2
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
+
+
+class CustomerStore:
+    """
+    Хранилище людей в виде "структуры массивов": для человека с номером i
+    arrival[i], start[i], departure[i] (минуты) и server[i] (номер турникета).
+    Массивы - array('d') / array('q'), около 32 байт на человека вместо
+    отдельного объекта Python. Номера выдаются по порядку прихода;
+    сами очереди движок хранит отдельно (RingQueue с номерами людей).
+    """
+
+    def __init__(self):
+        self.arrival = array('d')
+        self.start = array('d')
+        self.departure = array('d')
+        self.server = array('q')
+
+    def enqueue(self, t):
+        """Новый человек пришёл в момент t; возвращает его номер."""
+        self.arrival.append(t)
+        self.start.append(math.nan)
+        self.departure.append(math.nan)
+        self.server.append(-1)
+        return len(self.arrival) - 1
+
+    def begin_service(self, i, t, k):
+        self.start[i] = t
+        self.server[i] = k
+
+    def end_service(self, i, t):
+        self.departure[i] = t
+
+    def __len__(self):
+        return len(self.arrival)
+
+    def records(self):
+        """
+        Таблица по людям: словарь массивов NumPy (копия).
+        Для не начавших / не закончивших обслуживание start / departure = nan.
+        """
+        return {
+            "arrival": np.array(self.arrival, dtype=np.float64),
+            "start": np.array(self.start, dtype=np.float64),
+            "departure": np.array(self.departure, dtype=np.float64),
+            "server": np.array(self.server, dtype=np.int64),
+        }
+
+    def save(self, path):
+        """Сохранить таблицу по людям в .npz (np.load(path) читает её обратно)."""
+        np.savez(path, **self.records())
+
+    def to_csv(self, path):
+        """Сохранить таблицу по людям в CSV: arrival,start,departure,server,wait."""
+        rec = self.records()
+        table = np.column_stack([rec["arrival"], rec["start"], rec["departure"],
+                                 rec["server"], rec["start"] - rec["arrival"]])
+        np.savetxt(path, table, delimiter=",", header="arrival,start,departure,server,wait",
+                   comments="", fmt=["%.6f", "%.6f", "%.6f", "%d", "%.6f"])
@@ -0,0 +1,577 @@
+import math
+
+import numpy as np
+
+# Реестр распределений: имя -> класс (см. register / get_distribution)
+DISTRIBUTIONS = {}
+
+
+def register(name):
+    """Декоратор: добавить класс распределения в реестр под именем name."""
+    def wrap(cls):
+        DISTRIBUTIONS[name] = cls
+        cls.name = name
+        return cls
+    return wrap
+
+
+def _as_generator(seed):
+    # seed может быть None, целым числом или уже готовым numpy.random.Generator (как в 1.py)
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+
+def _logsumexp(a, weights):
+    # ln sum(weights * exp(a)) без переполнения
+    a = np.asarray(a, dtype=np.float64)
+    keep = np.asarray(weights) > 0
+    if not keep.any():
+        return -math.inf
+    m = a[keep].max()
+    if m == math.inf:
+        return math.inf
+    return float(m + np.log(np.dot(weights[keep], np.exp(a[keep] - m))))
+
+
+def _uniform_log_mgf(low, high, theta):
+    # ln E[exp(theta X)] для равномерных на [low, high] (векторно по корзинам):
+    # theta*low + ln((e^h - 1) / h), h = theta*(high - low); при h > 0 - через e^-h
+    h = theta * (high - low)
+    safe = np.where(h == 0, 1.0, h)
+    with np.errstate(divide="ignore", over="ignore"):
+        g = np.where(h > 0, h + np.log(-np.expm1(-safe) / safe), np.log(np.expm1(safe) / safe))
+    return theta * low + np.where(h == 0, 0.0, g)
+
+
+class Distribution:
+    """
+    Базовый класс распределения времени обслуживания или числа приходов.
+
+    sample(size, seed)  - массив NumPy из size значений (size - число или форма);
+    sampler(seed)       - функция без аргументов, выдающая по одному значению
+                          (берёт их из заранее сгенерированных блоков) - для
+                          event_sim.simulate_events(service_times=...);
+    mean, var           - среднее и дисперсия (для формул queueing_formulas);
+    scaled(factor)      - то же распределение, умноженное на factor (секунды -> минуты);
+    log_mgf(theta)      - ln E[exp(theta X)] (inf, если не существует);
+    tilted(theta)       - экспоненциально наклонённое распределение с плотностью
+                          exp(theta x - log_mgf(theta)) f(x) (для rare_events.py).
+    tilted есть не у всех распределений (у LogNormal его нет).
+    """
+
+    name = None
+
+    def sample(self, size=None, seed=None):
+        raise NotImplementedError
+
+    @property
+    def mean(self):
+        raise NotImplementedError
+
+    @property
+    def var(self):
+        raise NotImplementedError
+
+    def sampler(self, seed=None, block=4096):
+        rng = _as_generator(seed)
+        buf = []
+
+        def draw():
+            if not buf:
+                buf.extend(self.sample(block, rng).tolist()[::-1])
+            return buf.pop()
+        return draw
+
+    def scaled(self, factor):
+        return Scaled(self, factor)
+
+    def log_mgf(self, theta):
+        raise NotImplementedError(f"{type(self).__name__} has no moment generating function")
+
+    def tilted(self, theta):
+        raise NotImplementedError(f"{type(self).__name__} cannot be exponentially tilted")
+
+    def __repr__(self):
+        args = ", ".join(f"{k}={v!r}" for k, v in vars(self).items() if not k.startswith("_"))
+        return f"{type(self).__name__}({args})"
+
+
+@register("exp")
+class Exponential(Distribution):
+    """Экспоненциальное распределение с интенсивностью rate (среднее 1/rate)."""
+
+    def __init__(self, rate):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+
+    def sample(self, size=None, seed=None):
+        return _as_generator(seed).exponential(1.0 / self.rate, size=size)
+
+    @property
+    def mean(self):
+        return 1.0 / self.rate
+
+    @property
+    def var(self):
+        return 1.0 / self.rate ** 2
+
+    def log_mgf(self, theta):
+        return math.log(self.rate / (self.rate - theta)) if theta < self.rate else math.inf
+
+    def tilted(self, theta):
+        return Exponential(self.rate - theta)
+
+
+@register("uniform")
+class Uniform(Distribution):
+    """Равномерное распределение на [low, high]."""
+
+    def __init__(self, low, high):
+        if high < low:
+            raise ValueError("high must not be less than low")
+        self.low = low
+        self.high = high
+
+    def sample(self, size=None, seed=None):
+        return _as_generator(seed).uniform(self.low, self.high, size=size)
+
+    @property
+    def mean(self):
+        return (self.low + self.high) / 2
+
+    @property
+    def var(self):
+        return (self.high - self.low) ** 2 / 12
+
+    def log_mgf(self, theta):
+        h = theta * (self.high - self.low)
+        return theta * self.low + (math.log(math.expm1(h) / h) if h else 0.0)
+
+    def tilted(self, theta):
+        return TiltedUniform(self.low, self.high, theta)
+
+
+@register("lognormal")
+class LogNormal(Distribution):
+    """
+    Логнормальное распределение: ln X ~ N(mu, sigma²).
+    LogNormal.from_moments(mean, std) подбирает mu и sigma по среднему и
+    стандартному отклонению самого времени обслуживания.
+    """
+
+    def __init__(self, mu, sigma):
+        if sigma < 0:
+            raise ValueError("sigma must be non-negative")
+        self.mu = mu
+        self.sigma = sigma
+
+    @classmethod
+    def from_moments(cls, mean, std):
+        s2 = math.log(1 + (std / mean) ** 2)
+        return cls(math.log(mean) - s2 / 2, math.sqrt(s2))
+
+    def sample(self, size=None, seed=None):
+        return _as_generator(seed).lognormal(self.mu, self.sigma, size=size)
+
+    @property
+    def mean(self):
+        return math.exp(self.mu + self.sigma ** 2 / 2)
+
+    @property
+    def var(self):
+        return (math.exp(self.sigma ** 2) - 1) * math.exp(2 * self.mu + self.sigma ** 2)
+
+    def log_mgf(self, theta):
+        # хвост тяжелее экспоненциального: при theta > 0 E[exp(theta X)] = inf;
+        # при theta < 0 - квадратура Гаусса-Эрмита по ln X ~ N(mu, sigma²)
+        if theta > 0:
+            return math.inf
+        if theta == 0:
+            return 0.0
+        z, w = np.polynomial.hermite_e.hermegauss(64)
+        return _logsumexp(theta * np.exp(self.mu + self.sigma * z), w / w.sum())
+
+
+@register("gamma")
+class Gamma(Distribution):
+    """Гамма-распределение с параметром формы shape и масштабом scale (среднее shape * scale)."""
+
+    def __init__(self, shape, scale):
+        if shape <= 0 or scale <= 0:
+            raise ValueError("shape and scale must be positive")
+        self.shape = shape
+        self.scale = scale
+
+    def sample(self, size=None, seed=None):
+        return _as_generator(seed).gamma(self.shape, self.scale, size=size)
+
+    @property
+    def mean(self):
+        return self.shape * self.scale
+
+    @property
+    def var(self):
+        return self.shape * self.scale ** 2
+
+    def log_mgf(self, theta):
+        return -self.shape * math.log(1 - theta * self.scale) if theta * self.scale < 1 else math.inf
+
+    def tilted(self, theta):
+        return Gamma(self.shape, self.scale / (1 - theta * self.scale))
+
+
+@register("deterministic")
+class Deterministic(Distribution):
+    """Постоянное значение value (вырожденное распределение)."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def sample(self, size=None, seed=None):
+        return np.full(size if size is not None else (), self.value, dtype=np.float64)
+
+    @property
+    def mean(self):
+        return self.value
+
+    @property
+    def var(self):
+        return 0.0
+
+    def log_mgf(self, theta):
+        return theta * self.value
+
+    def tilted(self, theta):
+        return self
+
+
+@register("poisson")
+class Poisson(Distribution):
+    """Пуассоновское число приходов за минуту с интенсивностью rate (как в 2.py)."""
+
+    def __init__(self, rate):
+        self.rate = rate
+
+    def sample(self, size=None, seed=None):
+        return _as_generator(seed).poisson(self.rate, size=size)
+
+    @property
+    def mean(self):
+        return self.rate
+
+    @property
+    def var(self):
+        return self.rate
+
+    def log_mgf(self, theta):
+        return self.rate * math.expm1(theta)
+
+    def tilted(self, theta):
+        return Poisson(self.rate * math.exp(theta))
+
+
+@register("randint")
+class RandInt(Distribution):
+    """Равновероятное целое из [low, high] (как random.randint в 1.py и 3.py)."""
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def sample(self, size=None, seed=None):
+        return _as_generator(seed).integers(self.low, self.high, size=size, endpoint=True)
+
+    @property
+    def mean(self):
+        return (self.low + self.high) / 2
+
+    @property
+    def var(self):
+        return ((self.high - self.low + 1) ** 2 - 1) / 12
+
+    def log_mgf(self, theta):
+        k = np.arange(self.low, self.high + 1)
+        return _logsumexp(theta * k, np.full(len(k), 1.0 / len(k)))
+
+    def tilted(self, theta):
+        return Discrete(np.arange(self.low, self.high + 1)).tilted(theta)
+
+
+class AliasTable:
+    """
+    Таблица псевдонимов (метод Уокера, построение Воуза) для выбора
+    номера i с вероятностью probs[i] за O(1) на одно значение, независимо
+    от числа вариантов: берём случайную ячейку i и монету u; если
+    u < prob[i] - ответ i, иначе alias[i]. Построение - O(n) один раз.
+    """
+
+    def __init__(self, weights):
+        w = np.asarray(weights, dtype=np.float64)
+        if w.ndim != 1 or len(w) == 0 or (w < 0).any() or w.sum() <= 0:
+            raise ValueError("weights must be a non-empty 1-D array of non-negative numbers with positive sum")
+        n = len(w)
+        scaled = w * (n / w.sum())
+        prob = np.ones(n)
+        alias = np.arange(n)
+
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            s, g = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = g
+            scaled[g] -= 1.0 - scaled[s]
+            (small if scaled[g] < 1.0 else large).append(g)
+        # оставшиеся ячейки (из-за округления) заполнены целиком: prob = 1
+
+        self.prob = prob
+        self.alias = alias
+
+    def __len__(self):
+        return len(self.prob)
+
+    def sample(self, size=None, seed=None):
+        rng = _as_generator(seed)
+        i = rng.integers(len(self.prob), size=size)
+        u = rng.random(size=size)
+        return np.where(u < self.prob[i], i, self.alias[i])
+
+
+@register("discrete")
+class Discrete(Distribution):
+    """
+    Дискретное распределение: значение values[i] с весом weights[i]
+    (веса нормируются). Выбор - через AliasTable, O(1) на значение.
+    Discrete.from_samples(data) - эмпирическое распределение измеренных
+    значений (каждое уникальное значение с его частотой).
+    """
+
+    def __init__(self, values, weights=None):
+        self.values = np.asarray(values)
+        w = np.ones(len(self.values)) if weights is None else np.asarray(weights, dtype=np.float64)
+        if len(w) != len(self.values):
+            raise ValueError("values and weights must have the same length")
+        self.weights = w / w.sum()
+        self._table = AliasTable(w)
+
+    @classmethod
+    def from_samples(cls, data):
+        values, counts = np.unique(np.asarray(data), return_counts=True)
+        return cls(values, counts)
+
+    def sample(self, size=None, seed=None):
+        return self.values[self._table.sample(size, seed)]
+
+    @property
+    def mean(self):
+        return float(np.dot(self.weights, self.values))
+
+    @property
+    def var(self):
+        return float(np.dot(self.weights, (self.values - self.mean) ** 2))
+
+    def log_mgf(self, theta):
+        return _logsumexp(theta * self.values, self.weights)
+
+    def tilted(self, theta):
+        a = np.where(self.weights > 0, theta * self.values, -math.inf)
+        return Discrete(self.values, self.weights * np.exp(a - a.max()))
+
+
+@register("empirical")
+class Empirical(Distribution):
+    """
+    Эмпирическое распределение по гистограмме измерений: корзины
+    [edges[i], edges[i+1]) с числом наблюдений counts[i]. Корзина
+    выбирается через AliasTable (O(1), сколько бы корзин ни было),
+    значение внутри корзины - равномерно.
+    Empirical.from_samples(data, bins) строит гистограмму по сырым данным.
+    """
+
+    def __init__(self, edges, counts):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        counts = np.asarray(counts, dtype=np.float64)
+        if len(self.edges) != len(counts) + 1:
+            raise ValueError("edges must be one longer than counts")
+        if (np.diff(self.edges) < 0).any():
+            raise ValueError("edges must be non-decreasing")
+        self.weights = counts / counts.sum()
+        self._table = AliasTable(counts)
+
+    @classmethod
+    def from_samples(cls, data, bins=1000):
+        counts, edges = np.histogram(np.asarray(data, dtype=np.float64), bins=bins)
+        return cls(edges, counts)
+
+    def sample(self, size=None, seed=None):
+        rng = _as_generator(seed)
+        i = self._table.sample(size, rng)
+        lo = self.edges[i]
+        return lo + (self.edges[i + 1] - lo) * rng.random(size=size)
+
+    @property
+    def mean(self):
+        mid = (self.edges[:-1] + self.edges[1:]) / 2
+        return float(np.dot(self.weights, mid))
+
+    @property
+    def var(self):
+        # смесь равномерных: дисперсия середин + средняя дисперсия внутри корзин
+        lo, hi = self.edges[:-1], self.edges[1:]
+        mid = (lo + hi) / 2
+        return float(np.dot(self.weights, (mid - self.mean) ** 2 + (hi - lo) ** 2 / 12))
+
+    def log_mgf(self, theta):
+        # смесь равномерных по корзинам: сумма их производящих функций с весами корзин
+        return _logsumexp(_uniform_log_mgf(self.edges[:-1], self.edges[1:], theta), self.weights)
+
+    def tilted(self, theta):
+        return TiltedEmpirical(self.edges, self.weights, theta)
+
+
+class Scaled(Distribution):
+    """Распределение base, умноженное на factor (например, секунды -> минуты: factor = 1/60)."""
+
+    def __init__(self, base, factor):
+        self.base = base
+        self.factor = factor
+
+    def sample(self, size=None, seed=None):
+        return self.base.sample(size, seed) * self.factor
+
+    @property
+    def mean(self):
+        return self.base.mean * self.factor
+
+    @property
+    def var(self):
+        return self.base.var * self.factor ** 2
+
+    def log_mgf(self, theta):
+        return self.base.log_mgf(theta * self.factor)
+
+    def tilted(self, theta):
+        return Scaled(self.base.tilted(theta * self.factor), self.factor)
+
+
+class TiltedUniform(Distribution):
+    """
+    Равномерное на [low, high], наклонённое множителем exp(theta x)
+    (Uniform.tilted). Значения - обратной функцией распределения:
+    x = low + ln(1 + u (exp(theta (high - low)) - 1)) / theta.
+    """
+
+    def __init__(self, low, high, theta):
+        self.low = low
+        self.high = high
+        self.theta = theta
+
+    def sample(self, size=None, seed=None):
+        u = _as_generator(seed).random(size=size)
+        h = self.theta * (self.high - self.low)
+        if not h:
+            return self.low + (self.high - self.low) * u
+        return self.low + np.log1p(u * math.expm1(h)) / self.theta
+
+    @property
+    def mean(self):
+        h = self.theta * (self.high - self.low)
+        if not h:
+            return (self.low + self.high) / 2
+        # производная log_mgf в theta
+        return self.high - 1 / self.theta + (self.high - self.low) / math.expm1(h)
+
+    @property
+    def var(self):
+        h = self.theta * (self.high - self.low)
+        if not h:
+            return (self.high - self.low) ** 2 / 12
+        return 1 / self.theta ** 2 - (self.high - self.low) ** 2 * math.exp(h) / math.expm1(h) ** 2
+
+    def log_mgf(self, theta):
+        return Uniform(self.low, self.high).log_mgf(self.theta + theta) - Uniform(self.low, self.high).log_mgf(self.theta)
+
+    def tilted(self, theta):
+        return TiltedUniform(self.low, self.high, self.theta + theta)
+
+
+class TiltedEmpirical(Distribution):
+    """
+    Empirical (корзины edges с весами weights), наклонённое множителем
+    exp(theta x) (Empirical.tilted): смесь TiltedUniform по корзинам с весами
+    weights[i] * E[exp(theta X) | корзина i]. Корзина - через AliasTable,
+    значение внутри неё - обратной функцией распределения.
+    """
+
+    def __init__(self, edges, weights, theta):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.theta = theta
+        a = np.where(self.weights > 0, _uniform_log_mgf(self.edges[:-1], self.edges[1:], theta), -math.inf)
+        p = self.weights * np.exp(a - a.max())
+        self._probs = p / p.sum()
+        self._table = AliasTable(p)
+
+    def sample(self, size=None, seed=None):
+        rng = _as_generator(seed)
+        i = self._table.sample(size, rng)
+        lo, hi = self.edges[i], self.edges[i + 1]
+        u = rng.random(size=size)
+        h = self.theta * (hi - lo)
+        if not self.theta:
+            return lo + (hi - lo) * u
+        # при h > 0 считаем от правого края, чтобы exp(h) не переполнялся
+        with np.errstate(over="ignore", divide="ignore"):
+            right = hi + np.log(u + (1 - u) * np.exp(-h)) / self.theta
+            left = lo + np.log1p(u * np.expm1(h)) / self.theta
+        return np.where(h == 0, lo + (hi - lo) * u, np.where(h > 0, right, left))
+
+    def _bin_moments(self):
+        # среднее и дисперсия TiltedUniform в каждой корзине
+        lo, hi = self.edges[:-1], self.edges[1:]
+        w = hi - lo
+        h = self.theta * w
+        safe = np.where(h == 0, 1.0, h)
+        t = self.theta if self.theta else 1.0
+        with np.errstate(over="ignore"):
+            mean = np.where(h == 0, (lo + hi) / 2, hi - 1 / t + w / np.expm1(safe))
+            var = np.where(h == 0, w ** 2 / 12, 1 / t ** 2 - (w / (2 * np.sinh(safe / 2))) ** 2)
+        return mean, var
+
+    @property
+    def mean(self):
+        return float(np.dot(self._probs, self._bin_moments()[0]))
+
+    @property
+    def var(self):
+        m, v = self._bin_moments()
+        return float(np.dot(self._probs, v + (m - self.mean) ** 2))
+
+    def log_mgf(self, theta):
+        lo, hi, w = self.edges[:-1], self.edges[1:], self.weights
+        return (_logsumexp(_uniform_log_mgf(lo, hi, self.theta + theta), w)
+                - _logsumexp(_uniform_log_mgf(lo, hi, self.theta), w))
+
+    def tilted(self, theta):
+        return TiltedEmpirical(self.edges, self.weights, self.theta + theta)
+
+
+def get_distribution(spec, **params):
+    """
+    Распределение по описанию:
+      - готовый объект Distribution возвращается как есть;
+      - имя из реестра и параметры: get_distribution("gamma", shape=2, scale=1.5);
+      - словарь {"kind": "lognormal", "mu": 1.0, "sigma": 0.3}.
+    """
+    if isinstance(spec, Distribution):
+        return spec
+    if isinstance(spec, dict):
+        params = dict(spec, **params)
+        spec = params.pop("kind")
+    try:
+        cls = DISTRIBUTIONS[spec]
+    except KeyError:
+        raise ValueError(f"Unknown distribution {spec!r}. Use one of: {', '.join(sorted(DISTRIBUTIONS))}.")
+    return cls(**params)
@@ -0,0 +1,261 @@
+import heapq
+import random
+
+import numpy as np
+
+from customer_store import CustomerStore, RingQueue
+
+# Типы событий в календаре будущих событий
+ARRIVAL = 0
+DEPARTURE = 1
+
+
+def _as_source(source, rng=None):
+    """
+    Приводит генератор к виду "функция без аргументов / функция от минуты".
+    Принимает вызываемый объект, распределение из distributions.py
+    (значения берутся блоками через sampler) либо последовательность значений
+    (например, список из generate_arrivals / generate_service_times из 1.py).
+    """
+    if hasattr(source, "sampler"):
+        return source.sampler(rng)
+    if callable(source):
+        return source
+    it = iter(source)
+    return lambda *args: next(it)
+
+
+def _arrival_times(T, arrivals, spread, rng):
+    """
+    Генератор моментов прихода (в минутах) в порядке возрастания.
+
+    arrivals - число пришедших за минуту: функция arrivals(minute) -> int,
+               список длины T или распределение из distributions.py
+               (Poisson, RandInt, Discrete - число за минуту).
+    spread   - если True, люди, пришедшие за минуту m, равномерно
+               распределяются внутри [m, m+1) (смещения берутся из rng);
+               иначе все приходят ровно в m.
+    """
+    if hasattr(arrivals, "sample"):
+        counts = arrivals.sample(T, rng).tolist()
+    elif callable(arrivals):
+        counts = (arrivals(m) for m in range(T))
+    else:
+        counts = arrivals
+    for m, k in enumerate(counts):
+        if m >= T:
+            break
+        if k <= 0:
+            continue
+        if spread:
+            for u in np.sort(rng.random(k)).tolist():
+                yield m + u
+        else:
+            for _ in range(k):
+                yield float(m)
+
+
+def simulate_events(
+        T,
+        arrivals,
+        service_times,
+        seed=None,
+        spread=True,
+        servers=1,
+        discipline="shared",
+        stats=None,
+        trace=False,
+        arrival_times=None
+):
+    """
+    Событийная (next-event) имитация банка из servers турникетов в непрерывном времени.
+
+    Вместо шага в 1 минуту модель переходит от события к событию
+    (приход / окончание обслуживания), которые хранятся в куче (heapq).
+    Поэтому стоимость зависит от числа событий, а не от длины горизонта,
+    и турникет может обслужить несколько человек за одну минуту.
+
+    ПАРАМЕТРЫ:
+    T              - длительность моделирования (в минутах).
+    arrivals       - число пришедших за минуту: функция arrivals(minute) -> int,
+                     готовый список (как из generate_arrivals) или распределение
+                     из distributions.py (Poisson, RandInt, Discrete).
+    service_times  - время обслуживания (в минутах): функция без аргументов,
+                     последовательность (как из generate_service_times) или
+                     распределение из distributions.py (Gamma, Empirical, ...).
+    seed           - начальное значение для random (функции-генераторы) и для numpy-генератора
+                     (распределения, моменты прихода внутри минуты); опционально.
+    spread         - распределять ли приходы равномерно внутри минуты.
+    servers        - число параллельных турникетов c.
+    discipline     - "shared": одна общая очередь FIFO; свободные турникеты
+                     лежат в куче по моменту освобождения, выбор - O(log c);
+                     "jsq": у каждого турникета своя очередь, пришедший встаёт
+                     в самую короткую (линейный выбор по длинам очередей, O(c) -
+                     турникетов немного, а куча копила бы устаревшие записи).
+    stats          - накопитель streaming_stats.TurnstileStats (опционально)
+                     или любой объект с методами add_wait / update_state / close
+                     (например, multiday.ChunkedRecorder). Если задан, списки
+                     по минутам и по людям не хранятся: ожидания и изменения
+                     очереди и занятости передаются в stats, и память не растёт с T.
+    trace          - сохранять ли таблицу по людям (customer_store.CustomerStore:
+                     приход, начало и конец обслуживания, номер турникета).
+    arrival_times  - готовые моменты прихода в минутах (по возрастанию), например
+                     из журнала турникетов (turnstile_logs.minute_offsets).
+                     Если заданы, arrivals и spread не используются.
+
+    ВОЗВРАЩАЕТ:
+    словарь того же вида, что и simulate_single_turnstile / simulate_one_day:
+      - time_points        (список минут [0..T-1]),
+      - queue_length       (число ожидающих на конец каждой минуты),
+      - waiting_times      (время ожидания каждого, кто начал обслуживание до T),
+      - server_busy        (число занятых турникетов на конец каждой минуты;
+                            при servers=1 - это 1 или 0),
+      - server_utilization (доля времени [0, T], когда был занят каждый турникет).
+    При заданном stats вместо списков возвращается
+    {"stats": stats, "server_utilization": [...]}.
+    При trace=True добавляется "customers" - CustomerStore (см. records()).
+    """
+    if discipline not in ("shared", "jsq"):
+        raise ValueError("Unknown discipline. Use 'shared' or 'jsq'.")
+    if stats is not None and hasattr(stats, "servers"):
+        # загрузка в stats.summary() делится на число турникетов движка
+        if stats.servers is None:
+            stats.servers = servers
+        elif stats.servers != servers:
+            raise ValueError(f"stats.servers={stats.servers} does not match servers={servers}")
+    if seed is not None:
+        random.seed(seed)
+
+    rng = np.random.default_rng(seed)  # для распределений из distributions.py и моментов прихода внутри минуты
+    next_service = _as_source(service_times, rng)
+    if arrival_times is not None:
+        arrival_stream = (float(t) for t in arrival_times if 0 <= t < T)
+    else:
+        arrival_stream = _arrival_times(T, arrivals, spread, rng)
+    jsq = discipline == "jsq"
+
+    time_points = list(range(T)) if stats is None else None
+    queue_length = []
+    waiting_times = []
+    server_busy = []
+
+    busy_since = [None] * servers  # момент начала текущего обслуживания (None - свободен)
+    busy_time = [0.0] * servers    # накопленное время занятости каждого турникета
+    n_busy = 0
+    n_waiting = 0
+
+    # В очередях (кольцевые буферы) лежат моменты прихода, а при trace - номера людей в store
+    store = CustomerStore() if trace else None
+    typecode = 'q' if trace else 'd'
+    in_service = [-1] * servers  # номер человека на турникете (при trace)
+
+    if jsq:
+        lanes = [RingQueue(64, typecode) for _ in range(servers)]  # своя очередь у каждого турникета
+        in_lane = [0] * servers  # людей у турникета (в очереди и на обслуживании)
+        lane_ids = range(servers)
+    else:
+        queue = RingQueue(1024, typecode)            # общая очередь
+        free = [(0.0, k) for k in range(servers)]    # свободные турникеты: (момент освобождения, номер)
+
+    # Календарь будущих событий: (время, номер, тип события, турникет)
+    events = []
+    seq = 0
+    next_minute = 1  # ближайшая граница минуты, на которой снимаем состояние
+
+    record = stats is None  # хранить ли ряды по минутам и по людям
+    add_wait = waiting_times.append if record else stats.add_wait
+
+    def start_service(t, k, item):
+        nonlocal seq, n_busy
+        if trace:
+            store.begin_service(item, t, k)
+            in_service[k] = item
+            add_wait(t - store.arrival[item])
+        else:
+            add_wait(t - item)
+        busy_since[k] = t
+        n_busy += 1
+        heapq.heappush(events, (t + next_service(), seq, DEPARTURE, k))
+        seq += 1
+
+    first = next(arrival_stream, None)
+    if first is not None:
+        heapq.heappush(events, (first, seq, ARRIVAL, -1))
+        seq += 1
+
+    while events and events[0][0] < T:
+        t, _, kind, k = heapq.heappop(events)
+
+        # Фиксируем состояние на всех границах минут, пройденных до события
+        while record and next_minute <= t:
+            queue_length.append(n_waiting)
+            server_busy.append(n_busy)
+            next_minute += 1
+
+        if kind == ARRIVAL:
+            nxt = next(arrival_stream, None)
+            if nxt is not None:
+                heapq.heappush(events, (nxt, seq, ARRIVAL, -1))
+                seq += 1
+            item = store.enqueue(t) if trace else t
+            if jsq:
+                # самая короткая очередь (при равенстве - турникет с меньшим номером)
+                k = min(lane_ids, key=in_lane.__getitem__)
+                in_lane[k] += 1
+                if busy_since[k] is None:
+                    start_service(t, k, item)
+                else:
+                    lanes[k].push(item)
+                    n_waiting += 1
+            else:
+                queue.push(item)
+                n_waiting += 1
+        else:
+            if trace:
+                store.end_service(in_service[k], t)
+            busy_time[k] += t - busy_since[k]
+            busy_since[k] = None
+            n_busy -= 1
+            if jsq:
+                in_lane[k] -= 1
+                if lanes[k]:
+                    n_waiting -= 1
+                    start_service(t, k, lanes[k].pop())
+            else:
+                heapq.heappush(free, (t, k))
+
+        # Общая очередь: пока есть ожидающие и свободные турникеты - назначаем
+        if not jsq:
+            while queue and free:
+                _, k = heapq.heappop(free)
+                n_waiting -= 1
+                start_service(t, k, queue.pop())
+
+        if not record:
+            stats.update_state(t, n_waiting, n_busy)
+
+    # Досчитываем оставшиеся границы минут до конца горизонта
+    while record and next_minute <= T:
+        queue_length.append(n_waiting)
+        server_busy.append(n_busy)
+        next_minute += 1
+
+    for k in range(servers):
+        if busy_since[k] is not None:
+            busy_time[k] += T - busy_since[k]
+
+    utilization = [b / T for b in busy_time] if T > 0 else [0.0] * servers
+    if not record:
+        stats.close(T)
+        result = {"stats": stats, "server_utilization": utilization}
+    else:
+        result = {
+            "time_points": time_points,
+            "queue_length": queue_length,
+            "waiting_times": waiting_times,
+            "server_busy": server_busy,
+            "server_utilization": utilization
+        }
+    if trace:
+        result["customers"] = store
+    return result
@@ -0,0 +1,97 @@
+import json
+import os
+
+import numpy as np
+
+from shortest_paths import CSRGraph
+
+# Двоичный формат графа - каталог с массивами CSR в .npy (открываются через mmap)
+_ARRAYS = ("indptr", "indices", "weights")
+
+
+def load_edge_list(path, directed=True, n=None, delimiter=None, comments="#"):
+    """
+    Граф из текстового списка рёбер: строка "u v [w]" (вес по умолчанию 1).
+    Файл разбирается np.loadtxt целиком, без цикла Python по строкам.
+
+    ПАРАМЕТРЫ:
+    path      - путь к файлу.
+    directed  - False: каждое ребро добавляется в обе стороны.
+    n         - число вершин (None - наибольший номер + 1).
+    delimiter - разделитель столбцов (None - пробелы и табуляции).
+    comments  - начало строки-комментария.
+
+    ВОЗВРАЩАЕТ: CSRGraph (целые веса - int64, дробные - float64).
+    """
+    data = np.loadtxt(path, delimiter=delimiter, comments=comments, dtype=np.float64, ndmin=2)
+    if data.size == 0:
+        return CSRGraph(np.zeros((n or 0) + 1, dtype=np.int64), [], [])
+    if data.shape[1] not in (2, 3):
+        raise ValueError("Edge list lines must be 'u v' or 'u v w'")
+    src, dst = data[:, 0].astype(np.int64), data[:, 1].astype(np.int64)
+    w = data[:, 2] if data.shape[1] == 3 else np.ones(len(data))
+    if np.all(w == np.floor(w)):
+        w = w.astype(np.int64)
+    return CSRGraph.from_edges(src, dst, w, n=n, directed=directed)
+
+
+def save_graph(graph, path):
+    """
+    Сохранить граф в двоичном формате: каталог path с indptr.npy,
+    indices.npy, weights.npy и meta.json. load_graph читает его через mmap.
+    """
+    os.makedirs(path, exist_ok=True)
+    for name in _ARRAYS:
+        np.save(os.path.join(path, name + ".npy"), getattr(graph, name))
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"n": graph.n, "n_edges": graph.n_edges, "weights": str(graph.weights.dtype)}, f)
+
+
+def load_graph(path, directed=True, mmap=True):
+    """
+    Граф из файла:
+      - каталог (save_graph) - массивы открываются через mmap (mmap=True),
+        файл не читается целиком, страницы общие для всех процессов;
+      - .npy - матрица смежности (0 - нет ребра), как matrix в algoritm_deikstr.py;
+      - иначе - текстовый список рёбер (load_edge_list, directed).
+    path может быть строкой или pathlib.Path.
+    """
+    path = os.fspath(path)
+    if os.path.isdir(path):
+        mode = "r" if mmap else None
+        return CSRGraph(*(np.load(os.path.join(path, name + ".npy"), mmap_mode=mode) for name in _ARRAYS))
+    if path.endswith(".npy"):
+        return CSRGraph.from_dense(np.load(path))
+    return load_edge_list(path, directed=directed)
+
+
+def parse_queries(text):
+    """
+    Запросы "source [target]" по одному в строке (пустые строки пропускаются).
+    Разбор векторный: все числа - одним np.array(text.split()), номер строки
+    каждого числа - по позициям переводов строк в байтах текста.
+
+    ВОЗВРАЩАЕТ: (sources, targets) - массивы int64; target = -1, если в строке
+    только источник. Строка не из одного-двух целых - ValueError с её номером.
+    """
+    raw = np.frombuffer(text.encode(), dtype=np.uint8)
+    if not raw.size:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    space = np.isin(raw, np.frombuffer(b" \t\r\n,", dtype=np.uint8))
+    # начало числа: не пробел, а перед ним пробел или начало текста
+    starts = np.flatnonzero(~space & np.concatenate(([True], space[:-1])))
+    line_of = np.searchsorted(np.flatnonzero(raw == ord("\n")), starts)
+    tokens = text.replace(",", " ").split()
+    try:
+        values = np.array(tokens, dtype=np.int64)
+    except ValueError:
+        bad = next(i for i, tok in enumerate(tokens) if not tok.lstrip("+-").isdigit())
+        raise ValueError(f"Query line {int(line_of[bad]) + 1}: {tokens[bad]!r} is not a vertex number") from None
+
+    lines, first, per_line = np.unique(line_of, return_index=True, return_counts=True)
+    if (per_line > 2).any():
+        bad = int(lines[np.argmax(per_line > 2)]) + 1
+        raise ValueError(f"Query line {bad}: expected 'source [target]'")
+    sources = values[first]
+    targets = np.where(per_line == 2, values[np.minimum(first + 1, len(values) - 1)], -1)
+    return sources, targets
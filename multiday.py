@@ -0,0 +1,221 @@
+import json
+import os
+import random
+from array import array
+
+import numpy as np
+
+from event_sim import simulate_events
+
+
+class ChunkedRecorder:
+    """
+    Приёмник результатов событийной модели (передаётся в simulate_events
+    как stats), который пишет ряды на диск кусками, а не копит их в памяти.
+
+    В каталоге out_dir создаются:
+      queue_length.npy  - длина очереди на конец каждой минуты (int32, .npy);
+      server_busy.npy   - число занятых турникетов на конец каждой минуты (int16);
+      waiting_times.f8  - времена ожидания подряд (float64, сырой файл);
+      day_index.npy     - сколько ожиданий записано к концу каждого дня;
+      meta.json         - параметры прогона.
+    Пиковая память - один кусок (chunk_minutes минут), а не весь горизонт.
+    """
+
+    def __init__(self, out_dir, total_minutes, day_length, chunk_minutes=480 * 30, meta=None):
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.total_minutes = total_minutes
+        self.day_length = day_length
+        self.chunk_minutes = chunk_minutes
+        self.meta = dict(meta or {})
+
+        n_days = -(-total_minutes // day_length)
+        self.queue_length = np.lib.format.open_memmap(
+            os.path.join(out_dir, "queue_length.npy"), mode="w+", dtype=np.int32, shape=(total_minutes,))
+        self.server_busy = np.lib.format.open_memmap(
+            os.path.join(out_dir, "server_busy.npy"), mode="w+", dtype=np.int16, shape=(total_minutes,))
+        self.day_index = np.zeros(n_days, dtype=np.int64)
+        self.waits_file = open(os.path.join(out_dir, "waiting_times.f8"), "wb")
+
+        self.q_buf = array('i')
+        self.busy_buf = array('h')
+        self.wait_buf = array('d')
+        self.flushed_minutes = 0  # сколько минут уже записано в файлы
+        self.written_waits = 0    # сколько ожиданий уже записано
+        self.pending = 0          # ожидания текущего события (ещё не отнесены к минуте)
+        self.state = (0, 0)       # (длина очереди, занятых турникетов)
+
+    # --- интерфейс накопителя (как у streaming_stats.TurnstileStats) ---
+
+    def add_wait(self, w):
+        self.wait_buf.append(w)
+        self.pending += 1
+
+    def update_state(self, t, queue_len, n_busy):
+        self._fill_until(t)
+        self.pending = 0
+        self.state = (queue_len, n_busy)
+
+    def close(self, t):
+        self._fill_until(min(t, self.total_minutes))
+        self.pending = 0
+        self._flush()
+        self.waits_file.close()
+        self.queue_length.flush()
+        self.server_busy.flush()
+        np.save(os.path.join(self.out_dir, "day_index.npy"), self.day_index)
+        meta = dict(self.meta, total_minutes=self.total_minutes, day_length=self.day_length,
+                    n_days=len(self.day_index), n_waits=self.written_waits)
+        with open(os.path.join(self.out_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        del self.queue_length, self.server_busy
+
+    # --- внутреннее ---
+
+    def _fill_until(self, t):
+        # Состояние на границах минут m+1 <= t - это состояние до текущего события
+        q, busy = self.state
+        minute = self.flushed_minutes + len(self.q_buf)
+        while minute + 1 <= t and minute < self.total_minutes:
+            self.q_buf.append(q)
+            self.busy_buf.append(busy)
+            minute += 1
+            if minute % self.day_length == 0:
+                # ожидания текущего события относятся уже к следующему дню
+                day = minute // self.day_length - 1
+                self.day_index[day] = self.written_waits + len(self.wait_buf) - self.pending
+            if len(self.q_buf) >= self.chunk_minutes:
+                self._flush()
+
+    def _flush(self):
+        n = len(self.q_buf)
+        if n:
+            start = self.flushed_minutes
+            self.queue_length[start:start + n] = np.frombuffer(self.q_buf, dtype=np.int32)
+            self.server_busy[start:start + n] = np.frombuffer(self.busy_buf, dtype=np.int16)
+            self.flushed_minutes += n
+            self.q_buf = array('i')
+            self.busy_buf = array('h')
+        # ожидания текущего события остаются в буфере до его завершения
+        keep = self.pending
+        done = self.wait_buf[:len(self.wait_buf) - keep] if keep else self.wait_buf
+        self.waits_file.write(done.tobytes())
+        self.written_waits += len(done)
+        self.wait_buf = self.wait_buf[len(self.wait_buf) - keep:] if keep else array('d')
+        if self.total_minutes % self.day_length and self.flushed_minutes == self.total_minutes:
+            # последний неполный день
+            self.day_index[-1] = self.written_waits + len(self.wait_buf)
+
+
+def simulate_days(
+        n_days,
+        calendar,
+        out_dir,
+        service_min_sec=2.0,
+        service_max_sec=5.0,
+        servers=1,
+        discipline="shared",
+        chunk_days=30,
+        seed=None
+):
+    """
+    Имитация многих дней подряд (учебный год, несколько лет) с переносом
+    очереди через границу дня и записью результатов на диск кусками.
+
+    ПАРАМЕТРЫ:
+    n_days         - число дней.
+    calendar       - schedule.WeeklyCalendar со значениями (arrivals_min, arrivals_max)
+                     или schedule.Schedule одного дня (повторяется каждый день,
+                     длина дня тогда = 480 минут, как в 4.py).
+    out_dir        - каталог для результатов (см. ChunkedRecorder).
+    service_min_sec, service_max_sec - равномерное время обслуживания (секунды).
+    servers, discipline - банк турникетов (см. event_sim.simulate_events).
+    chunk_days     - сколько дней держать в памяти перед записью на диск.
+    seed           - начальное значение для random.
+
+    ВОЗВРАЩАЕТ: MultiDayResult - ленивый доступ к записанным данным.
+    """
+    day_length = getattr(calendar, "day_length", 480)
+    total_minutes = n_days * day_length
+
+    if hasattr(calendar, "day_length"):
+        bounds = calendar.value
+    else:
+        bounds = lambda m: calendar.value(m % day_length)
+
+    def arrivals(minute):
+        (mn, mx) = bounds(minute)
+        return random.randint(mn, mx)
+
+    service_min_min = service_min_sec / 60.0
+    service_max_min = service_max_sec / 60.0
+
+    recorder = ChunkedRecorder(out_dir, total_minutes, day_length, chunk_minutes=chunk_days * day_length,
+                               meta={"service_min_sec": service_min_sec, "service_max_sec": service_max_sec,
+                                     "servers": servers, "discipline": discipline, "seed": seed})
+    simulate_events(
+        total_minutes,
+        arrivals=arrivals,
+        service_times=lambda: random.uniform(service_min_min, service_max_min),
+        seed=seed,
+        servers=servers,
+        discipline=discipline,
+        stats=recorder
+    )
+    return MultiDayResult(out_dir)
+
+
+class MultiDayResult:
+    """
+    Ленивое чтение результатов simulate_days: файлы открываются через
+    отображение в память (mmap), данные читаются только при обращении.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.day_length = self.meta["day_length"]
+        self.n_days = self.meta["n_days"]
+        self.queue_length = np.load(os.path.join(path, "queue_length.npy"), mmap_mode="r")
+        self.server_busy = np.load(os.path.join(path, "server_busy.npy"), mmap_mode="r")
+        self.day_index = np.load(os.path.join(path, "day_index.npy"))
+        waits_path = os.path.join(path, "waiting_times.f8")
+        if os.path.getsize(waits_path):
+            self.waiting_times = np.memmap(waits_path, dtype=np.float64, mode="r")
+        else:
+            self.waiting_times = np.empty(0)
+
+    def day(self, d):
+        """
+        Данные одного дня в формате simulate_one_day (массивы - срезы mmap).
+        """
+        a, b = d * self.day_length, min((d + 1) * self.day_length, len(self.queue_length))
+        w0 = self.day_index[d - 1] if d > 0 else 0
+        return {
+            "time_points": np.arange(b - a),
+            "queue_length": self.queue_length[a:b],
+            "waiting_times": self.waiting_times[w0:self.day_index[d]],
+            "server_busy": self.server_busy[a:b],
+        }
+
+    def daily_summary(self):
+        """
+        Показатели по дням (средняя / максимальная очередь, среднее и p95 ожидания,
+        загрузка). Дни читаются по одному - память не зависит от горизонта.
+        ВОЗВРАЩАЕТ: словарь массивов длины n_days.
+        """
+        servers = self.meta.get("servers", 1)
+        out = {k: np.zeros(self.n_days) for k in
+               ("avg_queue", "max_queue", "avg_wait", "p95_wait", "utilization", "served")}
+        for d in range(self.n_days):
+            r = self.day(d)
+            q, busy, w = r["queue_length"], r["server_busy"], r["waiting_times"]
+            out["avg_queue"][d] = q.mean() if len(q) else 0.0
+            out["max_queue"][d] = q.max() if len(q) else 0.0
+            out["avg_wait"][d] = w.mean() if len(w) else 0.0
+            out["p95_wait"][d] = np.percentile(w, 95) if len(w) else 0.0
+            out["utilization"][d] = busy.mean() / servers if len(busy) else 0.0
+            out["served"][d] = len(w)
+        return out
@@ -0,0 +1,193 @@
+import heapq
+from collections import OrderedDict
+
+import numpy as np
+
+from shortest_paths import CSRGraph, shortest_path_tree, reconstruct_path
+
+
+class _Tree:
+    # Дерево кратчайших путей от source, верное для версии графа version
+    __slots__ = ("distances", "parents", "version")
+
+    def __init__(self, distances, parents, version):
+        self.distances = distances
+        self.parents = parents
+        self.version = version
+
+
+class ShortestPathService:
+    """
+    Сервис кратчайших путей для многократных запросов к одному графу.
+
+    Для каждой вершины-источника хранится дерево кратчайших путей (расстояния
+    и предшественники), поэтому повторный запрос и восстановление пути не
+    требуют нового поиска. Деревья лежат в LRU-кеше на cache_size источников.
+
+    Изменение веса ребра (set_weight, close_edge) увеличивает версию графа
+    и записывается в журнал правок. Дерево старой версии при следующем
+    запросе не пересчитывается заново, а чинится (_repair): пересчитываются
+    только вершины, которых правки могут касаться.
+
+    ПАРАМЕТРЫ:
+    graph       - CSRGraph или матрица смежности (0 - нет ребра).
+    cache_size  - сколько деревьев держать в кеше.
+    max_pending - если у дерева накопилось больше правок, оно строится заново.
+    """
+
+    def __init__(self, graph, cache_size=32, max_pending=64):
+        self.graph = graph if isinstance(graph, CSRGraph) else CSRGraph.from_dense(graph)
+        self.cache_size = cache_size
+        self.max_pending = max_pending
+        self.version = 0
+        self.edits = []  # (версия после правки, номер ребра, u, v, старый вес, новый вес)
+        self.cache = OrderedDict()  # source -> _Tree
+        self._reverse = None
+        self.stats = {"hits": 0, "repairs": 0, "rebuilds": 0}
+
+    # --- запросы ---
+
+    def tree(self, source):
+        """Дерево от source: (distances, parents) - списки, актуальные для текущей версии."""
+        t = self.cache.get(source)
+        if t is None:
+            self.stats["rebuilds"] += 1
+            t = _Tree(*shortest_path_tree(self.graph, source), self.version)
+            self.cache[source] = t
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+                self._trim_edits()
+        else:
+            self.cache.move_to_end(source)
+            if t.version != self.version:
+                pending = [e for e in self.edits if e[0] > t.version]
+                if len(pending) > self.max_pending:
+                    self.stats["rebuilds"] += 1
+                    t.distances, t.parents = shortest_path_tree(self.graph, source)
+                else:
+                    self.stats["repairs"] += 1
+                    self._repair(t, source, pending)
+                t.version = self.version
+                self._trim_edits()
+            else:
+                self.stats["hits"] += 1
+        return t.distances, t.parents
+
+    def distances(self, source):
+        return self.tree(source)[0]
+
+    def distance(self, source, target):
+        return self.tree(source)[0][target]
+
+    def path(self, source, target):
+        """Кратчайший путь source -> target (список вершин) или None."""
+        return reconstruct_path(self.tree(source)[1], source, target)
+
+    # --- правки графа ---
+
+    def set_weight(self, u, v, weight):
+        """Новый вес ребра u -> v (ребро должно существовать)."""
+        edge = self.graph.edge_id(u, v)
+        old = self.graph.weights[edge].item()
+        if old == weight:
+            return
+        self.graph.set_weight(edge, weight)
+        self.version += 1
+        self.edits.append((self.version, edge, u, v, old, weight))
+
+    def close_edge(self, u, v):
+        """Закрыть проход u -> v (вес inf)."""
+        self.set_weight(u, v, float('inf'))
+
+    def clear(self):
+        """Сбросить кеш (например, после замены графа целиком)."""
+        self.cache.clear()
+        self.edits.clear()
+
+    # --- внутреннее ---
+
+    def _trim_edits(self):
+        # правки, которые уже учтены всеми деревьями в кеше, больше не нужны
+        oldest = min((t.version for t in self.cache.values()), default=self.version)
+        if self.edits and self.edits[0][0] <= oldest:
+            self.edits = [e for e in self.edits if e[0] > oldest]
+
+    def _repair(self, t, source, pending):
+        """
+        Починка дерева после правок весов (все правки - одним проходом).
+
+        1) Ребро дерева u -> v стало длиннее: расстояния всего поддерева v
+           могли вырасти - сбрасываем их в inf и берём лучшее из входящих рёбер
+           от вершин вне поддерева.
+        2) Ребро стало короче: если через него путь в v короче - улучшаем v.
+        3) Дейкстра только от изменившихся вершин распространяет улучшения.
+        Вершины вне затронутых поддеревьев сохраняют свои расстояния.
+        """
+        dist, parent = t.distances, t.parents
+        indptr, indices, weights = self.graph.lists()
+        n = self.graph.n
+
+        # 1) поддеревья рёбер дерева, ставших длиннее
+        roots = [v for (_, e, u, v, old, new) in pending if new > old and parent[v] == u]
+        affected = self._subtrees(parent, roots) if roots else []
+        heap = []
+        if affected:
+            if self._reverse is None:
+                self._reverse = self.graph.reverse()
+            r_indptr, r_src, r_edge = self._reverse
+            mark = bytearray(n)
+            for x in affected:
+                mark[x] = 1
+                dist[x] = float('inf')
+                parent[x] = -1
+            for x in affected:
+                best, best_p = float('inf'), -1
+                for i in range(r_indptr[x], r_indptr[x + 1]):
+                    y = r_src[i]
+                    if not mark[y]:
+                        nd = dist[y] + weights[r_edge[i]]
+                        if nd < best:
+                            best, best_p = nd, y
+                if best < dist[x]:
+                    dist[x], parent[x] = best, best_p
+                    heap.append((best, x))
+
+        # 2) рёбра, ставшие короче (берём текущий вес - правки могли идти подряд)
+        for (_, e, u, v, old, new) in pending:
+            nd = dist[u] + weights[e]
+            if nd < dist[v]:
+                dist[v], parent[v] = nd, u
+                heap.append((nd, v))
+
+        # 3) распространение улучшений
+        heapq.heapify(heap)
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            a, b = indptr[u], indptr[u + 1]
+            for v, w in zip(indices[a:b], weights[a:b]):
+                nd = d + w
+                if nd < dist[v]:
+                    dist[v], parent[v] = nd, u
+                    heapq.heappush(heap, (nd, v))
+        dist[source] = 0
+
+    @staticmethod
+    def _subtrees(parent, roots):
+        # все потомки вершин roots в дереве parents (дети - через сортировку parents)
+        p = np.asarray(parent)
+        order = np.argsort(p, kind="stable")
+        starts = np.searchsorted(p[order], np.arange(len(p) + 1))
+        order, starts = order.tolist(), starts.tolist()
+        seen = set(roots)
+        stack = list(seen)
+        out = []
+        while stack:
+            x = stack.pop()
+            out.append(x)
+            for c in order[starts[x]:starts[x + 1]]:
+                if c not in seen:
+                    seen.add(c)
+                    stack.append(c)
+        return out
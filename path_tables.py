@@ -0,0 +1,173 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from graph_io import load_graph, save_graph
+from shortest_paths import CSRGraph, dijkstra_csr
+
+# Флойд-Уоршелл выбирается для графов не больше FLOYD_MAX_VERTICES вершин
+# с плотностью E / V² не меньше FLOYD_MIN_DENSITY (матрица n x n целиком в памяти)
+FLOYD_MAX_VERTICES = 4000
+FLOYD_MIN_DENSITY = 0.1
+
+
+def _as_graph(graph):
+    return graph if isinstance(graph, CSRGraph) else CSRGraph.from_dense(graph)
+
+
+def floyd_warshall(matrix, dtype=np.float64):
+    """
+    Кратчайшие расстояния между всеми парами вершин (Флойд-Уоршелл) на NumPy.
+
+    На шаге k вся матрица обновляется сразу:
+    D = min(D, D[:, k] + D[k, :]) - n векторных операций над n x n,
+    без тройного цикла Python. O(V³) операций, O(V²) памяти.
+
+    ПАРАМЕТРЫ:
+    matrix - матрица смежности (matrix[u][v] - вес ребра u -> v, 0 - ребра нет,
+             как в algoritm_deikstr.py) или CSRGraph.
+    dtype  - тип результата (float, чтобы хранить inf).
+
+    ВОЗВРАЩАЕТ: массив n x n, D[u, v] - расстояние u -> v (inf - недостижима).
+    """
+    if isinstance(matrix, CSRGraph):
+        n = matrix.n
+        d = np.full((n, n), np.inf, dtype=dtype)
+        rows = np.repeat(np.arange(n), np.diff(matrix.indptr))
+        np.minimum.at(d, (rows, matrix.indices), matrix.weights)  # из параллельных рёбер - самое короткое
+    else:
+        m = np.asarray(matrix)
+        d = np.where(m != 0, m, np.inf).astype(dtype)
+    np.fill_diagonal(d, 0)
+    via_k = np.empty_like(d)  # буфер для D[:, k] + D[k, :], чтобы не выделять память на каждом шаге
+    for k in range(len(d)):
+        np.add(d[:, k, None], d[None, k, :], out=via_k)
+        np.minimum(d, via_k, out=d)
+    return d
+
+
+def choose_method(graph, n_sources=None):
+    """
+    "floyd" для небольших плотных графов, когда нужны расстояния от многих
+    вершин, иначе "dijkstra" (по одному поиску на вершину-источник).
+    """
+    n = graph.n
+    if n_sources is None:
+        n_sources = n
+    density = graph.n_edges / n ** 2 if n else 0.0
+    if n <= FLOYD_MAX_VERTICES and density >= FLOYD_MIN_DENSITY and n_sources * 4 >= n:
+        return "floyd"
+    return "dijkstra"
+
+
+_worker_graphs = {}  # граф, уже открытый в процессе-исполнителе (по каталогу)
+
+
+def _load_graph_arrays(directory):
+    graph = _worker_graphs.get(directory)
+    if graph is None:
+        # mmap: все процессы читают одни и те же страницы файла; поиск идёт по
+        # массивам (shared=True), без частной копии рёбер в списках Python
+        graph = load_graph(directory)
+        _worker_graphs.clear()
+        _worker_graphs[directory] = graph
+    return graph
+
+
+def _rows_task(task):
+    graph_dir, out_path, rows, sources, queue = task
+    graph = _load_graph_arrays(graph_dir)
+    out = np.load(out_path, mmap_mode="r+")
+    for r, s in zip(rows, sources):
+        out[r] = dijkstra_csr(graph, s, queue=queue, shared=True)
+    out.flush()
+    return len(rows)
+
+
+def distance_table(
+        graph,
+        sources=None,
+        path=None,
+        method="auto",
+        max_workers=None,
+        dtype=np.float32,
+        queue="auto",
+        chunk_sources=None
+):
+    """
+    Таблица кратчайших расстояний от многих источников (например, от каждого
+    входа до каждой аудитории) или между всеми парами вершин.
+
+    ПАРАМЕТРЫ:
+    graph         - CSRGraph или матрица смежности (0 - нет ребра).
+    sources       - номера вершин-источников (None - все вершины).
+    path          - файл .npy для результата; он открывается через
+                    np.load(path, mmap_mode="r") без чтения целиком.
+                    None - результат в памяти.
+    method        - "dijkstra": поиск из каждого источника, источники делятся
+                    между процессами; граф передаётся исполнителям через
+                    файлы, открытые в mmap (общие страницы памяти), и поиск
+                    читает рёбра прямо из них, без копии графа в каждом процессе;
+                    "floyd": floyd_warshall на NumPy (плотные графы);
+                    "auto": выбор по плотности (choose_method).
+    max_workers   - число процессов (None - по числу ядер, 1 - в этом процессе).
+    dtype         - тип таблицы: float32 вдвое компактнее float64 и точно хранит
+                    целые расстояния до 2**24; недостижимые вершины - inf.
+    queue         - очередь Дейкстры ("auto", "heap", "dial").
+    chunk_sources - сколько источников в одной задаче пула.
+
+    ВОЗВРАЩАЕТ: массив формы (len(sources), n) - строка i относится к sources[i]
+    (memmap, если задан path).
+    """
+    graph = _as_graph(graph)
+    n = graph.n
+    sources = np.arange(n) if sources is None else np.asarray(sources, dtype=np.int64)
+    if method == "auto":
+        method = choose_method(graph, len(sources))
+    if method not in ("dijkstra", "floyd"):
+        raise ValueError("Unknown method. Use 'auto', 'dijkstra' or 'floyd'.")
+
+    if path is not None:
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(len(sources), n))
+    else:
+        out = np.empty((len(sources), n), dtype=dtype)
+
+    if method == "floyd":
+        out[:] = floyd_warshall(graph, dtype=dtype)[sources]
+        if path is not None:
+            out.flush()
+        return out
+
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1 or len(sources) <= 1:
+        for r, s in enumerate(sources.tolist()):
+            out[r] = dijkstra_csr(graph, s, queue=queue)
+        if path is not None:
+            out.flush()
+        return out
+
+    tmp = tempfile.mkdtemp(prefix="paths_")
+    try:
+        save_graph(graph, tmp)
+        out_path = path
+        if out_path is None:
+            out_path = os.path.join(tmp, "out.npy")
+            np.lib.format.open_memmap(out_path, mode="w+", dtype=dtype, shape=out.shape).flush()
+        else:
+            out.flush()
+        chunk = chunk_sources or max(1, len(sources) // (workers * 4))
+        tasks = [(tmp, out_path, list(range(i, min(i + chunk, len(sources)))),
+                  sources[i:i + chunk].tolist(), queue)
+                 for i in range(0, len(sources), chunk)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_rows_task, tasks))
+        if path is None:
+            out[:] = np.load(out_path, mmap_mode="r")
+        else:
+            out = np.load(path, mmap_mode="r+")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return out
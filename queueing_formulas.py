@@ -0,0 +1,274 @@
+import math
+import random
+
+import numpy as np
+
+from distributions import Distribution, Exponential, Poisson
+from event_sim import simulate_events
+from replications import run_replications
+
+
+def mm1(lam, mu):
+    """
+    Одноканальная система M/M/1 (пуассоновский поток λ, экспоненциальное обслуживание μ).
+
+    ВОЗВРАЩАЕТ: словарь L, Lq, W, Wq, utilization (в единицах времени λ и μ).
+    При ρ = λ/μ >= 1 стационарного режима нет - L, Lq, W, Wq равны inf.
+    """
+    return mmc(lam, mu, 1)
+
+
+def erlang_c(c, a):
+    """
+    Формула Эрланга C: вероятность того, что пришедший будет ждать,
+    в системе M/M/c с нагрузкой a = λ/μ (a < c).
+    Считается через рекуррентную формулу Эрланга B (без факториалов).
+    """
+    b = 1.0
+    for k in range(1, c + 1):
+        b = a * b / (k + a * b)
+    rho = a / c
+    return b / (1 - rho + rho * b)
+
+
+def mmc(lam, mu, c):
+    """
+    Многоканальная система M/M/c (формула Эрланга C).
+
+    ВОЗВРАЩАЕТ: словарь L, Lq, W, Wq, utilization.
+    """
+    a = lam / mu
+    rho = a / c
+    if rho >= 1:
+        return _unstable(rho)
+    wq = erlang_c(c, a) / (c * mu - lam)
+    return _little(lam, wq, 1 / mu, rho)
+
+
+def mg1(lam, mean_s, var_s):
+    """
+    Одноканальная система M/G/1 (формула Поллачека-Хинчина):
+    Wq = λ E[S²] / (2 (1 - ρ)), E[S²] = var_s + mean_s².
+
+    ВОЗВРАЩАЕТ: словарь L, Lq, W, Wq, utilization.
+    """
+    rho = lam * mean_s
+    if rho >= 1:
+        return _unstable(rho)
+    wq = lam * (var_s + mean_s ** 2) / (2 * (1 - rho))
+    return _little(lam, wq, mean_s, rho)
+
+
+def ggc_approx(lam, mean_s, var_s, c, ca2=1.0):
+    """
+    Приближение Аллена-Каннена для G/G/c:
+    Wq ≈ Wq(M/M/c) * (ca² + cs²) / 2, где ca², cs² - квадраты коэффициентов
+    вариации межприходного интервала и обслуживания. Для c = 1 и ca² = 1
+    совпадает с формулой Поллачека-Хинчина.
+    """
+    rho = lam * mean_s / c
+    if rho >= 1:
+        return _unstable(rho)
+    cs2 = var_s / mean_s ** 2
+    wq = mmc(lam, 1 / mean_s, c)["Wq"] * (ca2 + cs2) / 2
+    return _little(lam, wq, mean_s, rho)
+
+
+def wait_quantile(lam, mean_s, var_s, c, q=0.95, ca2=1.0):
+    """
+    Квантиль уровня q времени ожидания в G/G/c (приближённо).
+
+    В M/M/c P(Wq > t) = C * exp(-(cμ - λ) t), где C - формула Эрланга C,
+    поэтому t_q = ln(C / (1 - q)) / (cμ - λ) (0, если C <= 1 - q).
+    Для G/G/c хвост растягивается тем же множителем (ca² + cs²) / 2, что и
+    среднее в приближении Аллена-Каннена. При ρ >= 1 - inf.
+    """
+    a = lam * mean_s
+    if a >= c:
+        return math.inf
+    p_wait = erlang_c(c, a)
+    if p_wait <= 1 - q:
+        return 0.0
+    cs2 = var_s / mean_s ** 2
+    return math.log(p_wait / (1 - q)) / (c / mean_s - lam) * (ca2 + cs2) / 2
+
+
+def _little(lam, wq, mean_s, rho):
+    # Формула Литтла: L = λW, Lq = λWq
+    w = wq + mean_s
+    return {"L": lam * w, "Lq": lam * wq, "W": w, "Wq": wq, "utilization": rho}
+
+
+def _unstable(rho):
+    return {"L": math.inf, "Lq": math.inf, "W": math.inf, "Wq": math.inf, "utilization": min(rho, 1.0)}
+
+
+def service_moments(params):
+    """
+    Среднее и дисперсия времени обслуживания (в минутах) по параметрам модели:
+      service="exp"           - service_rate (μ, как в simulate_single_turnstile);
+      service="uniform"       - service_min, service_max;
+      service="deterministic" - service_time;
+      service=<Distribution>  - любое распределение из distributions.py.
+    """
+    kind = params.get("service", "exp")
+    if isinstance(kind, Distribution):
+        return kind.mean, kind.var
+    if kind == "exp":
+        mu = params.get("service_rate", 1 / 3.0)
+        return 1 / mu, 1 / mu ** 2
+    if kind == "uniform":
+        a, b = params["service_min"], params["service_max"]
+        return (a + b) / 2, (b - a) ** 2 / 12
+    if kind == "deterministic":
+        return params["service_time"], 0.0
+    raise ValueError("Unknown service. Use 'exp', 'uniform' or 'deterministic'.")
+
+
+def arrival_moments(params):
+    """
+    Интенсивность λ (чел/мин) и индекс рассеяния числа приходов за минуту
+    Var(N)/E(N) (для пуассоновского потока = 1):
+      arrival_process="uniform" - randint(arrivals_min, arrivals_max), как в 3.py;
+      arrival_process="poisson" - Poisson(arrival_rate);
+      arrival_process=<Distribution> - распределение числа приходов за минуту.
+    """
+    process = params.get("arrival_process", "uniform")
+    if isinstance(process, Distribution):
+        return process.mean, (process.var / process.mean if process.mean > 0 else 1.0)
+    if process == "poisson":
+        return params["arrival_rate"], 1.0
+    lo, hi = params.get("arrivals_min", 0), params.get("arrivals_max", 5)
+    lam = (lo + hi) / 2
+    var = ((hi - lo + 1) ** 2 - 1) / 12
+    return lam, (var / lam if lam > 0 else 1.0)
+
+
+def analytic_metrics(params, allow_approximation=False):
+    """
+    Стационарные L, Lq, W, Wq и загрузка по формулам, если модель подходит.
+
+    Точные формулы: M/M/1, M/M/c (Эрланг C), M/G/1 (Поллачек-Хинчин) -
+    только для пуассоновского потока (arrival_process="poisson").
+    allow_approximation=True разрешает приближение Аллена-Каннена для
+    остальных случаев (G/G/c, в т.ч. поток randint из 3.py).
+
+    ВОЗВРАЩАЕТ: словарь метрик с ключом "method" или None, если модель не подходит.
+    """
+    lam, ca2 = arrival_moments(params)
+    mean_s, var_s = service_moments(params)
+    c = params.get("servers", 1)
+    service = params.get("service", "exp")
+    process = params.get("arrival_process", "uniform")
+    exp_service = isinstance(service, Exponential) or service == "exp"
+    poisson = isinstance(process, Poisson) or process == "poisson"
+
+    if poisson and exp_service:
+        res, method = mmc(lam, 1 / mean_s, c), ("M/M/1" if c == 1 else "M/M/c")
+    elif poisson and c == 1:
+        res, method = mg1(lam, mean_s, var_s), "M/G/1"
+    elif allow_approximation:
+        res, method = ggc_approx(lam, mean_s, var_s, c, ca2), "G/G/c (Allen-Cunneen)"
+    else:
+        return None
+    res["method"] = method
+    return res
+
+
+def simulate_model(
+        T=10000,
+        arrivals_min=0,
+        arrivals_max=5,
+        arrival_process="uniform",
+        arrival_rate=None,
+        service="exp",
+        service_rate=1 / 3.0,
+        service_min=None,
+        service_max=None,
+        service_time=None,
+        servers=1,
+        seed=None
+):
+    """
+    Прогон событийной модели (event_sim) для тех же параметров, что и
+    у analytic_metrics. Используется как запасной путь и для перекрёстной проверки.
+    arrival_process и service могут быть и распределениями из distributions.py.
+    """
+    rng = np.random.default_rng(seed)
+    if isinstance(arrival_process, Distribution):
+        counts = arrival_process.sample(T, rng)
+    elif arrival_process == "poisson":
+        counts = rng.poisson(arrival_rate, T)
+    else:
+        counts = rng.integers(arrivals_min, arrivals_max, size=T, endpoint=True)
+    if isinstance(service, Distribution):
+        draw = service
+    elif service == "exp":
+        draw = lambda: random.expovariate(service_rate)
+    elif service == "uniform":
+        draw = lambda: random.uniform(service_min, service_max)
+    else:
+        draw = lambda: service_time
+    return simulate_events(T, counts.tolist(), draw, seed=int(rng.integers(2 ** 63)), servers=servers)
+
+
+def _simulation_metrics(res):
+    q = np.asarray(res["queue_length"], dtype=np.float64)
+    busy = np.asarray(res["server_busy"], dtype=np.float64)
+    w = np.asarray(res["waiting_times"], dtype=np.float64)
+    c = len(res["server_utilization"])
+    return {"Lq": q.mean(), "L": q.mean() + busy.mean(), "Wq": w.mean() if w.size else 0.0,
+            "utilization": busy.mean() / c}
+
+
+def turnstile_metrics(
+        params,
+        cross_check=False,
+        rel_tol=0.1,
+        allow_approximation=False,
+        T=10000,
+        replications=20,
+        base_seed=0,
+        max_workers=1
+):
+    """
+    Диспетчер: формула, если модель подходит, иначе - имитация.
+
+    ПАРАМЕТРЫ:
+    params      - параметры модели (как у simulate_single_turnstile, плюс
+                  arrival_process, arrival_rate, service, service_min/max,
+                  service_time, servers - см. service_moments / arrival_moments).
+    cross_check - посчитать и формулой, и имитацией и сравнить.
+    rel_tol     - допустимое относительное расхождение Wq, Lq, загрузки.
+    T, replications, base_seed, max_workers - параметры имитации.
+
+    ВОЗВРАЩАЕТ:
+    словарь L, Lq, W, Wq, utilization, method; при cross_check ещё
+    simulation (метрики имитации), divergence (относительные расхождения)
+    и diverged (True, если хоть одно больше rel_tol).
+    """
+    result = analytic_metrics(params, allow_approximation)
+    if result is not None and not cross_check:
+        return result
+
+    sim_params = dict(params, T=T)
+    runs = run_replications(simulate_model, [("model", sim_params)], replications,
+                            base_seed=base_seed, max_workers=max_workers, metrics=_simulation_metrics)
+    summary = runs["model"]["summary"]
+    mean_s, _ = service_moments(params)
+    sim = {name: float(summary[name]["mean"]) for name in summary}
+    sim["W"] = sim["Wq"] + mean_s
+    sim["method"] = "simulation"
+
+    if result is None:
+        return sim
+
+    divergence = {}
+    for name in ("Wq", "Lq", "utilization"):
+        ref = result[name]
+        divergence[name] = abs(sim[name] - ref) / abs(ref) if ref not in (0, math.inf) else (
+            0.0 if sim[name] == ref else math.inf)
+    result["simulation"] = sim
+    result["divergence"] = divergence
+    result["diverged"] = any(d > rel_tol for d in divergence.values())
+    return result
@@ -0,0 +1,276 @@
+import math
+
+import numpy as np
+
+from distributions import Deterministic, Gamma, Uniform, get_distribution
+from queueing_formulas import arrival_moments
+from replications import confidence_interval
+
+
+def cramer_root(service, interarrival):
+    """
+    Корень Крамера θ* > 0 уравнения ln E[e^{θS}] + ln E[e^{-θA}] = 0 для
+    приращения X = S - A случайного блуждания Линдли (S - обслуживание,
+    A - интервал между приходами). Существует при E[S] < E[A] (ρ < 1) и
+    лёгком хвосте S; тогда P(Wq > x) ~ C exp(-θ* x). Ищется удвоением и бисекцией.
+    """
+    if service.mean >= interarrival.mean:
+        raise ValueError("The queue is unstable (rho >= 1): no Cramer root")
+
+    def kappa(theta):
+        return service.log_mgf(theta) + interarrival.log_mgf(-theta)
+
+    hi = 1.0 / service.mean
+    while kappa(hi) < 0:
+        hi *= 2
+    lo = 0.0
+    for _ in range(200):
+        mid = (lo + hi) / 2
+        if kappa(mid) < 0:
+            lo = mid
+        else:
+            hi = mid
+    if lo == 0:
+        # kappa >= 0 при любом θ > 0: E[e^{θS}] = inf (тяжёлый хвост, например LogNormal)
+        raise ValueError("The service time has no exponential moments: no Cramer root")
+    return hi
+
+
+def turnstile_laws(arrivals_min, arrivals_max, service_min_sec=2.0, service_max_sec=5.0):
+    """
+    Законы обслуживания и интервалов между приходами для wait_tail по
+    участку расписания модели дня (4.py): randint(arrivals_min, arrivals_max)
+    человек за минуту, разбросанных равномерно внутри минуты, и равномерное
+    обслуживание [service_min_sec, service_max_sec] секунд.
+
+    Такой поток - не процесс восстановления, поэтому он заменяется
+    восстановлением с той же интенсивностью λ и тем же индексом рассеяния
+    ca² = Var(N)/E(N) (arrival_moments, как в приближении Аллена-Каннена):
+    интервалы - Gamma(1/ca², ca²/λ), при ca² = 0 - постоянные 1/λ.
+
+    ВОЗВРАЩАЕТ: (service, interarrival) в минутах.
+    """
+    lam, ca2 = arrival_moments({"arrivals_min": arrivals_min, "arrivals_max": arrivals_max})
+    if lam <= 0:
+        raise ValueError("No arrivals: arrivals_max must be positive")
+    interarrival = Gamma(1 / ca2, ca2 / lam) if ca2 > 0 else Deterministic(1 / lam)
+    return Uniform(service_min_sec / 60.0, service_max_sec / 60.0), interarrival
+
+
+def _diagnostics(z, confidence):
+    # несмещённая оценка по наблюдениям z и показатели её качества
+    n = len(z)
+    p, hw = confidence_interval(z, confidence)
+    sd = z.std(ddof=1) if n > 1 else math.inf
+    second = float(np.mean(z ** 2))
+    rel = sd / (p * math.sqrt(n)) if p > 0 else math.inf
+    return {
+        "estimate": float(p),
+        "half_width": float(hw),
+        "ci_low": float(p - hw),
+        "ci_high": float(p + hw),
+        # относительная погрешность: стандартная ошибка / оценка
+        "relative_error": float(rel),
+        # ln E[Z²] / ln p: 2 - асимптотически оптимальная оценка, 1 - как у простого Монте-Карло
+        "log_efficiency": float(math.log(second) / math.log(p)) if 0 < p < 1 and second > 0 else math.nan,
+        # сколько прогонов простого Монте-Карло дали бы ту же относительную погрешность
+        "naive_equivalent": float((1 - p) / (p * rel ** 2)) if p > 0 and rel > 0 else math.inf,
+    }
+
+
+def wait_tail(
+        x,
+        service,
+        interarrival,
+        paths=10000,
+        seed=None,
+        confidence=0.95,
+        block=256,
+        max_steps=10 ** 7
+):
+    """
+    P(Wq > x) - вероятность ждать дольше x в стационарной очереди GI/G/1 FIFO
+    (один турникет) по выборке по значимости с экспоненциальным наклоном
+    (алгоритм Зигмунда).
+
+    Это модель с интервалами между приходами из одного распределения, а не
+    сама модель дня: для участка расписания 4.py законы даёт turnstile_laws
+    (поток randint заменяется восстановлением с той же интенсивностью и тем
+    же разбросом). Для всего дня с меняющимся потоком - max_wait_splitting.
+
+    Ожидание в стационарном режиме распределено как максимум блуждания
+    S_n = X_1 + ... + X_n, X = S - A (двойственность Линдли). Под мерой,
+    наклонённой на θ* (cramer_root), блуждание идёт вверх и пересекает x за
+    конечное число шагов τ, а отношение правдоподобия на момент τ равно
+    exp(-θ* S_τ). Поэтому Z = exp(-θ* S_τ) <= exp(-θ* x) - несмещённая оценка
+    с ограниченной относительной погрешностью: вероятность 1e-5 или 1e-12
+    считается за те же доли секунды, что и 1e-2.
+
+    ПАРАМЕТРЫ:
+    x            - порог ожидания (в единицах времени распределений, обычно минуты).
+    service      - время обслуживания: распределение из distributions.py или его
+                   описание для get_distribution (нужны log_mgf и tilted:
+                   exp, uniform, gamma, deterministic, empirical, discrete
+                   и их scaled; у lognormal экспоненциальных моментов нет).
+    interarrival - интервал между приходами (для пуассоновского потока λ -
+                   Exponential(λ); для участка расписания - turnstile_laws).
+    paths        - число независимых траекторий.
+    seed         - зерно numpy.random.default_rng.
+    confidence   - уровень доверия.
+    block        - сколько шагов блуждания генерировать за раз (векторно по всем траекториям).
+    max_steps    - защита от бесконечного цикла.
+
+    ВОЗВРАЩАЕТ: словарь
+      estimate, half_width, ci_low, ci_high - оценка и доверительный интервал;
+      relative_error    - стандартная ошибка / оценка;
+      log_efficiency    - ln E[Z²] / ln p (2 - оптимум);
+      naive_equivalent  - сколько прогонов понадобилось бы простому Монте-Карло
+                          для той же точности;
+      theta, paths, mean_steps - θ*, число траекторий и средняя длина траектории.
+    """
+    service = get_distribution(service)
+    interarrival = get_distribution(interarrival)
+    theta = cramer_root(service, interarrival)
+    s_tilted = service.tilted(theta)
+    a_tilted = interarrival.tilted(-theta)
+    rng = np.random.default_rng(seed)
+
+    z = np.zeros(paths)
+    level = np.zeros(paths)              # текущее S_n каждой траектории
+    alive = np.arange(paths)             # траектории, ещё не пересёкшие x
+    n_steps = np.zeros(paths)            # τ каждой траектории
+    steps = 0
+    if x <= 0:
+        # ожидание > 0: блуждание должно просто подняться выше нуля
+        x = 0.0
+    while len(alive) and steps < max_steps:
+        inc = s_tilted.sample((len(alive), block), rng) - a_tilted.sample((len(alive), block), rng)
+        walk = level[alive, None] + np.cumsum(inc, axis=1)
+        over = walk > x
+        crossed = over.any(axis=1)
+        first = over.argmax(axis=1)
+        done = alive[crossed]
+        z[done] = np.exp(-theta * walk[crossed, first[crossed]])
+        n_steps[done] = steps + first[crossed] + 1
+        level[alive] = walk[:, -1]
+        alive = alive[~crossed]
+        steps += block
+    if len(alive):
+        raise RuntimeError("Some paths did not cross the level within max_steps")
+
+    result = _diagnostics(z, confidence)
+    result.update(theta=theta, paths=paths, mean_steps=float(n_steps.mean()) if paths else 0.0)
+    return result
+
+
+def _advance(m, depart, peak, level, bounds, service_min, service_max, demand_scale, rng):
+    """
+    Прогон частиц (один турникет, FIFO) по минутам от m до конца дня или
+    до момента, когда наибольшее ожидание peak достигнет level.
+    Состояние частицы - (минута m, момент освобождения турникета depart,
+    наибольшее ожидание peak): его достаточно для продолжения, поэтому
+    частицу можно клонировать. Массивы меняются на месте.
+    """
+    T = len(bounds)
+    m0 = m.copy()
+    for minute in range(int(m0.min(initial=T)), T):
+        idx = np.flatnonzero((m0 <= minute) & (peak < level))
+        if not len(idx):
+            break
+        mn, mx = bounds[minute]
+        counts = rng.integers(mn, mx, size=len(idx), endpoint=True) * demand_scale
+        width = int(counts.max(initial=0))
+        d, p = depart[idx], peak[idx]
+        if width:
+            times = minute + np.sort(rng.random((len(idx), width)), axis=1)
+            services = rng.uniform(service_min, service_max, (len(idx), width))
+            for k in range(width):
+                valid = k < counts
+                w = np.maximum(d - times[:, k], 0.0)
+                d = np.where(valid, times[:, k] + w + services[:, k], d)
+                p = np.where(valid, np.maximum(p, w), p)
+        depart[idx], peak[idx] = d, p
+        m[idx] = minute + 1
+
+
+def max_wait_splitting(
+        x,
+        bounds,
+        service_min_sec=2.0,
+        service_max_sec=5.0,
+        demand_scale=1,
+        levels=None,
+        n_levels=8,
+        particles=2000,
+        repeats=10,
+        seed=None,
+        confidence=0.95
+):
+    """
+    P(кто-то за день ждёт дольше x минут) для одного турникета с расписанием
+    дня (как simulate_one_day_events в 4.py) - многоуровневым расщеплением
+    (fixed effort splitting).
+
+    Уровни L_1 < ... < L_k = x по наибольшему ожиданию с начала дня. На этапе i
+    particles частиц, уже достигших L_{i-1}, продолжают день до L_i или до
+    конца дня; p_i - доля дошедших. Частицы следующего этапа - случайный
+    выбор (с возвращением) из дошедших. Оценка p_1 * ... * p_k несмещённая,
+    и каждое p_i не мало, поэтому хватает тысяч частиц вместо миллионов дней.
+    Этап векторный: все частицы и все повторы идут одним массивом по минутам.
+
+    ПАРАМЕТРЫ:
+    x               - порог ожидания (минуты).
+    bounds          - (T, 2) границы числа пришедших за минуту (day_schedule.dense).
+    service_min_sec, service_max_sec - равномерное время обслуживания (сек).
+    demand_scale    - множитель потока.
+    levels          - уровни (последний - x); None - n_levels равных шагов до x.
+    particles       - частиц на этапе в одном повторе.
+    repeats         - независимых повторов всей процедуры (по ним - ДИ и
+                      относительная погрешность).
+    seed, confidence - зерно и уровень доверия.
+
+    ВОЗВРАЩАЕТ: словарь как у wait_tail (estimate, half_width, ci_low, ci_high,
+    relative_error, log_efficiency, naive_equivalent) плюс
+      levels        - уровни;
+      stage_probs   - средние условные вероятности p_i по повторам;
+      estimates     - оценки отдельных повторов;
+      extinct       - в скольких повторах ни одна частица не дошла до какого-то уровня
+                      (много таких - нужно больше частиц или уровней).
+    """
+    bounds = np.asarray(bounds, dtype=np.int64)
+    levels = np.linspace(x / n_levels, x, n_levels) if levels is None else np.asarray(levels, dtype=np.float64)
+    if levels[-1] != x or (np.diff(levels) <= 0).any():
+        raise ValueError("levels must increase and end at x")
+    rng = np.random.default_rng(seed)
+    n = repeats * particles
+    group = np.arange(n) // particles
+    m = np.zeros(n, dtype=np.int64)
+    depart = np.zeros(n)
+    peak = np.zeros(n)
+    estimates = np.ones(repeats)
+    stage_probs = np.zeros((len(levels), repeats))
+
+    for i, level in enumerate(levels):
+        _advance(m, depart, peak, level, bounds, service_min_sec / 60.0, service_max_sec / 60.0, demand_scale, rng)
+        hit = peak >= level
+        reached = np.bincount(group[hit], minlength=repeats)
+        stage_probs[i] = reached / particles
+        estimates *= stage_probs[i]
+        if i == len(levels) - 1 or not hit.any():
+            break
+        # новые частицы каждого повтора - выбор с возвращением из его дошедших частиц
+        order = np.flatnonzero(hit)          # по возрастанию, т.е. сгруппированы по повторам
+        first = np.concatenate(([0], np.cumsum(reached)[:-1]))
+        dead = reached[group] == 0
+        g = group[~dead]
+        pick = np.arange(n)
+        pick[~dead] = order[first[g] + (rng.random(len(g)) * reached[g]).astype(np.int64)]
+        m, depart, peak = m[pick], depart[pick], peak[pick]
+        # у вымерших повторов частицы больше не двигаются (оценка уже 0)
+        m[dead], peak[dead] = len(bounds), 0.0
+
+    result = _diagnostics(estimates, confidence)
+    # погрешность - по независимым повторам; log_efficiency - по оценкам отдельных повторов
+    result.update(levels=levels, stage_probs=stage_probs.mean(axis=1), estimates=estimates,
+                  extinct=int((estimates == 0).sum()))
+    return result
@@ -0,0 +1,302 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+
+def spawn_seeds(base_seed, n):
+    """
+    n независимых зёрен из одного базового (numpy.random.SeedSequence.spawn).
+    Каждое зерно - целое число, его принимают и random.seed(...), и
+    np.random.default_rng(...), поэтому подходит для любых наших симуляторов.
+    """
+    return [_seed_of(c) for c in np.random.SeedSequence(base_seed).spawn(n)]
+
+
+def _seed_of(seed_sequence):
+    return int(seed_sequence.generate_state(1, dtype=np.uint64)[0])
+
+
+def default_metrics(res):
+    """
+    Сводные показатели одного прогона по словарю результатов
+    (queue_length, waiting_times, server_busy). server_busy - число занятых
+    турникетов, поэтому utilization делится на их число (длина
+    server_utilization у событийной модели, иначе 1), как в
+    streaming_stats.TurnstileStats.summary.
+    """
+    q = np.asarray(res["queue_length"], dtype=np.float64)
+    w = np.asarray(res["waiting_times"], dtype=np.float64)
+    busy = np.asarray(res["server_busy"], dtype=np.float64)
+    servers = len(res.get("server_utilization", [])) or 1
+    return {
+        "avg_queue": q.mean() if q.size else 0.0,
+        "max_queue": q.max() if q.size else 0.0,
+        "avg_wait": w.mean() if w.size else 0.0,
+        "p95_wait": np.percentile(w, 95) if w.size else 0.0,
+        "max_wait": w.max() if w.size else 0.0,
+        "utilization": busy.mean() / servers if busy.size else 0.0,
+        "served": float(w.size),
+    }
+
+
+def batch_metrics(res):
+    """
+    То же, что default_metrics, но сразу для всех прогонов пакетной модели
+    (simulate_one_day_batch): queue_length и server_busy - матрицы (R, T),
+    waiting_times - список из R массивов.
+    ВОЗВРАЩАЕТ: {показатель: массив длины R} - готово для summarize.
+    """
+    q = np.asarray(res["queue_length"], dtype=np.float64)
+    busy = np.asarray(res["server_busy"], dtype=np.float64)
+    waits = res["waiting_times"]
+    R = len(waits)
+    served = np.array([len(w) for w in waits], dtype=np.int64)
+    # ожидания - в матрицу (R, max served), отсортированную по строкам; хвост строки - inf
+    width = int(served.max()) if R else 0
+    w = np.full((R, width), np.inf)
+    if width:
+        w[np.arange(width) < served[:, None]] = np.concatenate(waits)
+    w.sort(axis=1)
+    rows = np.arange(R)
+    last = np.maximum(served - 1, 0)
+    # 95-й перцентиль с линейной интерполяцией, как np.percentile
+    pos = 0.95 * last
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, last)
+    has = served > 0
+    p95 = np.zeros(R)
+    max_wait = np.zeros(R)
+    if width:
+        p95[has] = (w[rows, lo] + (pos - lo) * (w[rows, hi] - w[rows, lo]))[has]
+        max_wait[has] = w[rows, last][has]
+    total = np.where(np.isinf(w), 0.0, w).sum(axis=1)
+    return {
+        "avg_queue": q.mean(axis=1),
+        "max_queue": q.max(axis=1),
+        "avg_wait": total / np.maximum(served, 1),
+        "p95_wait": p95,
+        "max_wait": max_wait,
+        "utilization": busy.mean(axis=1),
+        "served": served.astype(np.float64),
+    }
+
+
+def t_quantile(p, df):
+    """
+    Квантиль распределения Стьюдента уровня p с df степенями свободы.
+    Для df = 1, 2 - точные формулы, иначе разложение Корниша-Фишера
+    от нормального квантиля (относительная погрешность ~0.1% при df = 3
+    и быстро убывает с ростом df).
+    """
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = NormalDist().inv_cdf(p)
+    z3, z5, z7, z9 = z ** 3, z ** 5, z ** 7, z ** 9
+    g1 = (z3 + z) / 4
+    g2 = (5 * z5 + 16 * z3 + 3 * z) / 96
+    g3 = (3 * z7 + 19 * z5 + 17 * z3 - 15 * z) / 384
+    g4 = (79 * z9 + 776 * z7 + 1482 * z5 - 1920 * z3 - 945 * z) / 92160
+    return z + g1 / df + g2 / df ** 2 + g3 / df ** 3 + g4 / df ** 4
+
+
+def confidence_interval(samples, confidence=0.95):
+    """
+    Среднее и полуширина доверительного интервала (по Стьюденту).
+    ВОЗВРАЩАЕТ: (mean, half_width); при одном наблюдении half_width = inf.
+    """
+    x = np.asarray(samples, dtype=np.float64)
+    mean = x.mean()
+    if x.size < 2:
+        return mean, math.inf
+    sd = x.std(ddof=1)
+    return mean, t_quantile(0.5 + confidence / 2, x.size - 1) * sd / math.sqrt(x.size)
+
+
+def summarize(samples, confidence=0.95):
+    """
+    Сводная таблица по одному сценарию.
+    samples: {показатель: массив значений по прогонам}.
+    ВОЗВРАЩАЕТ: {показатель: {"mean", "std", "ci_low", "ci_high", "n"}}.
+    """
+    table = {}
+    for name, values in samples.items():
+        x = np.asarray(values, dtype=np.float64)
+        mean, hw = confidence_interval(x, confidence)
+        table[name] = {
+            "mean": mean,
+            "std": x.std(ddof=1) if x.size > 1 else 0.0,
+            "ci_low": mean - hw,
+            "ci_high": mean + hw,
+            "n": x.size,
+        }
+    return table
+
+
+def _run_task(task):
+    simulate, params, seed, metrics = task
+    return metrics(simulate(**params, seed=seed))
+
+
+def _run_all(tasks, max_workers, pool=None):
+    """
+    Выполняет задачи по порядку: в этом процессе (max_workers=1),
+    в переданном пуле или в новом пуле процессов.
+    Порядок результатов совпадает с порядком задач.
+    """
+    if pool is None and (max_workers == 1 or len(tasks) <= 1):
+        return [_run_task(t) for t in tasks]
+    workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (workers * 4))
+    if pool is not None:
+        return list(pool.map(_run_task, tasks, chunksize=chunksize))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_task, tasks, chunksize=chunksize))
+
+
+def run_replications(
+        simulate,
+        scenarios,
+        replications,
+        base_seed=0,
+        max_workers=None,
+        metrics=default_metrics,
+        confidence=0.95,
+        common_seeds=False
+):
+    """
+    Монте-Карло: много независимых прогонов каждого сценария в пуле процессов.
+
+    ПАРАМЕТРЫ:
+    simulate     - функция-симулятор, принимающая параметры сценария и seed
+                   (simulate_one_day, simulate_single_turnstile и т.п.).
+                   Должна быть определена на уровне модуля (для pickle).
+    scenarios    - список (имя, словарь_параметров).
+    replications - число прогонов на сценарий.
+    base_seed    - базовое зерно. Каждая задача (сценарий, прогон) получает
+                   своё зерно из SeedSequence(base_seed).spawn, поэтому
+                   результаты не зависят от числа процессов и порядка выполнения.
+    max_workers  - число процессов (None - все ядра, 1 - без пула).
+    metrics      - функция: словарь результатов прогона -> {показатель: число}.
+                   Из процесса возвращаются только эти числа, а не весь прогон.
+    confidence   - уровень доверия для интервалов в сводной таблице.
+    common_seeds - если True, прогон r каждого сценария получает одно и то же
+                   зерно (общие случайные числа для сравнения сценариев).
+
+    ВОЗВРАЩАЕТ:
+    словарь {имя: {"samples": {показатель: массив}, "summary": summarize(...)}}.
+    """
+    if common_seeds:
+        seeds = spawn_seeds(base_seed, replications)
+        scenario_seeds = [seeds] * len(scenarios)
+    else:
+        scenario_seeds = [[_seed_of(c) for c in ss.spawn(replications)]
+                          for ss in np.random.SeedSequence(base_seed).spawn(len(scenarios))]
+    tasks = []
+    for (label, params), seeds in zip(scenarios, scenario_seeds):
+        for seed in seeds:
+            tasks.append((simulate, params, seed, metrics))
+
+    outputs = _run_all(tasks, max_workers)
+
+    results = {}
+    for i, (label, params) in enumerate(scenarios):
+        chunk = outputs[i * replications:(i + 1) * replications]
+        samples = {name: np.array([m[name] for m in chunk]) for name in chunk[0]} if chunk else {}
+        results[label] = {"samples": samples, "summary": summarize(samples, confidence)}
+    return results
+
+
+def run_until_precision(
+        simulate,
+        params,
+        metric="avg_wait",
+        rel_half_width=0.05,
+        abs_half_width=None,
+        confidence=0.95,
+        batch_size=20,
+        min_replications=10,
+        max_replications=10000,
+        base_seed=0,
+        max_workers=None,
+        metrics=default_metrics
+):
+    """
+    Последовательные прогоны до заданной точности оценки.
+
+    Прогоны выполняются пачками по batch_size (в пуле процессов), после
+    каждой пачки пересчитывается доверительный интервал для показателя metric.
+    Останавливаемся, когда полуширина <= rel_half_width * |среднее|
+    (или <= abs_half_width, если задана), либо когда исчерпан бюджет
+    max_replications.
+
+    ПАРАМЕТРЫ:
+    simulate, params - симулятор и словарь его параметров (без seed).
+    metric           - имя показателя из metrics(...) ("avg_wait", "p95_wait",
+                       "utilization", ...).
+    rel_half_width   - целевая относительная полуширина ДИ.
+    abs_half_width   - целевая абсолютная полуширина (опционально).
+    confidence       - уровень доверия.
+    batch_size       - сколько прогонов добавлять за раз.
+    min_replications - минимум прогонов до первой проверки.
+    max_replications - бюджет прогонов.
+    base_seed        - базовое зерно; прогон i всегда получает одно и то же
+                       зерно, поэтому результат воспроизводим.
+
+    ВОЗВРАЩАЕТ:
+    словарь с ключами estimate, half_width, ci_low, ci_high,
+    relative_half_width, replications, converged, samples.
+    """
+    root = np.random.SeedSequence(base_seed)
+    samples = []
+    pool = None
+    if max_workers != 1:
+        pool = ProcessPoolExecutor(max_workers=max_workers or os.cpu_count() or 1)
+    try:
+        mean, hw = 0.0, math.inf
+        converged = False
+        while len(samples) < max_replications:
+            n = min(max(batch_size, min_replications - len(samples)),
+                    max_replications - len(samples))
+            tasks = [(simulate, params, _seed_of(c), metrics) for c in root.spawn(n)]
+            samples.extend(m[metric] for m in _run_all(tasks, max_workers, pool))
+
+            mean, hw = confidence_interval(samples, confidence)
+            target = rel_half_width * abs(mean)
+            if abs_half_width is not None:
+                target = max(target, abs_half_width)
+            if hw <= target:
+                converged = True
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return {
+        "estimate": mean,
+        "half_width": hw,
+        "ci_low": mean - hw,
+        "ci_high": mean + hw,
+        "relative_half_width": hw / abs(mean) if mean else math.inf,
+        "replications": len(samples),
+        "converged": converged,
+        "samples": np.array(samples),
+    }
+
+
+def format_summary(results, names=None):
+    """
+    Текстовая таблица: сценарий x показатель, "среднее ± полуширина ДИ".
+    """
+    lines = []
+    for label, r in results.items():
+        summary = r["summary"]
+        for name in (names or summary.keys()):
+            s = summary[name]
+            hw = (s["ci_high"] - s["ci_low"]) / 2
+            lines.append(f"{label:<12} {name:<12} {s['mean']:10.4f} ± {hw:.4f}  (n={s['n']})")
+    return "\n".join(lines)
@@ -0,0 +1,257 @@
+import bisect
+import csv
+import datetime
+import json
+import numbers
+
+import numpy as np
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+class Schedule:
+    """
+    Расписание внутри одного дня: кусочно-постоянная функция от минуты.
+
+    Интервалы (start_minute, end_minute, value) компилируются один раз в
+    отсортированный массив границ, поэтому поиск значения - это бинарный
+    поиск (bisect / np.searchsorted), а не перебор всех интервалов.
+    value - число (например, λ) или кортеж (например, (arrivals_min, arrivals_max)).
+    Вне интервалов возвращается default.
+    """
+
+    def __init__(self, intervals, default=0):
+        intervals = sorted(intervals, key=lambda iv: iv[0])
+        edges = []   # левые границы сегментов
+        values = []  # значение на сегменте [edges[i], edges[i+1])
+        pos = None
+        for (start_m, end_m, value) in intervals:
+            if end_m <= start_m:
+                raise ValueError(f"Empty interval: ({start_m}, {end_m})")
+            if pos is not None and start_m < pos:
+                raise ValueError(f"Overlapping intervals at minute {start_m}")
+            if pos is not None and start_m > pos:
+                # разрыв между интервалами
+                edges.append(pos)
+                values.append(default)
+            edges.append(start_m)
+            values.append(value)
+            pos = end_m
+        if pos is not None:
+            edges.append(pos)
+            values.append(default)
+
+        # Левее первой границы - тоже default (нулевая строка таблицы)
+        self.edges = edges
+        self.values = [v if isinstance(v, numbers.Real) else tuple(v) for v in values]
+        self.default = default if isinstance(default, numbers.Real) else tuple(default)
+
+        table = np.array([self.default] + self.values)
+        self._table = table
+        self._edges = np.asarray(edges, dtype=np.float64)
+
+    def value(self, minute):
+        """
+        Значение расписания в одну минуту (бинарный поиск bisect).
+        """
+        i = bisect.bisect_right(self.edges, minute) - 1
+        if i < 0:
+            return self.default
+        return self.values[i]
+
+    def at(self, t):
+        """
+        Значения расписания сразу для массива моментов t (np.searchsorted).
+        Для скаляра возвращает одно значение, как value().
+        Форма результата: t.shape для числовых значений, t.shape + (k,) для кортежей.
+        """
+        if np.ndim(t) == 0:
+            return self.value(t)
+        idx = np.searchsorted(self._edges, np.asarray(t, dtype=np.float64), side='right')
+        return self._table[idx]
+
+    def dense(self, total_minutes):
+        """
+        Плотная таблица значений по целым минутам 0..total_minutes-1.
+        """
+        return self.at(np.arange(total_minutes))
+
+    def __call__(self, t):
+        return self.at(t)
+
+
+class WeeklyCalendar:
+    """
+    Календарь из нескольких дней: своё расписание на каждый день недели
+    и отдельное расписание для праздничных дней.
+
+    Время t - минуты от начала первого дня (day_length минут в сутках
+    модели, например 480 для 08:00-16:00). День t // day_length, его
+    день недели (start_weekday + день) % 7; 0 - понедельник.
+    Дни без расписания (и праздники без holiday_schedule) дают default.
+    """
+
+    def __init__(self, weekdays, day_length=1440, holidays=(), holiday_schedule=None,
+                 start_weekday=0, start_date=None, default=None):
+        if default is None:
+            # по умолчанию - то же значение "вне расписания", что у переданных дней
+            known = list(weekdays.values()) + ([holiday_schedule] if holiday_schedule else [])
+            default = known[0].default if known else 0
+        if start_date is not None:
+            start_date = _as_date(start_date)
+            start_weekday = start_date.weekday()
+        self.day_length = day_length
+        self.start_weekday = start_weekday
+        self.start_date = start_date
+        self.default = default
+
+        empty = Schedule([], default=default)
+        # schedules[0..6] - дни недели, schedules[7] - праздник
+        self.schedules = [weekdays.get(d, empty) for d in range(7)]
+        self.schedules.append(holiday_schedule if holiday_schedule is not None else empty)
+
+        self.holidays = set()
+        for h in holidays:
+            if isinstance(h, numbers.Integral):
+                self.holidays.add(h)
+            elif start_date is None:
+                raise ValueError("Holiday dates require start_date")
+            else:
+                self.holidays.add((_as_date(h) - start_date).days)
+
+    def schedule_for_day(self, day):
+        """
+        Расписание (Schedule) для дня с номером day (0 - первый день).
+        """
+        if day in self.holidays:
+            return self.schedules[7]
+        return self.schedules[(self.start_weekday + day) % 7]
+
+    def value(self, t):
+        day, minute = divmod(t, self.day_length)
+        return self.schedule_for_day(int(day)).value(minute)
+
+    def at(self, t):
+        """
+        Значения календаря для массива моментов t (в минутах от начала первого дня).
+        """
+        if np.ndim(t) == 0:
+            return self.value(t)
+        t = np.asarray(t, dtype=np.float64)
+        day = (t // self.day_length).astype(np.int64)
+        minute = t - day * self.day_length
+
+        kind = (self.start_weekday + day) % 7
+        if self.holidays:
+            kind[np.isin(day, list(self.holidays))] = 7
+
+        tables = [s._table for s in self.schedules]
+        out = np.empty(t.shape + tables[0].shape[1:], dtype=np.result_type(*tables))
+        for k in np.unique(kind):
+            mask = kind == k
+            out[mask] = self.schedules[k].at(minute[mask])
+        return out
+
+    def dense(self, total_minutes):
+        return self.at(np.arange(total_minutes))
+
+    def __call__(self, t):
+        return self.at(t)
+
+
+def _as_date(d):
+    if isinstance(d, datetime.date):
+        return d
+    return datetime.date.fromisoformat(d)
+
+
+def _day_key(name):
+    """
+    'mon'..'sun', 'monday', 0..6 -> номер дня недели; 'holiday' -> 7.
+    """
+    name = str(name).strip().lower()
+    if name == "holiday":
+        return 7
+    if name.isdigit():
+        return int(name)
+    return WEEKDAYS.index(name[:3])
+
+
+def _parse_value(v):
+    if isinstance(v, (list, tuple)):
+        return tuple(v) if len(v) > 1 else v[0]
+    return v
+
+
+def _number(text):
+    # целое, если записано как целое, иначе float ("2.5", "1e3", "2E-1")
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def load_calendar(path, day_length=None, default=None, holidays=None, start_date=None):
+    """
+    Загрузка недельного календаря из JSON или CSV.
+
+    JSON:
+      {"day_length": 480, "start_date": "2024-09-02", "default": [0, 0],
+       "weekdays": {"mon": [[0, 20, [0, 2]], [20, 100, [2, 5]]], ...},
+       "holiday": [[0, 480, [0, 0]]],
+       "holidays": ["2024-11-04"]}
+
+    CSV (заголовок обязателен): day,start,end,value1[,value2...]
+      где day - mon..sun или holiday. Даты праздников и start_date для CSV
+      передаются аргументами holidays / start_date.
+
+    Аргументы day_length, default, holidays, start_date (если заданы)
+    переопределяют значения из файла.
+
+    ВОЗВРАЩАЕТ: WeeklyCalendar.
+    """
+    if str(path).endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            spec = json.load(f)
+        dflt = _parse_value(spec.get("default", 0)) if default is None else default
+        weekdays = {}
+        holiday_schedule = None
+        for name, intervals in spec.get("weekdays", {}).items():
+            sched = Schedule([(a, b, _parse_value(v)) for (a, b, v) in intervals], default=dflt)
+            weekdays[_day_key(name)] = sched
+        if "holiday" in spec:
+            holiday_schedule = Schedule([(a, b, _parse_value(v)) for (a, b, v) in spec["holiday"]],
+                                        default=dflt)
+        return WeeklyCalendar(
+            weekdays,
+            day_length=spec.get("day_length", 1440) if day_length is None else day_length,
+            holidays=spec.get("holidays", ()) if holidays is None else holidays,
+            holiday_schedule=holiday_schedule,
+            start_date=spec.get("start_date") if start_date is None else start_date,
+            default=dflt
+        )
+
+    rows = {}
+    width = 1
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)  # заголовок
+        for row in reader:
+            if not row or row[0].startswith("#"):
+                continue
+            nums = [_number(x) for x in row[3:]]
+            width = len(nums)
+            rows.setdefault(_day_key(row[0]), []).append(
+                (int(row[1]), int(row[2]), nums[0] if width == 1 else tuple(nums)))
+    if default is None:
+        default = 0 if width == 1 else (0,) * width
+    schedules = {k: Schedule(v, default=default) for k, v in rows.items()}
+    holiday_schedule = schedules.pop(7, None)
+    return WeeklyCalendar(
+        schedules,
+        day_length=1440 if day_length is None else day_length,
+        holidays=() if holidays is None else holidays,
+        holiday_schedule=holiday_schedule,
+        start_date=start_date,
+        default=default
+    )
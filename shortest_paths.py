@@ -0,0 +1,313 @@
+import heapq
+import math
+
+import numpy as np
+
+# Наибольший вес ребра, при котором dijkstra_csr выбирает очередь Дайала:
+# кольцо из max_weight + 1 корзин, просмотр пустых корзин - O(V * C)
+DIAL_MAX_WEIGHT = 255
+
+
+class _RowView:
+    """
+    Доступ к массиву NumPy как к списку без копирования: срез возвращает
+    короткий список Python (соседи одной вершины), индекс - число Python.
+    Для массивов, открытых через mmap: страницы файла остаются общими.
+    """
+    __slots__ = ("array",)
+
+    def __init__(self, array):
+        self.array = array
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.array[key].tolist()
+        return self.array[key].item()
+
+
+class CSRGraph:
+    """
+    Ориентированный взвешенный граф в формате CSR (compressed sparse row):
+    рёбра из вершины u - это indices[indptr[u]:indptr[u+1]] с весами
+    weights[indptr[u]:indptr[u+1]]. Память - O(V + E), а не O(V²), как у
+    матрицы смежности, поэтому подходят графы с миллионами вершин и рёбер.
+
+    indptr  - массив длины n + 1 (int64);
+    indices - номера концов рёбер (int64);
+    weights - веса рёбер (int64 для целых весов, иначе float64).
+    """
+
+    def __init__(self, indptr, indices, weights):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        weights = np.asarray(weights)
+        self.weights = weights.astype(np.int64 if weights.dtype.kind in "iub" else np.float64, copy=False)
+        if len(self.indices) != len(self.weights) or self.indptr[-1] != len(self.indices):
+            raise ValueError("indptr, indices and weights do not describe the same edges")
+        if len(self.weights) and self.weights.min() < 0:
+            raise ValueError("Dijkstra requires non-negative edge weights")
+        self.n = len(self.indptr) - 1
+        self._lists = None
+
+    @classmethod
+    def from_dense(cls, matrix):
+        """
+        Из матрицы смежности (как matrix в algoritm_deikstr.py): matrix[u][v] -
+        вес ребра u -> v, 0 - ребра нет. Порядок соседей - по возрастанию v.
+        """
+        m = np.asarray(matrix)
+        u, v = np.nonzero(m)
+        counts = np.bincount(u, minlength=len(m))
+        indptr = np.concatenate(([0], np.cumsum(counts)))
+        return cls(indptr, v, m[u, v])
+
+    @classmethod
+    def from_edges(cls, src, dst, weights, n=None, directed=True):
+        """
+        Из списка рёбер (массивы src, dst, weights). directed=False добавляет
+        обратное ребро для каждого. Сборка векторная: сортировка по src и bincount.
+        """
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        weights = np.asarray(weights)
+        if not directed:
+            src, dst = np.concatenate((src, dst)), np.concatenate((dst, src))
+            weights = np.concatenate((weights, weights))
+        if n is None:
+            n = int(max(src.max(initial=-1), dst.max(initial=-1))) + 1
+        order = np.argsort(src, kind="stable")
+        counts = np.bincount(src, minlength=n)
+        indptr = np.concatenate(([0], np.cumsum(counts)))
+        return cls(indptr, dst[order], weights[order])
+
+    @property
+    def n_edges(self):
+        return len(self.indices)
+
+    @property
+    def max_weight(self):
+        return self.weights.max().item() if len(self.weights) else 0
+
+    def small_integer_weights(self, limit=DIAL_MAX_WEIGHT):
+        """Все веса - целые из [0, limit] (тогда подходит очередь Дайала)."""
+        return self.weights.dtype.kind == "i" and self.max_weight <= limit
+
+    def edge_id(self, u, v):
+        """
+        Номер ребра u -> v в массивах indices / weights (из параллельных рёбер -
+        самое короткое). Если ребра нет - ValueError.
+        """
+        a, b = self.indptr[u], self.indptr[u + 1]
+        found = np.flatnonzero(self.indices[a:b] == v)
+        if not len(found):
+            raise ValueError(f"No edge {u} -> {v}")
+        return int(a + found[np.argmin(self.weights[a + found])])
+
+    def set_weight(self, edge, weight):
+        """
+        Новый вес ребра с номером edge (структура графа не меняется).
+        weight = inf закрывает ребро; целые веса тогда переводятся в float.
+        """
+        if weight < 0:
+            raise ValueError("Dijkstra requires non-negative edge weights")
+        if self.weights.dtype.kind == "i" and (math.isinf(weight) or weight != int(weight)):
+            self.weights = self.weights.astype(np.float64)
+            self._lists = None
+        elif not self.weights.flags.writeable:
+            self.weights = self.weights.copy()
+        self.weights[edge] = weight
+        if self._lists is not None:
+            self._lists[2][edge] = self.weights[edge].item()
+
+    def reverse(self):
+        """
+        Входящие рёбра: (indptr, sources, edge_ids) в виде списков, где для вершины v
+        sources[indptr[v]:indptr[v+1]] - начала рёбер, ведущих в v, а edge_ids -
+        их номера в этом графе (веса берутся из weights, поэтому set_weight
+        не требует перестройки).
+        """
+        order = np.argsort(self.indices, kind="stable")
+        rows = np.repeat(np.arange(self.n), np.diff(self.indptr))
+        counts = np.bincount(self.indices, minlength=self.n)
+        indptr = np.concatenate(([0], np.cumsum(counts)))
+        return indptr.tolist(), rows[order].tolist(), order.tolist()
+
+    def lists(self):
+        """
+        Те же массивы в виде списков Python (кешируются): в цикле Дейкстры
+        обращение к элементу списка в несколько раз быстрее, чем к numpy-массиву.
+        """
+        if self._lists is None:
+            self._lists = (self.indptr.tolist(), self.indices.tolist(), self.weights.tolist())
+        return self._lists
+
+    def views(self):
+        """
+        Те же массивы без копирования (_RowView): соседи читаются прямо из
+        indptr / indices / weights по одной вершине. Для графа в mmap, общего
+        для нескольких процессов (path_tables.distance_table), - вместо lists().
+        """
+        return _RowView(self.indptr), _RowView(self.indices), _RowView(self.weights)
+
+    def to_dense(self):
+        """
+        Матрица смежности (0 - нет ребра), как matrix в algoritm_deikstr.py.
+        Из параллельных рёбер u -> v остаётся самое короткое.
+        """
+        m = np.full((self.n, self.n), np.inf)
+        rows = np.repeat(np.arange(self.n), np.diff(self.indptr))
+        np.minimum.at(m, (rows, self.indices), self.weights)
+        m[np.isinf(m)] = 0
+        return m.astype(self.weights.dtype)
+
+
+def dijkstra_csr(graph, start, trace=None, queue="auto", shared=False):
+    """
+    Алгоритм Дейкстры на CSR-графе.
+
+    ПАРАМЕТРЫ:
+    graph - CSRGraph.
+    start - начальная вершина.
+    trace - необязательная функция trace(u, v, weight, distances), вызывается
+            для каждого просмотренного ребра u -> v до проверки улучшения
+            (для учебного вывода, см. algoritm_deikstr.print_trace).
+            Без trace в цикле нет ни вывода, ни лишних вызовов.
+    queue - очередь с приоритетом:
+            "heap" - двоичная куча heapq, O((V + E) log V), любые веса;
+            "dial" - корзины Дайала, O(E + V * C) для целых весов 0..C;
+            "auto" - "dial", если все веса целые и не больше DIAL_MAX_WEIGHT
+                     и trace не задан, иначе "heap".
+    shared - читать рёбра прямо из массивов графа (views), не создавая
+             копию в списках Python (lists) - для графа в общей памяти.
+
+    ВОЗВРАЩАЕТ: список расстояний длины n (float('inf') - недостижима).
+    """
+    if queue == "auto":
+        queue = "dial" if trace is None and graph.small_integer_weights() else "heap"
+    if queue == "dial":
+        if graph.weights.dtype.kind != "i":
+            raise ValueError("Dial's bucket queue requires non-negative integer weights")
+        return _dijkstra_dial(graph, start, trace, shared=shared)
+    if queue != "heap":
+        raise ValueError("Unknown queue. Use 'auto', 'heap' or 'dial'.")
+
+    indptr, indices, weights = graph.views() if shared else graph.lists()
+    distances = [float('inf')] * graph.n
+    distances[start] = 0
+    heap = [(0, start)]
+    heappop, heappush = heapq.heappop, heapq.heappush
+
+    if trace is not None:
+        while heap:
+            d, u = heappop(heap)
+            if d > distances[u]:
+                continue
+            for i in range(indptr[u], indptr[u + 1]):
+                v, w = indices[i], weights[i]
+                trace(u, v, w, distances)
+                if distances[v] > d + w:
+                    distances[v] = d + w
+                    heappush(heap, (d + w, v))
+        return distances
+
+    while heap:
+        d, u = heappop(heap)
+        if d > distances[u]:
+            continue
+        a, b = indptr[u], indptr[u + 1]
+        for v, w in zip(indices[a:b], weights[a:b]):
+            nd = d + w
+            if nd < distances[v]:
+                distances[v] = nd
+                heappush(heap, (nd, v))
+    return distances
+
+
+def _dijkstra_dial(graph, start, trace=None, parents=None, shared=False):
+    """
+    Дейкстра с очередью Дайала: корзина d хранит вершины с расстоянием d.
+    При весах 0..C все расстояния в очереди лежат в окне [d, d + C], поэтому
+    хватает кольца из C + 1 корзин (номер корзины - d % (C + 1)). Вставка и
+    извлечение - append / pop списка, без кортежей и heapq.
+    parents - список длины n для дерева путей (заполняется, если задан).
+    shared  - рёбра из массивов графа без копии в списки (как в dijkstra_csr).
+    """
+    indptr, indices, weights = graph.views() if shared else graph.lists()
+    distances = [float('inf')] * graph.n
+    distances[start] = 0
+    n_buckets = graph.max_weight + 1
+    buckets = [[] for _ in range(n_buckets)]
+    buckets[0].append(start)
+    pending = 1  # записей в корзинах (включая устаревшие)
+    d = 0
+
+    while pending:
+        bucket = buckets[d % n_buckets]
+        while not bucket:
+            d += 1
+            bucket = buckets[d % n_buckets]
+        # ребро веса 0 добавляет вершину в текущую корзину - она тоже будет обработана
+        while bucket:
+            u = bucket.pop()
+            pending -= 1
+            if distances[u] != d:  # устаревшая запись: вершина уже получила меньшее расстояние
+                continue
+            a, b = indptr[u], indptr[u + 1]
+            for v, w in zip(indices[a:b], weights[a:b]):
+                if trace is not None:
+                    trace(u, v, w, distances)
+                nd = d + w
+                if nd < distances[v]:
+                    distances[v] = nd
+                    if parents is not None:
+                        parents[v] = u
+                    buckets[nd % n_buckets].append(v)
+                    pending += 1
+        d += 1
+    return distances
+
+
+def shortest_path_tree(graph, start, queue="auto"):
+    """
+    Дейкстра с деревом кратчайших путей (queue - как у dijkstra_csr, без trace).
+
+    ВОЗВРАЩАЕТ: (distances, parents) - списки длины n; parents[v] - предыдущая
+    вершина на кратчайшем пути в v (-1 для start и недостижимых вершин).
+    Путь восстанавливает reconstruct_path.
+    """
+    parents = [-1] * graph.n
+    if queue == "dial" or (queue == "auto" and graph.small_integer_weights()):
+        return _dijkstra_dial(graph, start, parents=parents), parents
+
+    indptr, indices, weights = graph.lists()
+    distances = [float('inf')] * graph.n
+    distances[start] = 0
+    heap = [(0, start)]
+    heappop, heappush = heapq.heappop, heapq.heappush
+    while heap:
+        d, u = heappop(heap)
+        if d > distances[u]:
+            continue
+        a, b = indptr[u], indptr[u + 1]
+        for v, w in zip(indices[a:b], weights[a:b]):
+            nd = d + w
+            if nd < distances[v]:
+                distances[v] = nd
+                parents[v] = u
+                heappush(heap, (nd, v))
+    return distances, parents
+
+
+def reconstruct_path(parents, start, target):
+    """
+    Путь start -> target по дереву parents (список вершин) или None,
+    если target недостижима.
+    """
+    path = [target]
+    while path[-1] != start:
+        p = parents[path[-1]]
+        if p < 0:
+            return None
+        path.append(p)
+    path.reverse()
+    return path
@@ -0,0 +1,130 @@
+import numpy as np
+
+from replications import confidence_interval
+from streaming_stats import BatchMeans, TurnstileStats
+
+
+def mser(values, max_fraction=0.5):
+    """
+    Длина разгонного участка по правилу MSER (Уайт, 1997).
+
+    Для каждого d считается MSER(d) = Σ_{i>d} (y_i - ȳ_d)² / (n - d)², где
+    ȳ_d - среднее после отбрасывания первых d значений, и выбирается d
+    с наименьшим MSER(d) среди d <= max_fraction * n. Для средних по пачкам
+    из 5 наблюдений это MSER-5. Все суммы хвостов - через обратные
+    накопленные суммы, O(n).
+
+    ВОЗВРАЩАЕТ: d - сколько первых значений отбросить.
+    """
+    y = np.asarray(values, dtype=np.float64)
+    n = len(y)
+    if n < 3:
+        return 0
+    y = y - y.mean()  # против потери точности в s2 - s1² / k
+    s1 = np.cumsum(y[::-1])[::-1]
+    s2 = np.cumsum((y * y)[::-1])[::-1]
+    k = n - np.arange(n)  # длина хвоста после отбрасывания d значений
+    stat = (s2 - s1 * s1 / k) / (k * k)
+    limit = min(int(max_fraction * n), n - 2)
+    return int(np.argmin(stat[:limit + 1]))
+
+
+def batch_means_ci(values, n_batches=20, confidence=0.95):
+    """
+    Доверительный интервал для стационарного среднего по одному прогону
+    (метод пакетных средних): ряд делится на n_batches равных пачек, средние
+    пачек считаются почти независимыми, и к ним применяется интервал Стьюдента.
+    Лишние значения (остаток от деления) отбрасываются из начала ряда.
+
+    ВОЗВРАЩАЕТ: (mean, half_width, lag1) - lag1 - автокорреляция соседних
+    средних пачек; если она заметно больше 0 (например, > 0.2), пачки
+    коротки и интервал занижен - нужен более длинный прогон.
+    """
+    y = np.asarray(values, dtype=np.float64)
+    k = min(n_batches, len(y))
+    if k == 0:
+        return float("nan"), float("inf"), float("nan")
+    size = len(y) // k
+    means = y[len(y) - k * size:].reshape(k, size).mean(axis=1)
+    mean, hw = confidence_interval(means, confidence)
+    c = means - means.mean()
+    denom = np.dot(c, c)
+    lag1 = float(np.dot(c[:-1], c[1:]) / denom) if k > 2 and denom > 0 else float("nan")
+    return float(mean), float(hw), lag1
+
+
+def analyze(series, batch=5, n_batches=20, confidence=0.95, max_fraction=0.5):
+    """
+    Стационарная оценка по ряду одного прогона: разгонный участок
+    отбрасывается автоматически (mser по средним пачек), по остатку -
+    batch_means_ci.
+
+    ПАРАМЕТРЫ:
+    series       - streaming_stats.BatchMeans (например, TurnstileStats(series=True).wait_series)
+                   или массив наблюдений (например, res["queue_length"] или
+                   res["waiting_times"]); массив сворачивается в средние по batch.
+    batch        - размер пачки для MSER (5 - MSER-5), только для массива.
+    n_batches    - число пакетных средних для доверительного интервала.
+    confidence   - уровень доверия.
+    max_fraction - отбрасывается не больше этой доли ряда.
+
+    ВОЗВРАЩАЕТ: словарь
+      mean, half_width, ci_low, ci_high - оценка без разгонного участка;
+      warmup        - сколько первых наблюдений отброшено;
+      observations  - сколько наблюдений осталось;
+      raw_mean      - среднее по всему ряду (со смещением от старта с пустой очередью);
+      lag1          - автокорреляция пакетных средних (см. batch_means_ci).
+    """
+    if isinstance(series, BatchMeans):
+        means, batch = series.means, series.batch
+    else:
+        y = np.asarray(series, dtype=np.float64)
+        means = y[:len(y) // batch * batch].reshape(-1, batch).mean(axis=1)
+    d = mser(means, max_fraction)
+    mean, hw, lag1 = batch_means_ci(means[d:], n_batches, confidence)
+    return {
+        "mean": mean,
+        "half_width": hw,
+        "ci_low": mean - hw,
+        "ci_high": mean + hw,
+        "warmup": d * batch,
+        "observations": (len(means) - d) * batch,
+        "raw_mean": float(means.mean()) if len(means) else float("nan"),
+        "lag1": lag1,
+    }
+
+
+def run_batch_means(
+        simulate,
+        params,
+        seed=None,
+        n_batches=20,
+        confidence=0.95,
+        bin_width=1.0,
+        max_fraction=0.5
+):
+    """
+    Стационарные показатели по одному длинному прогону вместо многих
+    независимых: симулятор получает TurnstileStats(series=True), затем
+    по рядам ожидания и длины очереди отбрасывается разгонный участок
+    (MSER-5) и строятся интервалы методом пакетных средних.
+
+    ПАРАМЕТРЫ:
+    simulate   - симулятор с параметром stats (simulate_single_turnstile,
+                 simulate_single_turnstile_events, simulate_events, ...).
+    params     - его параметры (T, servers, ...), без seed и stats.
+    bin_width  - интервал усреднения длины очереди (минуты).
+    seed, n_batches, confidence, max_fraction - см. analyze.
+
+    ВОЗВРАЩАЕТ: {"avg_wait": analyze(...), "avg_queue": analyze(...),
+                 "summary": показатели всего прогона, включая разгон (TurnstileStats.summary)}.
+    """
+    stats = TurnstileStats(series=True, bin_width=bin_width)
+    simulate(**params, seed=seed, stats=stats)
+    return {
+        "avg_wait": analyze(stats.wait_series, n_batches=n_batches, confidence=confidence,
+                            max_fraction=max_fraction),
+        "avg_queue": analyze(stats.queue_series, n_batches=n_batches, confidence=confidence,
+                             max_fraction=max_fraction),
+        "summary": stats.summary(),
+    }
@@ -0,0 +1,371 @@
+import math
+
+import numpy as np
+
+
+class RunningStats:
+    """
+    Среднее и дисперсия "на лету" (алгоритм Уэлфорда) за O(1) памяти.
+    Два накопителя объединяются формулой Чана (merge), поэтому их можно
+    считать в разных процессах и сложить.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def merge(self, other):
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.mean, self.m2 = other.n, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class P2Quantile:
+    """
+    Оценка квантиля уровня p алгоритмом P² (Jain, Chlamtac, 1985):
+    хранит всего 5 маркеров, без сохранения самих наблюдений.
+    P² не объединяется между прогонами - для этого есть Histogram.
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self.n = 0
+        self.q = []                          # высоты маркеров
+        self.pos = [1, 2, 3, 4, 5]           # положения маркеров
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.inc = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        q, pos = self.q, self.pos
+        if self.n < 5:
+            q.append(x)
+            self.n += 1
+            if self.n == 5:
+                q.sort()
+            return
+        self.n += 1
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            pos[i] += 1
+        for i in range(5):
+            self.desired[i] += self.inc[i]
+
+        # Подстраиваем три средних маркера (параболическая, иначе линейная формула)
+        for i in (1, 2, 3):
+            d = self.desired[i] - pos[i]
+            if (d >= 1 and pos[i + 1] - pos[i] > 1) or (d <= -1 and pos[i - 1] - pos[i] < -1):
+                d = 1 if d > 0 else -1
+                qn = q[i] + d / (pos[i + 1] - pos[i - 1]) * (
+                    (pos[i] - pos[i - 1] + d) * (q[i + 1] - q[i]) / (pos[i + 1] - pos[i])
+                    + (pos[i + 1] - pos[i] - d) * (q[i] - q[i - 1]) / (pos[i] - pos[i - 1]))
+                if not q[i - 1] < qn < q[i + 1]:
+                    qn = q[i] + d * (q[i + d] - q[i]) / (pos[i + d] - pos[i])
+                q[i] = qn
+                pos[i] += d
+
+    def value(self):
+        if self.n == 0:
+            return 0.0
+        if self.n < 5:
+            return float(np.percentile(self.q, self.p * 100))
+        return self.q[2]
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными корзинами [lo, hi) и счётчиками выхода
+    за границы. Добавление - O(1), объединение - сумма счётчиков
+    (только для гистограмм с одинаковыми границами). Квантили - с точностью
+    до ширины корзины (линейная интерполяция внутри корзины).
+    """
+
+    def __init__(self, lo=0.0, hi=60.0, bins=600):
+        self.lo = lo
+        self.hi = hi
+        self.bins = bins
+        self.width = (hi - lo) / bins
+        self.counts = np.zeros(bins + 2, dtype=np.int64)  # [0] - ниже lo, [-1] - не меньше hi
+
+    def _index(self, x):
+        if x < self.lo:
+            return 0
+        if x >= self.hi:
+            return self.bins + 1
+        return int((x - self.lo) / self.width) + 1
+
+    def add(self, x):
+        self.counts[self._index(x)] += 1
+
+    def add_many(self, xs):
+        xs = np.asarray(xs, dtype=np.float64)
+        idx = np.clip(np.floor((xs - self.lo) / self.width).astype(np.int64) + 1, 0, self.bins + 1)
+        self.counts += np.bincount(idx, minlength=self.bins + 2)
+
+    def merge(self, other):
+        if (other.lo, other.hi, other.bins) != (self.lo, self.hi, self.bins):
+            raise ValueError("Histograms with different bins cannot be merged")
+        self.counts += other.counts
+        return self
+
+    @property
+    def n(self):
+        return int(self.counts.sum())
+
+    def quantile(self, p):
+        total = self.n
+        if total == 0:
+            return 0.0
+        target = p * total
+        cum = np.cumsum(self.counts)
+        i = int(np.searchsorted(cum, target, side='left'))
+        if i == 0:
+            return self.lo
+        if i > self.bins:
+            return self.hi
+        before = cum[i - 1]
+        frac = (target - before) / self.counts[i] if self.counts[i] else 0.0
+        return self.lo + (i - 1 + frac) * self.width
+
+    def edges(self):
+        return self.lo + self.width * np.arange(self.bins + 1)
+
+
+class TimeWeightedAverage:
+    """
+    Точное среднее по времени для кусочно-постоянной величины
+    (длина очереди, число занятых турникетов): площадь под графиком / длительность.
+    Объединение складывает площади и длительности прогонов.
+    """
+
+    def __init__(self, t0=0.0, value=0.0):
+        self.t0 = t0
+        self.last_t = t0
+        self.value = value
+        self.area = 0.0
+        self.duration = 0.0
+        self.max = value
+
+    def update(self, t, value):
+        """Величина стала равна value в момент t."""
+        self.area += self.value * (t - self.last_t)
+        self.last_t = t
+        self.value = value
+        if value > self.max:
+            self.max = value
+
+    def close(self, t):
+        """Завершить наблюдение в момент t (конец горизонта)."""
+        self.update(t, self.value)
+        self.duration = t - self.t0
+
+    def merge(self, other):
+        self.area += other.area
+        self.duration += other.duration
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def mean(self):
+        return self.area / self.duration if self.duration > 0 else 0.0
+
+
+class BatchMeans:
+    """
+    Ряд наблюдений (ожидания по порядку обслуживания, длина очереди по
+    минутам), сжатый в средние по пачкам из batch значений - для поиска
+    разгонного участка (MSER-5 при batch=5) и доверительных интервалов
+    методом пакетных средних (steady_state.py).
+
+    Память ограничена: когда пачек становится max_batches, соседние пачки
+    попарно объединяются и размер пачки удваивается, поэтому ряд любой
+    длины занимает не больше max_batches чисел.
+    """
+
+    def __init__(self, batch=5, max_batches=2048):
+        if max_batches < 2 or max_batches % 2:
+            raise ValueError("max_batches must be an even number >= 2")
+        self.batch = batch
+        self.max_batches = max_batches
+        self.n = 0
+        self._means = []
+        self._sum = 0.0
+        self._count = 0
+
+    def add(self, x):
+        self.n += 1
+        self._sum += x
+        self._count += 1
+        if self._count == self.batch:
+            self._means.append(self._sum / self.batch)
+            self._sum = 0.0
+            self._count = 0
+            if len(self._means) == self.max_batches:
+                self._means = np.asarray(self._means).reshape(-1, 2).mean(axis=1).tolist()
+                self.batch *= 2
+
+    @property
+    def means(self):
+        """Средние законченных пачек (незаконченная последняя пачка не входит)."""
+        return np.asarray(self._means, dtype=np.float64)
+
+
+class TimeBatchMeans(BatchMeans):
+    """
+    BatchMeans для кусочно-постоянной величины (длина очереди): наблюдение -
+    среднее по времени за интервал длины bin_width. Интерфейс update / close -
+    как у TimeWeightedAverage.
+    """
+
+    def __init__(self, bin_width=1.0, t0=0.0, value=0.0, batch=5, max_batches=2048):
+        super().__init__(batch, max_batches)
+        self.bin_width = bin_width
+        self.last_t = t0
+        self.value = value
+        self._bin_end = t0 + bin_width
+        self._area = 0.0
+
+    def update(self, t, value):
+        """Величина стала равна value в момент t."""
+        while t >= self._bin_end:
+            self._area += self.value * (self._bin_end - self.last_t)
+            self.add(self._area / self.bin_width)
+            self._area = 0.0
+            self.last_t = self._bin_end
+            self._bin_end += self.bin_width
+        self._area += self.value * (t - self.last_t)
+        self.last_t = t
+        self.value = value
+
+    def close(self, t):
+        """Конец наблюдения: учитываются только полные интервалы до t."""
+        self.update(t, self.value)
+
+
+class TurnstileStats:
+    """
+    Набор накопителей для одного прогона (или объединения прогонов) модели турникета:
+      wait        - RunningStats времени ожидания (среднее, дисперсия, максимум);
+      wait_q      - {p: P2Quantile} для квантилей ожидания;
+      wait_hist   - Histogram времени ожидания (объединяемые квантили);
+      queue, busy - TimeWeightedAverage длины очереди и числа занятых турникетов.
+    Память не зависит от длины горизонта и числа людей.
+
+    servers - число турникетов (для загрузки в summary). None - его задаёт
+    движок: event_sim.simulate_events записывает сюда свой servers, а если
+    число задано и не совпадает с движком, выдаёт ValueError. Модели без
+    servers (минутные в 3.py, 4.py) - один турникет.
+
+    series=True дополнительно хранит сами ряды в сжатом виде (BatchMeans):
+      wait_series  - ожидания по порядку начала обслуживания;
+      queue_series - средняя длина очереди за каждые bin_width минут.
+    По ним steady_state.analyze отбрасывает разгонный участок (MSER-5) и
+    строит доверительный интервал по пакетным средним одного длинного прогона.
+    """
+
+    def __init__(self, quantiles=(0.5, 0.95), wait_range=(0.0, 60.0), wait_bins=600, servers=None,
+                 series=False, bin_width=1.0):
+        self.quantiles = tuple(quantiles)
+        self.wait = RunningStats()
+        self.wait_q = {p: P2Quantile(p) for p in quantiles}
+        self.wait_hist = Histogram(wait_range[0], wait_range[1], wait_bins)
+        self.queue = TimeWeightedAverage()
+        self.busy = TimeWeightedAverage()
+        self.servers = servers
+        self.wait_series = BatchMeans() if series else None
+        self.queue_series = TimeBatchMeans(bin_width) if series else None
+
+    def add_wait(self, w):
+        self.wait.add(w)
+        for est in self.wait_q.values():
+            est.add(w)
+        self.wait_hist.add(w)
+        if self.wait_series is not None:
+            self.wait_series.add(w)
+
+    def update_state(self, t, queue_len, n_busy):
+        self.queue.update(t, queue_len)
+        self.busy.update(t, n_busy)
+        if self.queue_series is not None:
+            self.queue_series.update(t, queue_len)
+
+    def close(self, t):
+        self.queue.close(t)
+        self.busy.close(t)
+        if self.queue_series is not None:
+            self.queue_series.close(t)
+
+    def merge(self, other):
+        """
+        Объединение с накопителями другого прогона. Квантили P² не
+        объединяются, поэтому после merge квантили берутся из гистограммы.
+        Ряды (series) разных прогонов не склеиваются и после merge сбрасываются.
+        """
+        self.wait_series = self.queue_series = None
+        if self.servers is None:
+            self.servers = other.servers
+        self.wait.merge(other.wait)
+        self.wait_hist.merge(other.wait_hist)
+        self.wait_q = {}
+        self.queue.merge(other.queue)
+        self.busy.merge(other.busy)
+        return self
+
+    def summary(self):
+        """
+        Словарь итоговых показателей (как default_metrics из replications.py).
+        """
+        res = {
+            "avg_queue": self.queue.mean,
+            "max_queue": self.queue.max,
+            "avg_wait": self.wait.mean,
+            "max_wait": self.wait.max if self.wait.n else 0.0,
+            "std_wait": self.wait.std,
+            "utilization": self.busy.mean / (self.servers or 1),
+            "served": float(self.wait.n),
+        }
+        for p in self.quantiles:
+            est = self.wait_q.get(p)
+            res[f"p{p * 100:g}_wait"] = est.value() if est is not None else self.wait_hist.quantile(p)
+        return res
@@ -0,0 +1,180 @@
+import os
+import warnings
+
+import numpy as np
+
+# Внутреннее представление моментов прохода - datetime64 с точностью до миллисекунды
+TIME_DTYPE = "datetime64[ms]"
+
+
+def _epoch_to_time(values, unit="s"):
+    """Числа (секунды или миллисекунды от 1970-01-01) -> массив datetime64[ms]."""
+    values = np.asarray(values)
+    scale = {"s": 1000, "ms": 1}[unit]
+    if values.dtype.kind == "f":
+        return np.round(values * scale).astype(np.int64).view(TIME_DTYPE)
+    return (values.astype(np.int64) * scale).view(TIME_DTYPE)
+
+
+def iter_log_chunks(
+        path,
+        column=0,
+        delimiter=",",
+        skip_header=1,
+        time_format="datetime",
+        chunk_rows=1_000_000,
+        dtype="<i8",
+        unit="s"
+):
+    """
+    Чтение журнала турникетов кусками по chunk_rows записей.
+
+    Текстовый журнал (CSV) разбирается np.loadtxt (разбор на C, без цикла
+    Python по строкам); из каждой строки берётся только столбец column.
+    Двоичный журнал (.npy или сырой файл чисел dtype) открывается через mmap,
+    и куски - это срезы отображения, без копирования всего файла в память.
+
+    ПАРАМЕТРЫ:
+    path        - путь к журналу (.csv / .txt, .npy или сырой двоичный файл).
+    column      - номер столбца с моментом прохода (для CSV).
+    delimiter   - разделитель столбцов (для CSV).
+    skip_header - сколько строк заголовка пропустить (для CSV).
+    time_format - "datetime": текст вида 2024-09-02 08:01:23[.250];
+                  "epoch": число секунд (или миллисекунд, см. unit) от 1970-01-01.
+    chunk_rows  - размер куска (записей).
+    dtype, unit - тип чисел и единица времени сырого двоичного файла и
+                  столбца "epoch" ("s" или "ms").
+
+    ВОЗВРАЩАЕТ: генератор массивов datetime64[ms].
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in (".csv", ".txt"):
+        if ext == ".npy":
+            data = np.load(path, mmap_mode="r")
+        else:
+            data = np.memmap(path, dtype=dtype, mode="r") if os.path.getsize(path) else np.empty(0, dtype)
+        for i in range(0, len(data), chunk_rows):
+            part = data[i:i + chunk_rows]
+            yield part.astype(TIME_DTYPE) if part.dtype.kind == "M" else _epoch_to_time(part, unit)
+        return
+
+    if time_format not in ("datetime", "epoch"):
+        raise ValueError("Unknown time_format. Use 'datetime' or 'epoch'.")
+    parse_dtype = TIME_DTYPE if time_format == "datetime" else np.float64
+    with open(path, encoding="utf-8") as f:
+        for _ in range(skip_header):
+            f.readline()
+        while True:
+            # loadtxt с max_rows читает из открытого файла ровно chunk_rows строк
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", UserWarning)  # пустой остаток файла
+                part = np.loadtxt(f, delimiter=delimiter, usecols=column, dtype=parse_dtype,
+                                  max_rows=chunk_rows, ndmin=1)
+            if len(part):
+                yield part if time_format == "datetime" else _epoch_to_time(part, unit)
+            if len(part) < chunk_rows:
+                break
+
+
+def load_log(path, sort=True, **kwargs):
+    """
+    Весь журнал одним массивом datetime64[ms] (параметры - как у iter_log_chunks).
+    sort=True - упорядочить по времени (журналы нескольких турникетов
+    часто перемешаны). Для очень больших журналов лучше daily_arrivals,
+    которая не держит все моменты в памяти.
+    """
+    parts = list(iter_log_chunks(path, **kwargs))
+    times = np.concatenate(parts) if parts else np.empty(0, dtype=TIME_DTYPE)
+    if sort and len(times) > 1 and (np.diff(times.view(np.int64)) < 0).any():
+        times.sort()
+    return times
+
+
+def save_binary(times, path):
+    """
+    Сохранить моменты прохода в .npy (datetime64[ms]). Повторное чтение
+    через iter_log_chunks / load_log идёт через mmap, без разбора текста.
+    """
+    np.save(path, np.asarray(times, dtype=TIME_DTYPE))
+
+
+def _day_start_offset(day_start):
+    # "08:00" -> смещение начала рабочего дня от полуночи (timedelta64[ms])
+    h, m = (int(x) for x in day_start.split(":"))
+    return np.timedelta64(h * 60 + m, "m").astype("timedelta64[ms]")
+
+
+def arrivals_per_minute(times, start, minutes):
+    """
+    Число проходов в каждую минуту [start, start + minutes) - тот же вид,
+    что у generate_arrivals из 1.py и generate_poisson_arrivals_piecewise из 2.py.
+
+    times   - массив моментов (datetime64) или уже готовые минуты от start (числа).
+    start   - начало отсчёта (datetime64 или строка '2024-09-02T08:00'); для чисел - None.
+    minutes - длина ряда.
+
+    ВОЗВРАЩАЕТ: массив int64 формы (minutes,). Проходы вне интервала отбрасываются.
+    """
+    offs = minute_offsets(times, start) if start is not None else np.asarray(times, dtype=np.float64)
+    idx = np.floor(offs).astype(np.int64)
+    idx = idx[(idx >= 0) & (idx < minutes)]
+    return np.bincount(idx, minlength=minutes)
+
+
+def minute_offsets(times, start):
+    """
+    Моменты прохода в минутах от start (float64, с долями минуты) -
+    для точного воспроизведения потока в событийной модели
+    (simulate_events(..., arrival_times=...)).
+    """
+    start = np.datetime64(start, "ms")
+    return (np.asarray(times, dtype=TIME_DTYPE) - start).astype(np.int64) / 60000.0
+
+
+def daily_arrivals(source, day_start="08:00", minutes=480, **kwargs):
+    """
+    Потоки по дням: число проходов за каждую минуту рабочего дня
+    [day_start, day_start + minutes) для каждой даты журнала.
+
+    source - путь к журналу (читается кусками, параметры kwargs - как у
+             iter_log_chunks) или массив моментов datetime64.
+
+    ВОЗВРАЩАЕТ: (dates, counts) - массив дат datetime64[D] формы (n_days,)
+    и целочисленный массив формы (n_days, minutes), как у
+    generate_arrivals_batch(..., replications=n_days) из 1.py.
+    Дни без проходов внутри диапазона дат остаются нулевыми строками.
+    """
+    chunks = iter_log_chunks(source, **kwargs) if isinstance(source, (str, os.PathLike)) else [source]
+    offset = _day_start_offset(day_start)
+    first_day = None
+    counts = np.zeros((0, minutes), dtype=np.int64)
+
+    for part in chunks:
+        part = np.asarray(part, dtype=TIME_DTYPE)
+        if not len(part):
+            continue
+        shifted = part - offset  # начало рабочего дня -> полночь
+        days = shifted.astype("datetime64[D]")
+        minute = (shifted - days).astype("timedelta64[m]").astype(np.int64)
+        inside = minute < minutes
+        if not inside.any():
+            continue
+        days, minute = days[inside], minute[inside]
+        lo, hi = days.min(), days.max()
+        if first_day is None:
+            first_day = lo
+        if lo < first_day:
+            # кусок начинается раньше уже накопленных дней - дописываем строки сверху
+            shift = int((first_day - lo).astype(np.int64))
+            counts = np.vstack([np.zeros((shift, minutes), dtype=np.int64), counts])
+            first_day = lo
+        n_days = int((hi - first_day).astype(np.int64)) + 1
+        if n_days > len(counts):
+            counts = np.vstack([counts, np.zeros((n_days - len(counts), minutes), dtype=np.int64)])
+        row = (days - first_day).astype(np.int64)
+        counts += np.bincount(row * minutes + minute, minlength=counts.size).reshape(counts.shape)
+
+    if first_day is None:
+        return np.empty(0, dtype="datetime64[D]"), counts
+    dates = first_day + np.arange(len(counts))
+    return dates, counts